@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.1/ref/settings/
 
 import os
 from pathlib import Path
+import dj_database_url
 import django_heroku
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.instrumentation.QueryBudgetMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,6 +88,31 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# The default cache is per process. Caches every gunicorn worker has to share
+# are kept in the database, each in a table of its own that the backend culls
+# past MAX_ENTRIES; create them with `python manage.py createcachetable`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Google Books result pages and their hit/miss counters, least recently used culled first.
+    'google_books': {
+        'BACKEND': 'core.cache_backends.LRUDatabaseCache',
+        'LOCATION': 'google_books_cache',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # Rendered find-book pages and the generation counter that retires them.
+    'find_book': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'find_book_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -126,9 +154,82 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 
+# Requests running more queries than this are logged as warnings,
+# as are query shapes repeated at least QUERY_BUDGET_DUPLICATE_THRESHOLD times.
+QUERY_BUDGET = 20
+QUERY_BUDGET_DUPLICATE_THRESHOLD = 3
+
+
+# Google Books import: the API endpoint, the hard cap on volumes a single
+# import may request, and how many result pages are fetched concurrently.
+GOOGLE_BOOKS_API_URL = os.environ.get('GOOGLE_BOOKS_API_URL', 'https://www.googleapis.com/books/v1/volumes')
+GOOGLE_BOOKS_MAX_VOLUMES = 400
+GOOGLE_BOOKS_MAX_WORKERS = 8
+# Connections of the async client used by async views under an ASGI server.
+GOOGLE_BOOKS_MAX_CONNECTIONS = 100
+GOOGLE_BOOKS_TIMEOUT = 10
+# Result pages are cached for GOOGLE_BOOKS_CACHE_TTL seconds (0 disables the
+# cache) in the GOOGLE_BOOKS_CACHE_ALIAS cache.
+GOOGLE_BOOKS_CACHE_ALIAS = 'google_books'
+GOOGLE_BOOKS_CACHE_TTL = 6 * 60 * 60
+
+# Run import jobs inside the request instead of queueing them for the
+# `import_worker` command.
+IMPORT_JOBS_EAGER = os.environ.get('IMPORT_JOBS_EAGER') == '1'
+# Running jobs not updated for this long are claimed again by the next worker,
+# so it has to be longer than the longest import takes.
+IMPORT_JOB_LEASE_SECONDS = 15 * 60
+
+# Importers skip known ISBNs with a per-process Bloom filter, sized for at
+# least ISBN_FILTER_MIN_CAPACITY books, with false positives at about
+# ISBN_FILTER_ERROR_RATE (each one costs a database lookup).
+ISBN_FILTER_MIN_CAPACITY = 100000
+ISBN_FILTER_ERROR_RATE = 0.01
+
+# Page-number paginators (the admin, the author API and numbered find-book
+# pages) take the count of unfiltered tables of at least
+# ESTIMATED_COUNT_THRESHOLD rows from the planner's statistics instead of
+# COUNT(*).
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Rendered find-book result pages are cached for FIND_BOOK_CACHE_TIMEOUT
+# seconds (0 disables the cache); any change to books or authors retires them.
+FIND_BOOK_CACHE_ALIAS = 'find_book'
+FIND_BOOK_CACHE_TIMEOUT = 60 * 60
+
+# Local cover cache filled by the `cover_worker` command: where images are
+# stored, the square sizes of the resized variants (needs Pillow), and the
+# limits on downloads, which are retried up to COVER_MAX_ATTEMPTS times.
+# Each scan for changed books looks COVER_SCAN_OVERLAP seconds further back
+# than the last one reached, for transactions that committed late.
+COVERS_ROOT = Path(os.environ.get('COVERS_ROOT', BASE_DIR / 'covers'))
+COVER_SIZES = {'small': 64, 'medium': 128, 'large': 256}
+COVER_MAX_BYTES = 5 * 1024 * 1024
+COVER_MAX_WORKERS = 8
+COVER_MAX_ATTEMPTS = 3
+COVER_TIMEOUT = 10
+COVER_SCAN_OVERLAP = 60
+
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
 
 django_heroku.settings(locals())
+
+# django_heroku adds WhiteNoise's sync-only middleware, which would serialize requests under ASGI.
+MIDDLEWARE = [
+    'core.middleware.AsyncWhiteNoiseMiddleware' if middleware == 'whitenoise.middleware.WhiteNoiseMiddleware'
+    else middleware for middleware in MIDDLEWARE
+]
+
+# Read replicas, as comma separated database URLs, e.g. a copy of the SQLite
+# database: DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3. Safe requests read
+# from them unless the client wrote within the last REPLICA_PIN_SECONDS.
+REPLICA_DATABASES = []
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = dict(dj_database_url.parse(url), TEST={'MIRROR': 'default'})
+    REPLICA_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
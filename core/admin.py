@@ -1,5 +1,6 @@
 from django.contrib import admin
-from core.models import Author, Book
+from core.models import Author, Book, CatalogStat, CoverImage, ImportJob
+from core.pagination import EstimatedCountPaginator
 
 
 @admin.register(Author)
@@ -7,11 +8,43 @@ class AuthorAdmin(admin.ModelAdmin):
     list_display = ('name', 'created_at', 'updated_at')
     list_per_page = 25
     list_display_links = ('name', )
+    paginator = EstimatedCountPaginator
+    # The total would be counted exactly on every page, next to the estimate.
+    show_full_result_count = False
 
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
-    list_display = ('id', 'title', 'isbn')
+    list_display = ('id', 'title', 'author', 'isbn')
+    list_select_related = ('author', )
     list_per_page = 25
     list_display_links = ('id', 'title')
     ordering = ('created_at', )
+    paginator = EstimatedCountPaginator
+    # The total would be counted exactly on every page, next to the estimate.
+    show_full_result_count = False
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'search_phrase', 'status', 'fetched', 'inserted', 'skipped', 'created_at')
+    list_per_page = 25
+    list_filter = ('status', )
+    ordering = ('-id', )
+
+
+@admin.register(CoverImage)
+class CoverImageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'source_url', 'status', 'attempts', 'updated_at')
+    list_per_page = 25
+    list_filter = ('status', )
+    search_fields = ('source_url', )
+    ordering = ('-id', )
+
+
+@admin.register(CatalogStat)
+class CatalogStatAdmin(admin.ModelAdmin):
+    list_display = ('dimension', 'key', 'count')
+    list_per_page = 25
+    list_filter = ('dimension', )
+    ordering = ('dimension', '-count')
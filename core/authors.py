@@ -0,0 +1,187 @@
+"""
+Author identity and duplicate detection.
+
+Authors are identified by ``Author.name_key``: the name case-folded, without
+diacritics or punctuation and with single spaces between its words, so
+"J.R.R. Tolkien" and "j. r. r. Tolkien" are one author. The key is unique,
+and every write path resolves names through it.
+
+Names differing by more than that, like typos or missing initials, are found
+by trigram similarity without comparing each author with every other. On
+PostgreSQL one self-join does it through ``pg_trgm`` and the
+``core_author_name_trgm`` index; elsewhere ``TrigramIndex``, an inverted
+index of the character trigrams of every key, is built in memory. Either way
+``merge_authors()`` folds the confirmed duplicates into one author.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from core import page_cache, search, stats
+from core.models import Author, Book, CatalogStat
+
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+NAME_KEY_LENGTH = 256
+
+
+def name_key(name):
+    """Normalized form of an author's name shared by all its spellings."""
+    decomposed = unicodedata.normalize('NFKD', name.casefold())
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    key = ' '.join(_WORD_RE.findall(stripped)) or ' '.join(name.casefold().split())
+    return key[:NAME_KEY_LENGTH]
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Maps trigrams to the ids of the authors whose keys contain them. Trigrams
+    shared by more than ``max_postings`` authors, like those of common
+    surnames, only slow lookups down and are left out of the candidate
+    search, which can only lower the similarity found.
+    """
+
+    def __init__(self, max_postings=1000):
+        self.max_postings = max_postings
+        self.keys = {}
+        self.postings = defaultdict(list)
+
+    def add(self, author_id, key):
+        self.keys[author_id] = trigrams(key)
+        for trigram in self.keys[author_id]:
+            self.postings[trigram].append(author_id)
+
+    def similar(self, author_id, threshold):
+        """Yields ``(other_id, similarity)`` of the indexed authors at least ``threshold`` similar."""
+        own = self.keys[author_id]
+        shared = Counter()
+        for trigram in own:
+            posting = self.postings[trigram]
+            if len(posting) <= self.max_postings:
+                shared.update(posting)
+        for other_id, count in shared.items():
+            if other_id == author_id:
+                continue
+            score = count / (len(own) + len(self.keys[other_id]) - count)
+            if score >= threshold:
+                yield other_id, score
+
+
+@dataclass
+class MergeSuggestion:
+    keep: Author
+    duplicates: list
+    score: float
+
+
+def author_book_counts(author_ids):
+    rows = CatalogStat.objects.filter(dimension=CatalogStat.AUTHOR, key__in=[str(pk) for pk in author_ids])
+    return {int(key): count for key, count in rows.values_list('key', 'count')}
+
+
+def similar_pairs(threshold, using=None):
+    """
+    Returns ``(author_id, other_id, similarity)`` for every pair of authors,
+    ``author_id < other_id``, at least ``threshold`` similar.
+    """
+    using = using or router.db_for_read(Author)
+    if search.backend_for(connections[using]) == 'postgres':
+        return postgres_similar_pairs(threshold, using)
+    index = TrigramIndex()
+    for author_id, key in Author.objects.using(using).order_by('id').values_list('id', 'name_key').iterator():
+        index.add(author_id, key)
+    return [
+        (author_id, other_id, score)
+        for author_id in index.keys
+        for other_id, score in index.similar(author_id, threshold)
+        if other_id > author_id
+    ]
+
+
+def postgres_similar_pairs(threshold, using):
+    """
+    ``TrigramSimilarity`` of every pair of names, as one self-join on the
+    ``%`` operator so the ``core_author_name_trgm`` index finds the candidates.
+    The operator compares with ``pg_trgm.similarity_threshold``, set for the
+    transaction only.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(threshold)])
+        cursor.execute(
+            'SELECT author.id, other.id, similarity(author.name, other.name) '
+            'FROM core_author author INNER JOIN core_author other '
+            'ON author.name %% other.name AND author.id < other.id '
+            'WHERE similarity(author.name, other.name) >= %s',
+            [threshold],
+        )
+        return cursor.fetchall()
+
+
+def suggest_merges(threshold=0.7):
+    """
+    Groups authors with similar names, linking every pair at least
+    ``threshold`` similar, and suggests keeping the one with most books.
+    """
+    pairs = similar_pairs(threshold)
+
+    # Union-find over the similar pairs.
+    parents = {}
+
+    def root(author_id):
+        while parents.get(author_id, author_id) != author_id:
+            author_id = parents[author_id]
+        return author_id
+
+    for author_id, other_id, score in pairs:
+        first, second = root(author_id), root(other_id)
+        if first != second:
+            parents[max(first, second)] = min(first, second)
+
+    groups = defaultdict(set)
+    scores = {}
+    for author_id, other_id, score in pairs:
+        group = root(author_id)
+        groups[group].update((author_id, other_id))
+        scores[group] = min(scores.get(group, 1.0), score)
+    member_ids = {author_id for members in groups.values() for author_id in members}
+    authors = Author.objects.in_bulk(member_ids)
+    counts = author_book_counts(member_ids)
+
+    suggestions = []
+    for group, members in groups.items():
+        members = sorted(members, key=lambda pk: (-counts.get(pk, 0), pk))
+        suggestions.append(MergeSuggestion(
+            keep=authors[members[0]],
+            duplicates=[authors[pk] for pk in members[1:]],
+            score=round(scores[group], 3),
+        ))
+    return sorted(suggestions, key=lambda suggestion: (-suggestion.score, suggestion.keep.id))
+
+
+def merge_authors(keep, duplicates):
+    """
+    Moves the books of ``duplicates`` to ``keep`` with one UPDATE, carries
+    their statistics over and deletes them. Returns the number of books moved.
+    """
+    ids = [author.id for author in duplicates if author.id != keep.id]
+    if not ids:
+        return 0
+    with transaction.atomic():
+        moved = Book.objects.filter(author_id__in=ids).update(author=keep, updated_at=timezone.now())
+        duplicate_stats = CatalogStat.objects.filter(dimension=CatalogStat.AUTHOR, key__in=[str(pk) for pk in ids])
+        stats.record(Counter({(CatalogStat.AUTHOR, str(keep.id)): moved}))
+        duplicate_stats.delete()
+        Author.objects.filter(id__in=ids).delete()
+        page_cache.invalidate()
+    return moved
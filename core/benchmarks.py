@@ -0,0 +1,333 @@
+"""
+In-process benchmarks of the views, the API and the import path.
+
+Every scenario is warmed up once and then run ``iterations`` times through
+the Django test client against a catalog seeded by ``core.seed``, recording
+the p50/p95 latency and the query count; one more run under ``tracemalloc`` records the peak memory.
+Results are plain dicts, so they can be stored as a JSON baseline and later
+compared with ``compare()``.
+
+``compare_import_concurrency()`` measures how many Google Books imports the
+WSGI and the ASGI application keep in flight against a slow local stand-in
+for the API.
+"""
+import asyncio
+import math
+import platform
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import count
+from typing import Callable
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.fake_google_books import GoogleBooksStubServer
+from core.importer import import_books
+from core.instrumentation import record_queries
+from core.isbn import isbn13
+from core.loadtest import RequestSpec, build_environ, call
+from core.models import Book, ImportJob
+from core.seed import SEED_ISBN_PREFIX, author_name, book_data, seed_catalog
+
+
+# Books added by the write scenarios get ISBNs outside of the seeded 979-0 range.
+ADD_BOOK_ISBN_PREFIX = '9791'
+IMPORT_ISBN_PREFIX = '9792'
+
+METRICS = ('p50_ms', 'p95_ms', 'queries', 'peak_memory_kb')
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: Callable
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """
+    Like the test runner, switches to a database of its own for the block;
+    SQLite gets a file instead of an in-memory database so that it can be kept.
+    Only the primary is switched, so reads aren't routed to the replicas,
+    which would hold the real catalog rather than the seeded one.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+        test_settings['NAME'] = str(settings.BASE_DIR / 'benchmark.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        with override_settings(REPLICA_DATABASES=[]):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def get_scenarios():
+    """Returns the benchmarked scenarios for the catalog currently in the database."""
+    book = Book.objects.order_by('id').select_related('author').first()
+    # Continue numbering after the books written by earlier runs.
+    added = count(Book.objects.filter(isbn__startswith=ADD_BOOK_ISBN_PREFIX).count())
+    imported = count(Book.objects.filter(isbn__startswith=IMPORT_ISBN_PREFIX).count(), 200)
+
+    def get(url, params=None):
+        return lambda client: client.get(url, params or {}, HTTP_ACCEPT='application/json')
+
+    def add_book(client):
+        number = next(added)
+        return client.post(reverse('add-book'), {
+            'title': f'Benchmark {number}',
+            'author': author_name(number % 100),
+            'pub_date': '2001-01-01',
+            'isbn': isbn13(f'{ADD_BOOK_ISBN_PREFIX}{number:08d}'),
+            'pages': 100,
+            'cover_url': 'http://covers.example.com/benchmark.jpg',
+            'language': 'en',
+        })
+
+    def import_batch(client):
+        # The database side of an import of 200 parsed Google Books volumes.
+        start = next(imported)
+        rows = []
+        for number in range(start, start + 200):
+            data = book_data(number, authors=50)
+            data['isbn'] = isbn13(f'{IMPORT_ISBN_PREFIX}{number:08d}')
+            rows.append(data)
+        return import_books(rows)
+
+    def export(client):
+        response = client.get(reverse('export-books'), {'language': 'pl', 'from_date': '2000-01-01'})
+        b''.join(response.streaming_content)
+        return response
+
+    return [
+        Scenario('find-book', get(reverse('find-book'))),
+        Scenario('find-book search', get(reverse('find-book'), {'q': 'river castle'})),
+        Scenario('find-book author', get(reverse('find-book'), {'author': book.author.name})),
+        Scenario('find-book filters', get(reverse('find-book'), {
+            'language': 'pl', 'from_date': '1990-01-01', 'to_date': '2000-01-01',
+        })),
+        Scenario('find-book numbered page', get(reverse('find-book'), {'page': '50'})),
+        Scenario('add-book post', add_book),
+        Scenario('book-list', get(reverse('book-list'))),
+        Scenario('book-list sparse', get(reverse('book-list'), {'fields': 'title,isbn'})),
+        Scenario('book-detail', get(reverse('book-detail', kwargs={'pk': book.id}))),
+        Scenario('author-list', get(reverse('author-list'))),
+        Scenario('stats', get(reverse('stats-list'))),
+        Scenario('export-books', export),
+        Scenario('import batch', import_batch),
+    ]
+
+
+def measure(scenario, client, iterations):
+    # One untimed call warms up the connection, the templates and the URL resolver.
+    scenario.run(client)
+    durations = []
+    queries = []
+    for _ in range(iterations):
+        with record_queries() as recorder:
+            start = time.perf_counter()
+            response = scenario.run(client)
+            durations.append(time.perf_counter() - start)
+        status = getattr(response, 'status_code', 200)
+        if status >= 400:
+            raise RuntimeError(f'{scenario.name} responded with {status}.')
+        queries.append(recorder.count)
+
+    tracemalloc.start()
+    try:
+        scenario.run(client)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(durations, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+        'queries': max(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(sizes, iterations=20, scenarios=None, progress=None):
+    """
+    Seeds the catalog up to each of ``sizes`` books in turn and measures every
+    scenario (or those named in ``scenarios``) on it. ``progress`` is called
+    with a message before each step.
+    """
+    report = progress or (lambda message: None)
+    results = {
+        'meta': {
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iterations': iterations,
+        },
+        'results': {},
+    }
+    client = Client()
+    for size in sorted(sizes):
+        seeded = Book.objects.filter(isbn__startswith=SEED_ISBN_PREFIX).count()
+        if seeded < size:
+            report(f'Seeding {size - seeded} books...')
+            seed_catalog(size - seeded, start=seeded)
+
+        size_results = results['results'][str(size)] = {}
+        for scenario in get_scenarios():
+            if scenarios and scenario.name not in scenarios:
+                continue
+            report(f'{size} books: {scenario.name}')
+            size_results[scenario.name] = measure(scenario, client, iterations)
+    return results
+
+
+def compare(baseline, results, threshold=0.2, min_ms=1.0):
+    """
+    Returns a list of regressions of ``results`` against ``baseline``: latency
+    or peak memory more than ``threshold`` (a fraction) above the baseline, or
+    more queries than before. Latencies below ``min_ms`` are too noisy to flag.
+    """
+    regressions = []
+    for size, scenarios in results['results'].items():
+        for name, metrics in scenarios.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            for metric in METRICS:
+                old, new = before.get(metric), metrics[metric]
+                if old is None:
+                    continue
+                if metric == 'queries':
+                    regressed = new > old
+                elif metric.endswith('_ms'):
+                    regressed = new > max(old, min_ms) * (1 + threshold)
+                else:
+                    regressed = new > old * (1 + threshold)
+                if regressed:
+                    regressions.append(f'{size} books, {name}: {metric} {old} -> {new}')
+    return regressions
+
+
+def import_paths(requests, volumes):
+    """Eager imports of ``volumes`` new volumes each, all with distinct search phrases."""
+    return [reverse('import-book') + '?' + urlencode({
+        'search_phrase': f'many:{volumes}:{number * volumes}', 'max_results': volumes,
+    }) for number in range(requests)]
+
+
+def run_wsgi(paths, workers):
+    """Sends ``paths`` to the WSGI application from ``workers`` threads, like as many sync gunicorn workers."""
+    from Bookstore.wsgi import application
+
+    def get(path):
+        return call(application, build_environ(RequestSpec('GET', path), {}, 'localhost', ''))
+
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(get, paths))
+
+
+async def asgi_get(application, path):
+    """Sends one GET request to an ASGI ``application``; returns its status code and duration in seconds."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects before the response is complete.
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    start = time.perf_counter()
+    await application(scope, receive, send)
+    return statuses[0], time.perf_counter() - start
+
+
+def run_asgi(paths, concurrency):
+    """Sends ``paths`` to the ASGI application on one event loop, at most ``concurrency`` at a time."""
+    from Bookstore.asgi import application
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def get(path):
+            async with slots:
+                return await asgi_get(application, path)
+
+        return await asyncio.gather(*(get(path) for path in paths))
+
+    return asyncio.run(main())
+
+
+def compare_import_concurrency(requests=200, concurrency=100, wsgi_workers=8, volumes=40, delay=0.2,
+                               progress=None):
+    """
+    Sends ``requests`` eager imports to the WSGI application from
+    ``wsgi_workers`` threads and to the ASGI application from ``concurrency``
+    concurrent clients, with every API page taking ``delay`` seconds. Returns
+    the throughput, latency, errors, failed imports and peak number of API
+    requests in flight of both.
+    """
+    report = progress or (lambda message: None)
+    results = {}
+    server = GoogleBooksStubServer(delay=delay).start()
+    try:
+        with override_settings(GOOGLE_BOOKS_API_URL=server.url, GOOGLE_BOOKS_CACHE_TTL=0,
+                               GOOGLE_BOOKS_MAX_CONNECTIONS=concurrency, IMPORT_JOBS_EAGER=True):
+            paths = import_paths(2 * requests, volumes)
+            for mode, run, paths, workers in (('wsgi', run_wsgi, paths[:requests], wsgi_workers),
+                                              ('asgi', run_asgi, paths[requests:], concurrency)):
+                report(f'{mode}: {requests} imports, {workers} at a time...')
+                server.peak_active = 0
+                failed = ImportJob.objects.filter(status=ImportJob.FAILED).count()
+                start = time.perf_counter()
+                responses = run(paths, workers)
+                elapsed = time.perf_counter() - start
+                durations = [duration for status, duration in responses]
+                results[mode] = {
+                    'requests': requests,
+                    'concurrency': workers,
+                    'elapsed_s': round(elapsed, 3),
+                    'throughput_rps': round(requests / elapsed, 2),
+                    'p50_ms': round(percentile(durations, 0.5) * 1000, 3),
+                    'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+                    'errors': sum(status >= 400 for status, duration in responses),
+                    'failed_imports': ImportJob.objects.filter(status=ImportJob.FAILED).count() - failed,
+                    'peak_upstream_in_flight': server.peak_active,
+                }
+    finally:
+        server.stop()
+    return results
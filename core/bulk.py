@@ -0,0 +1,202 @@
+"""
+Batch create, update and delete of books for the REST API.
+
+Every item of a batch is validated first - field by field without touching
+the database, then against the database with one query per kind of check for
+the whole batch. Only if all items are valid the batch is written, in one
+transaction, with ``bulk_create``/``bulk_update``/a single ``DELETE``.
+Results are reported per item, in request order.
+"""
+from collections import Counter
+from urllib.parse import urlparse
+
+from django.db import transaction
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+from rest_framework import serializers
+
+from core import page_cache, stats
+from core.models import Author, Book
+from core.serializers import ISBNFieldMixin
+
+
+class AuthorReferenceField(serializers.Field):
+    """Accepts an author URL or primary key and returns the primary key, without a query."""
+    default_error_messages = {
+        'invalid': 'Expected an author URL or id.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool):
+            return data
+        if isinstance(data, str) and data.isdigit():
+            return int(data)
+        if isinstance(data, str):
+            try:
+                match = resolve(urlparse(data).path)
+            except Resolver404:
+                self.fail('invalid')
+            if match.url_name == 'author-detail' and str(match.kwargs.get('pk', '')).isdigit():
+                return int(match.kwargs['pk'])
+        self.fail('invalid')
+
+    def to_representation(self, value):
+        return value
+
+
+class BookBulkItemSerializer(ISBNFieldMixin, serializers.ModelSerializer):
+    author = AuthorReferenceField()
+
+    class Meta:
+        model = Book
+        fields = ('title', 'author', 'pub_date', 'isbn', 'pages', 'cover_url', 'language')
+        # Uniqueness is checked for the whole batch at once.
+        extra_kwargs = {'isbn': {'validators': []}}
+
+
+class BulkResult:
+
+    def __init__(self, size):
+        self.items = [{'status': 'ok'} for _ in range(size)]
+
+    @property
+    def valid(self):
+        return all(item['status'] != 'invalid' for item in self.items)
+
+    def error(self, index, field, message):
+        item = self.items[index]
+        item['status'] = 'invalid'
+        item.setdefault('errors', {}).setdefault(field, []).append(message)
+
+    def errors(self, index, errors):
+        for field, messages in errors.items():
+            for message in messages:
+                self.error(index, field, str(message))
+
+
+def _validate_items(items, result, partial):
+    validated = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            result.error(index, 'non_field_errors', 'Expected an object.')
+            continue
+        serializer = BookBulkItemSerializer(data=item, partial=partial)
+        if serializer.is_valid():
+            validated[index] = serializer.validated_data
+        else:
+            result.errors(index, serializer.errors)
+    return validated
+
+
+def _check_authors(validated, result):
+    author_ids = {data['author'] for data in validated.values() if 'author' in data}
+    known = set(Author.objects.filter(id__in=author_ids).values_list('id', flat=True))
+    for index, data in validated.items():
+        if 'author' in data and data['author'] not in known:
+            result.error(index, 'author', 'Author does not exist.')
+
+
+def _check_isbns(validated, result, ids=None):
+    """Flags ISBNs repeated within the batch or taken by another book."""
+    seen = {}
+    for index, data in validated.items():
+        if 'isbn' not in data:
+            continue
+        if data['isbn'] in seen:
+            result.error(index, 'isbn', 'Duplicate ISBN in this batch.')
+        seen.setdefault(data['isbn'], index)
+
+    taken = Book.objects.filter(isbn__in=seen).values_list('isbn', 'id')
+    for isbn, book_id in taken:
+        index = seen[isbn]
+        if ids is None or ids.get(index) != book_id:
+            result.error(index, 'isbn', 'Book with this isbn already exists.')
+
+
+def bulk_create(items, request=None):
+    result = BulkResult(len(items))
+    validated = _validate_items(items, result, partial=False)
+    _check_authors(validated, result)
+    _check_isbns(validated, result)
+    if not result.valid:
+        return result
+
+    books = []
+    for data in validated.values():
+        data = dict(data)
+        books.append(Book(author_id=data.pop('author'), **data))
+    with transaction.atomic():
+        Book.objects.bulk_create(books)
+        stats.record(stats.count_books(books))
+        page_cache.invalidate()
+    # Not every backend returns primary keys from a bulk insert; ISBNs are unique.
+    ids = dict(Book.objects.filter(isbn__in=[book.isbn for book in books]).values_list('isbn', 'id'))
+    for index, book in zip(validated, books):
+        result.items[index] = {'status': 'created', 'id': ids[book.isbn], 'url': _book_url(ids[book.isbn], request)}
+    return result
+
+
+def bulk_update(items, request=None):
+    result = BulkResult(len(items))
+    ids = {}
+    for index, item in enumerate(items):
+        book_id = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(book_id, int) or isinstance(book_id, bool):
+            result.error(index, 'id', 'This field is required.')
+        else:
+            ids[index] = book_id
+    counts = Counter(ids.values())
+    for index, book_id in ids.items():
+        if counts[book_id] > 1:
+            result.error(index, 'id', 'Duplicate id in this batch.')
+
+    validated = _validate_items(items, result, partial=True)
+    validated = {index: data for index, data in validated.items() if index in ids}
+    with transaction.atomic():
+        books = Book.objects.select_for_update().in_bulk(list(ids.values()))
+        for index, book_id in ids.items():
+            if book_id not in books:
+                result.error(index, 'id', 'Not found.')
+        _check_authors(validated, result)
+        _check_isbns(validated, result, ids=ids)
+        if not result.valid:
+            return result
+
+        now = timezone.now()
+        fields = {'updated_at'}
+        changed = [books[ids[index]] for index in validated]
+        delta = stats.count_books(changed, sign=-1)
+        for index, data in validated.items():
+            book = books[ids[index]]
+            for field, value in data.items():
+                setattr(book, 'author_id' if field == 'author' else field, value)
+                fields.add(field)
+            book.updated_at = now
+        Book.objects.bulk_update(changed, sorted(fields))
+        delta.update(stats.count_books(changed))
+        stats.record(delta)
+        page_cache.invalidate()
+    for index in validated:
+        result.items[index] = {'status': 'updated', 'id': ids[index], 'url': _book_url(ids[index], request)}
+    return result
+
+
+def bulk_delete(ids):
+    result = BulkResult(len(ids))
+    for index, book_id in enumerate(ids):
+        if not isinstance(book_id, int) or isinstance(book_id, bool):
+            result.error(index, 'id', 'Expected a book id.')
+    if not result.valid:
+        return result
+
+    with transaction.atomic(), stats.batch():
+        existing = set(Book.objects.filter(id__in=ids).values_list('id', flat=True))
+        Book.objects.filter(id__in=existing).delete()
+    for index, book_id in enumerate(ids):
+        result.items[index] = {'status': 'deleted' if book_id in existing else 'not_found', 'id': book_id}
+    return result
+
+
+def _book_url(book_id, request):
+    url = reverse('book-detail', kwargs={'pk': book_id})
+    return request.build_absolute_uri(url) if request is not None else url
@@ -0,0 +1,74 @@
+"""
+Database cache with least-recently-used culling.
+
+``DatabaseCache`` culls a table past ``MAX_ENTRIES`` by deleting the rows
+with the lowest cache keys, which are hashes, so it evicts at random.
+``LRUDatabaseCache`` deletes the rows that expire first instead, and
+``touch_many()`` pushes the expiry of the entries it is given back by their
+timeout. On an alias whose entries all share one timeout, and get touched
+whenever they are read, the rows expiring first are the least recently used.
+Entries without a timeout are culled last.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router
+from django.utils import timezone
+
+
+class LRUDatabaseCache(DatabaseCache):
+
+    def _cull(self, db, cursor, now):
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+        connection = connections[db]
+        table = connection.ops.quote_name(self._table)
+        cursor.execute('DELETE FROM %s WHERE expires < %%s' % table, [connection.ops.adapt_datetimefield_value(now)])
+        cursor.execute('SELECT COUNT(*) FROM %s' % table)
+        num = cursor.fetchone()[0]
+        if num > self._max_entries:
+            # Served by the index createcachetable puts on expires.
+            cursor.execute(
+                'DELETE FROM %s WHERE cache_key IN (SELECT cache_key FROM %s ORDER BY expires LIMIT %%s)'
+                % (table, table),
+                [num // self._cull_frequency],
+            )
+
+    def touch_many(self, keys, timeout=DEFAULT_TIMEOUT, version=None):
+        """``touch()`` of every key in ``keys`` with a single ``UPDATE``."""
+        if not keys:
+            return
+        keys = [self.make_key(key, version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            expires = datetime.max
+        elif settings.USE_TZ:
+            expires = datetime.utcfromtimestamp(timeout)
+        else:
+            expires = datetime.fromtimestamp(timeout)
+
+        connection = connections[router.db_for_write(self.cache_model_class)]
+        table = connection.ops.quote_name(self._table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE %s SET expires = %%s WHERE cache_key IN (%s)' % (table, ', '.join(['%s'] * len(keys))),
+                [connection.ops.adapt_datetimefield_value(expires.replace(microsecond=0)), *keys],
+            )
+
+    def count(self, prefix=''):
+        """Number of unexpired entries whose keys start with ``prefix``."""
+        connection = connections[router.db_for_read(self.cache_model_class)]
+        table = connection.ops.quote_name(self._table)
+        now = timezone.now().replace(microsecond=0)
+        pattern = self.make_key(prefix).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM %s WHERE cache_key LIKE %%s ESCAPE '\\' AND expires >= %%s" % table,
+                [pattern, connection.ops.adapt_datetimefield_value(now)],
+            )
+            return cursor.fetchone()[0]
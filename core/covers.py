@@ -0,0 +1,237 @@
+"""
+Local cache of book covers.
+
+Cover URLs point at third-party hosts, so pages linking to them directly pay
+their latency and break when they are down. The ``cover_worker`` command
+queues every distinct ``Book.cover_url`` as a ``CoverImage``, following
+``Book.updated_at`` to pick up new and changed URLs, and downloads each one
+once. Images are stored content-addressed, under the SHA-256 of
+their bytes, next to resized variants in ``COVER_SIZES``, and ``CoverView``
+serves them from our own URLs with immutable cache headers. Resizing needs
+Pillow; without it only the originals are kept and served for every size.
+"""
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Q
+from django.utils import timezone
+
+from core import page_cache
+from core.models import Book, CoverImage
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+ORIGINAL = 'original'
+
+DIGEST_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+# Resized variants are written as JPEG, whatever the format of the original.
+VARIANT_FORMAT = ('JPEG', '.jpg')
+
+
+class CoverError(Exception):
+    pass
+
+
+@dataclass
+class FetchResult:
+    done: int = 0
+    failed: int = 0
+    retried: int = 0
+
+
+def get_storage():
+    return FileSystemStorage(location=getattr(settings, 'COVERS_ROOT', settings.BASE_DIR / 'covers'))
+
+
+def get_sizes():
+    """``{name: pixels}`` of the variants, each fitting in a ``pixels`` square."""
+    return getattr(settings, 'COVER_SIZES', {'small': 64, 'medium': 128, 'large': 256})
+
+
+def cover_dir(digest):
+    return f'{digest[:2]}/{digest}'
+
+
+def download(session, url):
+    """Returns the bytes and the media type of the image at ``url``."""
+    max_bytes = getattr(settings, 'COVER_MAX_BYTES', 5 * 1024 * 1024)
+    try:
+        with session.get(url, timeout=getattr(settings, 'COVER_TIMEOUT', 10), stream=True) as response:
+            if response.status_code != 200:
+                raise CoverError(f'{url} responded with status {response.status_code}.')
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if not content_type.startswith('image/'):
+                raise CoverError(f'{url} is not an image ({content_type or "no content type"}).')
+            content = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                content += chunk
+                if len(content) > max_bytes:
+                    raise CoverError(f'{url} is larger than {max_bytes} bytes.')
+    except requests.RequestException as error:
+        raise CoverError(f'{url} could not be fetched: {error}') from error
+    return bytes(content), content_type
+
+
+def resize(content, pixels):
+    image = Image.open(io.BytesIO(content))
+    image.thumbnail((pixels, pixels))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, VARIANT_FORMAT[0], quality=85, optimize=True)
+    return output.getvalue()
+
+
+def store(content, content_type, storage=None):
+    """
+    Saves the original and its resized variants unless an image with the same
+    content is already stored, and returns its digest. The files are written to
+    a hidden staging directory that is renamed into place once complete, so
+    ``find()`` never sees a partly written image, even after a crash.
+    """
+    storage = storage or get_storage()
+    digest = hashlib.sha256(content).hexdigest()
+    directory = cover_dir(digest)
+    if storage.exists(directory):
+        return digest
+
+    files = {f'{ORIGINAL}{mimetypes.guess_extension(content_type) or ""}': content}
+    if Image is not None:
+        try:
+            for size, pixels in get_sizes().items():
+                files[f'{size}{VARIANT_FORMAT[1]}'] = resize(content, pixels)
+        except (OSError, ValueError) as error:
+            raise CoverError(f'Image could not be decoded: {error}') from error
+
+    target = storage.path(directory)
+    staging = os.path.join(os.path.dirname(target), f'.{digest}.{uuid.uuid4().hex}')
+    os.makedirs(staging)
+    try:
+        for name, data in files.items():
+            with open(os.path.join(staging, name), 'wb') as file:
+                file.write(data)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another worker stored the same image first.
+            if not os.path.isdir(target):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return digest
+
+
+def find(digest, size, storage=None):
+    """
+    Returns the path and media type of the ``size`` variant of a stored image,
+    falling back to the original, or ``None`` if there is no such image.
+    """
+    storage = storage or get_storage()
+    directory = cover_dir(digest)
+    try:
+        names = storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return None
+    for wanted in (size, ORIGINAL):
+        for name in names:
+            if name.partition('.')[0] == wanted:
+                return storage.path(f'{directory}/{name}'), mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    return None
+
+
+def queue_covers(after=None, batch_size=1000):
+    """
+    Queues the cover URLs of the next ``batch_size`` books changed after
+    ``after``, an ``(updated_at, id)`` position, that aren't queued yet, and
+    returns the position of the last book looked at, or ``None`` when there
+    are no more books. New books and books whose ``cover_url`` changed, by a
+    form, the API's bulk updates or an import, are all found by the scan.
+    """
+    books = Book.objects.order_by('updated_at', 'id')
+    if after is not None:
+        updated_at, book_id = after
+        # The leading range lets the database seek the index on updated_at.
+        books = books.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=book_id),
+                             updated_at__gte=updated_at)
+    rows = list(books.values_list('updated_at', 'id', 'cover_url')[:batch_size])
+    if not rows:
+        return None
+    CoverImage.objects.bulk_create([CoverImage(source_url=url) for url in {url for _, _, url in rows if url}],
+                                   ignore_conflicts=True)
+    return rows[-1][:2]
+
+
+def fetch_one(session, url):
+    """Downloads and stores one cover; returns ``(digest, content_type, error)``."""
+    try:
+        content, content_type = download(session, url)
+        return store(content, content_type), content_type, ''
+    except CoverError as error:
+        return '', '', str(error)
+    except Exception as error:
+        # Anything else, like a decompression bomb or a full disk, fails this
+        # cover alone instead of the whole batch, which would be fetched again.
+        return '', '', f'{url}: {error.__class__.__name__}: {error}'
+
+
+def fetch_pending(limit=100, session=None):
+    """
+    Downloads up to ``limit`` queued covers concurrently. Failed downloads are
+    retried on later calls until ``COVER_MAX_ATTEMPTS``. Running several
+    workers at once may fetch a cover twice, which content addressing makes
+    harmless.
+    """
+    covers = list(CoverImage.objects.filter(status=CoverImage.PENDING).order_by('id')[:limit])
+    result = FetchResult()
+    if not covers:
+        return result
+
+    session = session or requests.Session()
+    with ThreadPoolExecutor(getattr(settings, 'COVER_MAX_WORKERS', 8)) as executor:
+        outcomes = list(executor.map(fetch_one, [session] * len(covers), [cover.source_url for cover in covers]))
+
+    max_attempts = getattr(settings, 'COVER_MAX_ATTEMPTS', 3)
+    now = timezone.now()
+    for cover, (digest, content_type, error) in zip(covers, outcomes):
+        cover.attempts += 1
+        cover.digest, cover.content_type, cover.error = digest, content_type, error
+        cover.updated_at = now
+        if not error:
+            cover.status = CoverImage.DONE
+            result.done += 1
+        elif cover.attempts >= max_attempts:
+            cover.status = CoverImage.FAILED
+            result.failed += 1
+        else:
+            result.retried += 1
+    CoverImage.objects.bulk_update(covers, ['status', 'digest', 'content_type', 'error', 'attempts', 'updated_at'])
+    if result.done:
+        # Cached find-book pages still link to the remote covers.
+        page_cache.invalidate()
+    return result
+
+
+def attach_covers(books):
+    """Sets ``cover_digest`` on each of ``books``: the digest of its local cover or ``None``."""
+    digests = dict(
+        CoverImage.objects.filter(source_url__in={book.cover_url for book in books}, status=CoverImage.DONE)
+        .values_list('source_url', 'digest')
+    )
+    for book in books:
+        book.cover_digest = digests.get(book.cover_url)
+    return books
@@ -0,0 +1,50 @@
+"""
+Last deletion time of each model, for the ``Last-Modified`` of list reads.
+
+The rows left after a delete are all older than it, so the latest
+``updated_at`` of a table can't tell that anything changed. ``record()``,
+called for every deleted row by ``core.signals``, stores the time in
+``LastDeletion`` once the transaction commits; deleting many rows in one
+transaction writes it once. ``latest()`` reads it back as a subquery, so it
+rides along with the query it is annotated on.
+"""
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils import timezone
+
+from core.models import LastDeletion
+
+
+class PendingRecord:
+    """Shared by the on-commit callbacks queued for one model since its last record; only the first to run writes."""
+    done = False
+
+    def __init__(self, label, using):
+        self.label = label
+        self.using = using
+
+    def run(self):
+        if self.done:
+            return
+        self.done = True
+        now = timezone.now()
+        deletions = LastDeletion.objects.using(self.using)
+        if not deletions.filter(model=self.label).update(deleted_at=now):
+            deletions.bulk_create([LastDeletion(model=self.label, deleted_at=now)], ignore_conflicts=True)
+
+
+def record(model, using=None):
+    """Records a deletion of ``model`` rows once the current transaction commits, or right away outside of one."""
+    connection = transaction.get_connection(using)
+    pending = getattr(connection, 'deletions_pending', None)
+    if pending is None:
+        pending = connection.deletions_pending = {}
+    label = model._meta.label_lower
+    if label not in pending or pending[label].done:
+        pending[label] = PendingRecord(label, connection.alias)
+    transaction.on_commit(pending[label].run, using=using)
+
+
+def latest(model):
+    """Subquery of when ``model`` rows were last deleted, ``NULL`` if never."""
+    return Subquery(LastDeletion.objects.filter(model=model._meta.label_lower).values('deleted_at')[:1])
@@ -0,0 +1,48 @@
+"""
+Encoders for streamed catalog exports.
+
+Both take an iterator of row tuples and yield text in blocks of ``batch_size``
+rows, so a response writes a few large chunks instead of one per book.
+"""
+import csv
+import datetime
+import io
+import json
+from itertools import islice
+
+
+def _batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def csv_lines(rows, headers, batch_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for batch in _batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export.
+        yield buffer.getvalue()
+
+
+def _json_default(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def ndjson_lines(rows, headers, batch_size=1000):
+    for batch in _batches(rows, batch_size):
+        yield ''.join(
+            json.dumps(dict(zip(headers, row)), default=_json_default, ensure_ascii=False) + '\n'
+            for row in batch
+        )
@@ -0,0 +1,138 @@
+"""
+Local stand-in for the Google Books volumes API serving canned responses, for
+the tests and for benchmarks that must not depend on the real API.
+
+``many:<count>`` searches return ``count`` synthetic volumes and
+``many:<count>:<first>`` ones start at volume number ``first``.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from core.isbn import isbn13
+
+
+SYNTHETIC_ISBN_PREFIX = '9798'
+
+
+def volume(title, isbn, authors=('Stub Author', ), published='2001-01-01', image=True, **extra):
+    info = {
+        'title': title,
+        'publishedDate': published,
+        'industryIdentifiers': [{'type': 'ISBN_13', 'identifier': isbn}],
+        'pageCount': 100,
+        'language': 'pl',
+    }
+    if authors:
+        info['authors'] = list(authors)
+    if image:
+        info['imageLinks'] = {'thumbnail': f'http://covers.example.com/{isbn}.jpg'}
+    info.update(extra)
+    return {'volumeInfo': info}
+
+
+CATALOG = {
+    'python': [
+        volume('Python. Wprowadzenie', '9788328313439', authors=('Mark Lutz', )),
+        volume('Python. Programowanie', '9788328301993', authors=('Mark Lutz', )),
+        volume('Python Crash Course', '9781593276034', authors=('Eric Matthes', )),
+    ],
+    'gruba': [
+        volume('Gruba ryba', '9788300000012', authors=()),
+    ],
+    'niemcy': [
+        volume('Niemcy', '9788300000029', published='1999'),
+        volume('Niemcy po wojnie', '9788300000036', published='2001-05'),
+    ],
+    'zamek': [
+        volume('Zamek', '9788300000043', image=False),
+    ],
+    'woda': [
+        volume('Woda', '9788300000050', authors=('Jan Kowalski', )),
+        volume('Woda i ogien', '9788300000067', authors=('Jan Kowalski', )),
+    ],
+}
+
+
+def synthetic_volumes(count, first=0):
+    return [volume(f'Synthetic {number}', isbn13(f'{SYNTHETIC_ISBN_PREFIX}{number:08d}'), authors=(f'Author {number % 7}', ))
+            for number in range(first, first + count)]
+
+
+class GoogleBooksHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        self.server.record(self.client_address, params)
+        with self.server.in_flight():
+            self.respond(params)
+
+    def respond(self, params):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        query = params.get('q', '')
+        if query.startswith('many:'):
+            volumes = synthetic_volumes(*(int(number) for number in query.split(':')[1:3]))
+        else:
+            volumes = CATALOG.get(query, [])
+
+        start = int(params.get('startIndex', 0))
+        items = volumes[start:start + int(params.get('maxResults', 10))]
+        body = json.dumps({'items': items} if items else {}).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GoogleBooksStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, delay=0):
+        super().__init__(('127.0.0.1', 0), GoogleBooksHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = []
+        self.clients = set()
+        self.active = 0
+        self.peak_active = 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/books/v1/volumes'
+
+    def record(self, client_address, params):
+        with self.lock:
+            self.requests.append(params)
+            self.clients.add(client_address)
+
+    @contextmanager
+    def in_flight(self):
+        """Counts the requests being served, keeping the peak in ``peak_active``."""
+        with self.lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
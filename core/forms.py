@@ -1,25 +1,41 @@
 from django import forms
+from django.urls import reverse_lazy
+
+from core.isbn import normalize_isbn
 from core.models import Book
 
 
 class ListTextWidget(forms.TextInput):
-    def __init__(self, data_list, name, *args, **kwargs):
+    """
+    Text input with an initially empty datalist that main.js fills with
+    suggestions fetched from ``source_url`` as the user types.
+    """
+    def __init__(self, name, source_url, *args, **kwargs):
         super(ListTextWidget, self).__init__(*args, **kwargs)
         self._name = name
-        self._list = data_list
-        self.attrs.update({'list': 'list__%s' % self._name})
+        self.attrs.update({
+            'list': 'list__%s' % self._name,
+            'autocomplete': 'off',
+            'data-autocomplete-url': source_url,
+        })
 
     def render(self, name, value, attrs=None, renderer=None):
         text_html = super(ListTextWidget, self).render(name, value, attrs=attrs)
-        data_list = '<datalist id="list__%s">' % self._name
-        for item in self._list:
-            data_list += '<option value="%s">' % item
-        data_list += '</datalist>'
+        data_list = '<datalist id="list__%s"></datalist>' % self._name
         result = text_html + data_list
         return result
 
 
+class ISBNField(forms.CharField):
+    """Accepts ISBN-10 and ISBN-13 numbers, with separators, and cleans them to the ISBN-13."""
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        return normalize_isbn(value) if value else value
+
+
 class AddBookForm(forms.ModelForm):
+    isbn = ISBNField(label='ISBN Number')
 
     class Meta:
         model = Book
@@ -31,6 +47,13 @@ class AddBookForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
-        _authors_list = kwargs.pop('data_list', None)
         super(AddBookForm, self).__init__(*args, **kwargs)
-        self.fields['author'].widget = ListTextWidget(data_list=_authors_list, name='authors_list')
+        self.fields['author'].widget = ListTextWidget(name='authors_list', source_url=reverse_lazy('author-autocomplete'))
+
+
+class BookUpdateForm(forms.ModelForm):
+    isbn = ISBNField(label='Isbn')
+
+    class Meta:
+        model = Book
+        fields = ['title', 'author', 'isbn', 'pages', 'cover_url', 'language', 'pub_date']
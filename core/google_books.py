@@ -0,0 +1,325 @@
+"""
+Clients for the Google Books volumes API.
+
+All requests go through one shared ``requests.Session`` with a connection pool,
+so TLS connections are kept alive between pages and between imports. Result
+pages of a search are fetched concurrently, up to a caller-set volume cap, and
+kept in a shared response cache so repeated searches skip the network.
+``AsyncGoogleBooksClient`` does the same on an ``httpx.AsyncClient`` for async
+views, waiting on the API without holding a thread.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from requests.adapters import HTTPAdapter
+
+from core.isbn import normalize_isbn
+
+
+DEFAULT_API_URL = 'https://www.googleapis.com/books/v1/volumes'
+
+VOLUME_FIELDS = ('items(volumeInfo(title,authors,publishedDate,industryIdentifiers,pageCount,'
+                 'imageLinks(thumbnail),language))')
+
+# The API never returns more than 40 volumes per page.
+MAX_PAGE_SIZE = 40
+
+NO_COVER_URL = 'http://www.hallens.co.uk/wp-content/themes/consultix/images/no-image-found-360x260.png'
+
+
+class GoogleBooksError(Exception):
+    pass
+
+
+def normalize_query(query):
+    return ' '.join(query.lower().split())
+
+
+def result_pages(max_volumes):
+    """``(start_index, max_results)`` of the pages holding the first ``max_volumes`` volumes."""
+    return [(start, min(MAX_PAGE_SIZE, max_volumes - start)) for start in range(0, max_volumes, MAX_PAGE_SIZE)]
+
+
+def page_params(query, start_index, max_results):
+    return {
+        'q': normalize_query(query),
+        'startIndex': start_index,
+        'maxResults': max_results,
+        'fields': VOLUME_FIELDS,
+    }
+
+
+class ResponseCache:
+    """
+    Caches result pages in the ``GOOGLE_BOOKS_CACHE_ALIAS`` cache, a store of
+    its own shared by every worker process. Entries expire ``ttl`` seconds
+    after they were fetched. Every hit pushes the expiry the backend keeps
+    back by ``ttl``, so ``core.cache_backends.LRUDatabaseCache`` culls the
+    least recently used pages past its ``MAX_ENTRIES`` option; the fetch time
+    stored with each page still bounds its age. Hits and misses are counted
+    in the cache too, so the counters cover every worker. The cache
+    increments them with a read and a write, so concurrent lookups can lose
+    a count now and then.
+    """
+    prefix = 'google_books'
+
+    def __init__(self, alias=None, ttl=None):
+        self.cache = caches[alias or getattr(settings, 'GOOGLE_BOOKS_CACHE_ALIAS', 'google_books')]
+        self.ttl = ttl if ttl is not None else getattr(settings, 'GOOGLE_BOOKS_CACHE_TTL', 6 * 60 * 60)
+
+    def key(self, base_url, query, start_index, max_results, fields=VOLUME_FIELDS):
+        raw = '\n'.join((base_url, normalize_query(query), str(start_index), str(max_results), fields))
+        return f'{self.prefix}:page:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+    def get_many(self, keys):
+        """Returns ``{key: items}`` for the cached keys."""
+        fetched_since = time.time() - self.ttl
+        found = {key: entry['items'] for key, entry in self.cache.get_many(keys).items()
+                 if entry['fetched'] >= fetched_since}
+        if found:
+            touch_many = getattr(self.cache, 'touch_many', None)
+            if touch_many is not None:
+                touch_many(list(found), timeout=self.ttl)
+            else:
+                for key in found:
+                    self.cache.touch(key, timeout=self.ttl)
+        self.count('hits', len(found))
+        self.count('misses', len(keys) - len(found))
+        return found
+
+    def set_many(self, entries):
+        if entries:
+            fetched = time.time()
+            self.cache.set_many({key: {'fetched': fetched, 'items': items} for key, items in entries.items()},
+                                timeout=self.ttl)
+
+    def count(self, counter, number):
+        if not number:
+            return
+        key = f'{self.prefix}:{counter}'
+        try:
+            self.cache.incr(key, number)
+        except ValueError:
+            if not self.cache.add(key, number, timeout=None):
+                self.cache.incr(key, number)
+
+    def stats(self):
+        """Hit and miss counts of all workers, and the number of cached pages if the backend can count them."""
+        counters = self.cache.get_many([f'{self.prefix}:hits', f'{self.prefix}:misses'])
+        stats = {counter: counters.get(f'{self.prefix}:{counter}', 0) for counter in ('hits', 'misses')}
+        if hasattr(self.cache, 'count'):
+            stats['entries'] = self.cache.count(f'{self.prefix}:page:')
+        return stats
+
+    def clear(self):
+        """Drops every cached page and the counters; the alias holds nothing else."""
+        self.cache.clear()
+
+
+class BaseClient:
+
+    def __init__(self, base_url=None, timeout=None, cache=None):
+        self._base_url = base_url
+        self.cache = cache
+        self.timeout = timeout or getattr(settings, 'GOOGLE_BOOKS_TIMEOUT', 10)
+
+    @property
+    def base_url(self):
+        return self._base_url or getattr(settings, 'GOOGLE_BOOKS_API_URL', DEFAULT_API_URL)
+
+    def cache_keys(self, query, pages):
+        return {page: self.cache.key(self.base_url, query, *page) for page in pages}
+
+    @staticmethod
+    def parse_response(response):
+        """Returns the volume items of a ``requests`` or ``httpx`` response."""
+        if response.status_code != 200:
+            raise GoogleBooksError(f'Google Books API responded with {response.status_code}.')
+        return response.json().get('items', [])
+
+
+class GoogleBooksClient(BaseClient):
+
+    def __init__(self, base_url=None, max_workers=None, timeout=None, cache=None):
+        super().__init__(base_url, timeout, cache)
+        self.max_workers = max_workers or getattr(settings, 'GOOGLE_BOOKS_MAX_WORKERS', 8)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch_page(self, query, start_index=0, max_results=MAX_PAGE_SIZE):
+        """Returns the raw volume items of a single result page, bypassing the cache."""
+        try:
+            response = self.session.get(self.base_url, params=page_params(query, start_index, max_results),
+                                        timeout=self.timeout)
+        except requests.RequestException as e:
+            raise GoogleBooksError(str(e)) from e
+        return self.parse_response(response)
+
+    def search(self, query, max_volumes=MAX_PAGE_SIZE):
+        """
+        Returns up to ``max_volumes`` volume items for ``query``. Cached pages are
+        read in one cache round trip and all others are requested at once; pages
+        past the end of the results come back empty.
+        """
+        if max_volumes <= 0:
+            return []
+        pages = result_pages(max_volumes)
+
+        results = {}
+        if self.cache is not None:
+            keys = self.cache_keys(query, pages)
+            cached = self.cache.get_many(list(keys.values()))
+            results = {page: cached[key] for page, key in keys.items() if key in cached}
+
+        missing = [page for page in pages if page not in results]
+        if len(missing) == 1:
+            results[missing[0]] = self.fetch_page(query, *missing[0])
+        elif missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                results.update(zip(missing, executor.map(lambda page: self.fetch_page(query, *page), missing)))
+
+        if self.cache is not None and missing:
+            self.cache.set_many({keys[page]: results[page] for page in missing})
+
+        volumes = [volume for page in pages for volume in results[page]]
+        return volumes[:max_volumes]
+
+
+class AsyncGoogleBooksClient(BaseClient):
+    """
+    ``GoogleBooksClient`` for async code. Pages are requested over an
+    ``httpx.AsyncClient`` pool of up to ``max_connections`` connections, so an
+    event loop can wait on many searches at once without a thread for each.
+    """
+
+    def __init__(self, base_url=None, max_connections=None, timeout=None, cache=None):
+        super().__init__(base_url, timeout, cache)
+        self.max_connections = max_connections or getattr(settings, 'GOOGLE_BOOKS_MAX_CONNECTIONS', 100)
+        self.session = httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(
+            max_connections=self.max_connections, max_keepalive_connections=self.max_connections,
+        ))
+
+    async def fetch_page(self, query, start_index=0, max_results=MAX_PAGE_SIZE):
+        """Returns the raw volume items of a single result page, bypassing the cache."""
+        try:
+            response = await self.session.get(self.base_url, params=page_params(query, start_index, max_results))
+        except httpx.HTTPError as e:
+            raise GoogleBooksError(str(e) or repr(e)) from e
+        return self.parse_response(response)
+
+    async def search(self, query, max_volumes=MAX_PAGE_SIZE):
+        """Returns up to ``max_volumes`` volume items for ``query``, like ``GoogleBooksClient.search``."""
+        if max_volumes <= 0:
+            return []
+        pages = result_pages(max_volumes)
+
+        results = {}
+        if self.cache is not None:
+            keys = self.cache_keys(query, pages)
+            cached = await sync_to_async(self.cache.get_many)(list(keys.values()))
+            results = {page: cached[key] for page, key in keys.items() if key in cached}
+
+        missing = [page for page in pages if page not in results]
+        results.update(zip(missing, await asyncio.gather(*(self.fetch_page(query, *page) for page in missing))))
+
+        if self.cache is not None and missing:
+            await sync_to_async(self.cache.set_many)({keys[page]: results[page] for page in missing})
+
+        volumes = [volume for page in pages for volume in results[page]]
+        return volumes[:max_volumes]
+
+    async def aclose(self):
+        await self.session.aclose()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def use_response_cache():
+    return getattr(settings, 'GOOGLE_BOOKS_CACHE_TTL', 0) > 0
+
+
+def get_client():
+    """Returns the process-wide client, so its connection pool outlives single requests."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GoogleBooksClient(cache=ResponseCache() if use_response_cache() else None)
+    return _client
+
+
+def get_async_client():
+    """
+    Returns the async client of the running event loop. httpx connections
+    belong to the loop they were opened in, so every loop gets its own client;
+    under an ASGI server that is one per process. The client is closed when
+    ``asyncio.run()`` shuts its loop down.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncGoogleBooksClient(cache=ResponseCache() if use_response_cache() else None)
+        client.closer = loop.create_task(close_on_shutdown(client))
+    return client
+
+
+async def close_on_shutdown(client):
+    """Waits until cancelled, which ``asyncio.run()`` does to the tasks left at shutdown, then closes ``client``."""
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await client.aclose()
+
+
+def parse_volume(volume):
+    """
+    Maps a volume item onto ``Book`` field values, the ISBN normalized to an
+    ISBN-13. Volumes without a valid ISBN can't be stored and yield ``None``.
+    """
+    book_info = volume.get('volumeInfo', {})
+
+    identifiers = {code.get('type'): code.get('identifier') for code in book_info.get('industryIdentifiers') or []}
+    isbn = None
+    for kind in ('ISBN_13', 'ISBN_10'):
+        try:
+            isbn = normalize_isbn(identifiers[kind])
+        except (KeyError, ValidationError):
+            continue
+        break
+    if isbn is None:
+        return None
+
+    pub_date = book_info.get('publishedDate') or ''
+    if len(pub_date) == 7:
+        pub_date += '-01'
+    elif len(pub_date) == 4:
+        pub_date += '-01-01'
+
+    authors = book_info.get('authors')
+    image_links = book_info.get('imageLinks') or {}
+
+    return {
+        'title': book_info.get('title'),
+        'author': authors[0] if authors else 'Unknown',
+        'pub_date': pub_date,
+        'isbn': isbn,
+        'pages': book_info.get('pageCount') or 0,
+        'cover_url': image_links.get('thumbnail', NO_COVER_URL),
+        'language': book_info.get('language'),
+    }
@@ -0,0 +1,247 @@
+"""
+Batched book imports.
+
+A batch costs a constant number of queries however many books it holds: one
+refresh of the ``known_isbns`` filter, one ``isbn__in`` lookup of the ISBNs
+it may know, if any, one ``name_key__in`` lookup and a ``bulk_create`` for
+authors, and one ``bulk_create`` for the books (plus a ``bulk_update`` when
+upserting), all inside a single transaction.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from core import page_cache, stats
+from core.authors import name_key
+from core.isbn import known_isbns, normalize_isbn
+from core.models import Author, Book
+
+
+@dataclass
+class ImportResult:
+    books: list = field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def inserted(self):
+        return len(self.books)
+
+
+_DATE_FIELD = models.DateField()
+_PAGES_LIMIT = 32767
+
+
+def clean_book_data(book_data):
+    """
+    Returns a copy of ``book_data`` ready for ``Book(**data)`` or ``None`` when
+    the row can't be stored.
+    """
+    title = book_data.get('title')
+    if not title or not book_data.get('isbn') or not book_data.get('language'):
+        return None
+    try:
+        isbn = normalize_isbn(book_data['isbn'])
+        pub_date = _DATE_FIELD.to_python(book_data.get('pub_date'))
+    except ValidationError:
+        return None
+    if pub_date is None or not 0 <= (book_data.get('pages') or 0) <= _PAGES_LIMIT:
+        return None
+    return dict(book_data, title=title[:256], isbn=isbn, pub_date=pub_date, pages=book_data.get('pages') or 0)
+
+
+def resolve_authors(names):
+    """
+    Returns ``{name: Author}`` for ``names``, matching them on their normalized
+    key, and creates the missing authors in bulk, each under the first of
+    ``names`` with its key.
+    """
+    keys = {name: name_key(name) for name in names}
+    authors = {author.name_key: author for author in Author.objects.filter(name_key__in=set(keys.values()))}
+
+    missing = {}
+    for name, key in keys.items():
+        if key not in authors and key not in missing:
+            missing[key] = Author(name=name, name_key=key)
+    if missing:
+        Author.objects.bulk_create(missing.values())
+        if any(author.pk is None for author in missing.values()):
+            # Backends that can't return ids from a bulk insert need one more lookup.
+            missing = {author.name_key: author for author in Author.objects.filter(name_key__in=list(missing))}
+        authors.update(missing)
+    return {name: authors[key] for name, key in keys.items()}
+
+
+def maybe_stored(isbns, exact=False):
+    """
+    Narrows ``isbns`` down to those that may be stored already: the ones the
+    refreshed ``known_isbns`` filter may hold, or all of them if ``exact``.
+    """
+    if exact:
+        return list(isbns)
+    known_isbns.refresh()
+    return [isbn for isbn in isbns if isbn in known_isbns]
+
+
+def import_books(books_data):
+    """
+    Stores new books given as dicts of ``Book`` field values with the author's
+    name under ``author``. Invalid rows and ISBNs that are already known, in the
+    database or earlier in the batch, are skipped.
+    """
+    result = ImportResult()
+    candidates = {}
+    for book_data in books_data:
+        cleaned = clean_book_data(book_data)
+        if cleaned is None or cleaned['isbn'] in candidates:
+            result.skipped += 1
+            continue
+        candidates[cleaned['isbn']] = cleaned
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                existing = set(Book.objects.filter(isbn__in=maybe_stored(candidates, exact=attempt))
+                               .order_by().values_list('isbn', flat=True))
+                rows = [data for isbn, data in candidates.items() if isbn not in existing]
+                authors = resolve_authors(dict.fromkeys(data['author'] for data in rows))
+                books = [Book(**dict(data, author=authors[data['author']])) for data in rows]
+                Book.objects.bulk_create(books)
+                if books:
+                    stats.record(stats.count_books(books))
+                    page_cache.invalidate()
+        except IntegrityError:
+            # Some of these ISBNs were stored in the meantime, by another
+            # import or since the last refresh of the filter; the second
+            # attempt looks all of them up.
+            if attempt:
+                raise
+        else:
+            break
+
+    result.books = books
+    result.skipped += len(existing)
+    return result
+
+
+BOOK_FIELDS = ('title', 'author', 'pub_date', 'isbn', 'pages', 'cover_url', 'language')
+
+
+def validate_book_row(row):
+    """
+    Validates a row of file import with the rules of ``AddBookForm``/``AddBookView``.
+    Returns ``(data, errors)``; ``data`` is ``None`` when ``errors`` isn't empty.
+    """
+    errors = {}
+    data = {}
+    for name in BOOK_FIELDS:
+        value = row.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            errors[name] = ['This field is required.']
+            continue
+        # NDJSON values can be numbers, lists or objects; these two are parsed as text.
+        if name in ('author', 'pub_date') and not isinstance(value, str):
+            errors[name] = ['Enter a text value.']
+            continue
+        if name == 'author':
+            if len(value) > 256:
+                errors[name] = ['Ensure this value has at most 256 characters.']
+            data[name] = value
+            continue
+        if name == 'pub_date' and len(str(value)) != 10:
+            errors[name] = ['Wrong date format.']
+            continue
+        if name == 'isbn':
+            try:
+                data[name] = normalize_isbn(value)
+            except ValidationError as e:
+                errors[name] = e.messages
+            continue
+        try:
+            data[name] = Book._meta.get_field(name).formfield().clean(value)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if data.get('pages', 0) > _PAGES_LIMIT:
+        errors['pages'] = [f'Ensure this value is less than or equal to {_PAGES_LIMIT}.']
+    return (None, errors) if errors else (data, {})
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+
+
+def upsert_books(rows):
+    """
+    Stores validated rows (``validate_book_row`` output), inserting new ISBNs
+    and overwriting the books already stored under known ones. Of rows sharing
+    an ISBN the last one wins.
+    """
+    rows = {data['isbn']: data for data in rows}
+    result = UpsertResult()
+    if not rows:
+        return result
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                existing = Book.objects.in_bulk(maybe_stored(rows, exact=attempt), field_name='isbn')
+                authors = resolve_authors(dict.fromkeys(data['author'] for data in rows.values()))
+
+                new_books = []
+                now = timezone.now()
+                delta = stats.count_books(existing.values(), sign=-1)
+                for isbn, data in rows.items():
+                    data = dict(data, author=authors[data['author']])
+                    book = existing.get(isbn)
+                    if book is None:
+                        new_books.append(Book(**data))
+                        continue
+                    for name, value in data.items():
+                        setattr(book, name, value)
+                    book.updated_at = now
+
+                Book.objects.bulk_create(new_books)
+                if existing:
+                    Book.objects.bulk_update(existing.values(),
+                                             [name for name in BOOK_FIELDS if name != 'isbn'] + ['updated_at'])
+                delta.update(stats.count_books(new_books + list(existing.values())))
+                stats.record(delta)
+                page_cache.invalidate()
+        except IntegrityError:
+            # As in import_books(): the second attempt looks every ISBN up.
+            if attempt:
+                raise
+        else:
+            break
+
+    result.inserted = len(new_books)
+    result.updated = len(existing)
+    return result
+
+
+def read_rows(file, file_format):
+    """
+    Yields ``(line_number, row)`` for a CSV file with a header line or an
+    NDJSON file, one line at a time. Undecodable NDJSON lines come as ``None``.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
@@ -0,0 +1,162 @@
+"""
+Per-request SQL instrumentation.
+
+``QueryRecorder`` hooks into every database connection through an execute
+wrapper and records each statement with its duration. The active recorders
+live in a context variable, which ``sync_to_async`` carries over to the thread
+running the queries, so the queries of async views are recorded too.
+Django sends SQL with ``%s`` placeholders, so statements that only differ in
+their parameters share a "shape"; a shape repeated several times within one
+request is the signature of an N+1 query pattern. Transaction control and
+the chunks of bulk inserts and updates repeat by design and aren't counted.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('core.queries')
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+# BEGIN, SAVEPOINT/RELEASE/ROLLBACK TO of atomic blocks, multi-row INSERTs
+# of bulk_create() (VALUES lists, or SELECT ... UNION ALL on SQLite) and
+# CASE WHEN UPDATEs of bulk_update() batches.
+_BATCH_RE = re.compile(
+    r'^\s*(?:(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b'
+    r'|INSERT\b.*\b(?:VALUES\s*\([^()]*\)\s*,|UNION ALL SELECT\b)'
+    r'|UPDATE\b.*\bCASE\s+WHEN\b)',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def is_batch_statement(sql):
+    """Whether ``sql`` controls a transaction or writes a batch of rows, rather than work for a single row."""
+    return _BATCH_RE.match(sql) is not None
+
+
+def query_shape(sql):
+    """Normalizes ``sql`` so queries differing only in their parameters compare equal."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """Execute wrapper collecting ``(sql, duration)`` of every executed statement."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        """Total time spent in the database, in seconds."""
+        return sum(duration for sql, duration in self.queries)
+
+    def duplicates(self, threshold=None):
+        """
+        Returns ``{shape: count}`` for every query shape executed at least
+        ``threshold`` times, leaving out transaction control and batch writes.
+        """
+        if threshold is None:
+            threshold = getattr(settings, 'QUERY_BUDGET_DUPLICATE_THRESHOLD', 3)
+        shapes = Counter(query_shape(sql) for sql, duration in self.queries if not is_batch_statement(sql))
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+# ``(recorder, aliases)`` pairs of the record_queries() blocks being executed.
+_active_recorders = ContextVar('active_recorders', default=())
+
+
+def dispatch_to_recorders(execute, sql, params, many, context):
+    """Execute wrapper passing the statement through the active recorders of its database."""
+    alias = context['connection'].alias
+    for recorder, aliases in _active_recorders.get():
+        if alias in aliases:
+            execute = partial(recorder, execute)
+    return execute(sql, params, many, context)
+
+
+def install_dispatcher(connection, **kwargs):
+    """Adds ``dispatch_to_recorders`` to the wrappers of ``connection``; a ``connection_created`` receiver."""
+    if dispatch_to_recorders not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_to_recorders)
+
+
+@contextmanager
+def record_queries(using=None):
+    """Records the queries run on the ``using`` aliases (all databases by default)."""
+    recorder = QueryRecorder()
+    aliases = frozenset(using or connections)
+    for alias in aliases:
+        install_dispatcher(connections[alias])
+    token = _active_recorders.set(_active_recorders.get() + ((recorder, aliases),))
+    try:
+        yield recorder
+    finally:
+        _active_recorders.reset(token)
+
+
+class QueryBudgetMiddleware:
+    """
+    Reports the number of queries and the database time of every request in
+    the ``X-DB-Query-Count``, ``X-DB-Time-Ms`` and ``X-DB-Duplicate-Queries``
+    response headers and logs it to the ``core.queries`` logger. Requests
+    exceeding ``QUERY_BUDGET`` queries or repeating a query shape are logged as
+    warnings. Queries run while a streaming response is consumed aren't counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        duplicates = recorder.duplicates()
+        response['X-DB-Query-Count'] = str(recorder.count)
+        response['X-DB-Time-Ms'] = '%.2f' % (recorder.duration * 1000)
+        response['X-DB-Duplicate-Queries'] = str(sum(duplicates.values()))
+
+        budget = getattr(settings, 'QUERY_BUDGET', 20)
+        level = logging.WARNING if duplicates or recorder.count > budget else logging.INFO
+        logger.log(level, '%s %s: %d queries in %.2f ms', request.method, request.path,
+                   recorder.count, recorder.duration * 1000)
+        for shape, count in duplicates.items():
+            logger.warning('Possible N+1 on %s: %d x %s', request.path, count, shape)
+
+        return response
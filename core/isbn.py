@@ -0,0 +1,130 @@
+"""
+ISBN normalization and a per-process filter of the ISBNs already stored.
+
+Books are stored under their ISBN-13. ``normalize_isbn()`` accepts ISBN-10
+and ISBN-13 numbers with or without separators, checks their check digit and
+returns the ISBN-13, so one book can't be stored twice under different forms
+of its number.
+
+``KnownISBNs`` is a Bloom filter over ``Book.isbn`` that importers consult
+before going to the database: ISBNs it has never seen are certainly new, so
+only the few it may know are looked up. It is loaded once per process and
+then refreshed incrementally with the books updated since the last refresh.
+Books written since then, or committed late, are missing from it, so it's a
+hint only; importers fall back to an exact lookup on ``IntegrityError``.
+"""
+import hashlib
+import math
+import re
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+
+_SEPARATORS = re.compile(r'[\s-]+')
+
+INVALID_MESSAGE = 'Enter a valid ISBN-10 or ISBN-13.'
+
+
+def isbn13(first_twelve):
+    """Appends the ISBN-13 check digit to a string of twelve digits."""
+    total = sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(first_twelve))
+    return f'{first_twelve}{(10 - total % 10) % 10}'
+
+
+def is_valid_isbn10(isbn):
+    if len(isbn) != 10 or not isbn[:9].isdigit() or not (isbn[9].isdigit() or isbn[9] == 'X'):
+        return False
+    total = sum((10 - position) * (10 if digit == 'X' else int(digit)) for position, digit in enumerate(isbn))
+    return total % 11 == 0
+
+
+def isbn10_to_isbn13(isbn):
+    return isbn13(f'978{isbn[:9]}')
+
+
+def normalize_isbn(value):
+    """
+    Returns the ISBN-13 of an ISBN-10 or ISBN-13 number, which may contain
+    spaces and hyphens and start with "ISBN". Raises ``ValidationError`` for
+    anything else, including numbers with a wrong check digit.
+    """
+    isbn = _SEPARATORS.sub('', str(value)).upper()
+    if isbn.startswith('ISBN'):
+        isbn = isbn[4:].lstrip(':')
+    if is_valid_isbn10(isbn):
+        return isbn10_to_isbn13(isbn)
+    if len(isbn) == 13 and isbn.isdigit() and isbn[:3] in ('978', '979') and isbn13(isbn[:12]) == isbn:
+        return isbn
+    raise ValidationError(INVALID_MESSAGE, code='invalid_isbn')
+
+
+class BloomFilter:
+    """
+    Set membership in ``-capacity * ln(error_rate) / ln(2)^2`` bits: no false
+    negatives and false positives at about ``error_rate`` while holding up to
+    ``capacity`` items.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class KnownISBNs:
+    """ISBNs stored in the database, as of the last ``refresh()``, in a ``BloomFilter``."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.filter = None
+        self.updated_since = None
+
+    def refresh(self):
+        """
+        Adds the ISBNs of the books updated since the last refresh, in one
+        query, or loads all of them into a new, larger filter the first time
+        and once the filter is full.
+        """
+        from core.models import Book
+
+        with self.lock:
+            if self.filter is None or self.filter.count >= self.filter.capacity:
+                capacity = max(getattr(settings, 'ISBN_FILTER_MIN_CAPACITY', 100000), 2 * Book.objects.count())
+                self.filter = BloomFilter(capacity, getattr(settings, 'ISBN_FILTER_ERROR_RATE', 0.01))
+                self.updated_since = None
+            books = Book.objects.order_by()
+            if self.updated_since is not None:
+                # Rows updated at the same instant as the last one seen may have committed since.
+                books = books.filter(updated_at__gte=self.updated_since)
+            for isbn, updated_at in books.values_list('isbn', 'updated_at').iterator():
+                self.filter.add(isbn)
+                if self.updated_since is None or updated_at > self.updated_since:
+                    self.updated_since = updated_at
+        return self
+
+    def __contains__(self, isbn):
+        return self.filter is not None and isbn in self.filter
+
+
+known_isbns = KnownISBNs()
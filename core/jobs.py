@@ -0,0 +1,131 @@
+"""
+Database-backed queue for Google Books imports.
+
+The web process only stores an ``ImportJob`` row; the ``import_worker``
+management command claims pending jobs and runs them outside of the request
+cycle. Claiming is a compare-and-set ``UPDATE``, so several workers can share
+one queue without running a job twice. A claim is a lease: a job left running
+without progress for ``IMPORT_JOB_LEASE_SECONDS``, because its worker died, is
+claimed again. Imports skip the books already stored, so a job that was only
+slow and runs twice doesn't duplicate any. Async views use ``submit_import_async``,
+which fetches the volumes of eager imports without blocking the event loop.
+"""
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from core.google_books import GoogleBooksError, get_async_client, get_client, parse_volume
+from core.importer import ImportResult, import_books
+from core.models import ImportJob
+
+
+logger = logging.getLogger(__name__)
+
+
+def submit_import(search_phrase, max_results):
+    """
+    Queues an import of ``search_phrase``. With ``IMPORT_JOBS_EAGER`` set the job
+    runs right away in the calling process, which is handy without a worker.
+    Returns the job together with the import result (``None`` unless eager).
+    """
+    job = create_job(search_phrase, max_results)
+    return job, run_job(job) if job.status == ImportJob.RUNNING else None
+
+
+async def submit_import_async(search_phrase, max_results):
+    """``submit_import`` for async views."""
+    job = await sync_to_async(create_job)(search_phrase, max_results)
+    return job, await run_job_async(job) if job.status == ImportJob.RUNNING else None
+
+
+def create_job(search_phrase, max_results):
+    eager = getattr(settings, 'IMPORT_JOBS_EAGER', False)
+    return ImportJob.objects.create(
+        search_phrase=search_phrase,
+        max_results=max_results,
+        status=ImportJob.RUNNING if eager else ImportJob.PENDING,
+    )
+
+
+def claim_job(job):
+    """
+    Marks ``job`` as running, provided nobody claimed it, or heard from its
+    worker, since it was read. Returns ``False`` if another worker was faster.
+    """
+    claimed = (ImportJob.objects.filter(id=job.id, status=job.status, updated_at=job.updated_at)
+               .update(status=ImportJob.RUNNING, updated_at=timezone.now()))
+    if claimed:
+        if job.status == ImportJob.RUNNING:
+            logger.warning('Reclaiming import job %s, running without progress since %s.', job.id, job.updated_at)
+        job.status = ImportJob.RUNNING
+    return bool(claimed)
+
+
+def stale_jobs():
+    """Running jobs whose lease has expired: not updated for ``IMPORT_JOB_LEASE_SECONDS``."""
+    lease = timedelta(seconds=getattr(settings, 'IMPORT_JOB_LEASE_SECONDS', 15 * 60))
+    return ImportJob.objects.filter(status=ImportJob.RUNNING, updated_at__lt=timezone.now() - lease)
+
+
+def claim_next_job():
+    """
+    Returns the oldest job whose lease has expired, or else the oldest pending
+    job, after claiming it, or ``None`` if the queue is empty.
+    """
+    while True:
+        job = (stale_jobs().order_by('id').first()
+               or ImportJob.objects.filter(status=ImportJob.PENDING).order_by('id').first())
+        if job is None:
+            return None
+        if claim_job(job):
+            return job
+
+
+def run_job(job):
+    """Fetches and imports the volumes of a claimed job, recording the outcome on it."""
+    try:
+        volumes = get_client().search(job.search_phrase, max_volumes=job.max_results)
+    except Exception as e:
+        return finish_job(job, error=e)
+    return finish_job(job, volumes)
+
+
+async def run_job_async(job):
+    """``run_job`` waiting on the Google Books API without blocking the event loop."""
+    try:
+        volumes = await get_async_client().search(job.search_phrase, max_volumes=job.max_results)
+    except Exception as e:
+        return await sync_to_async(finish_job)(job, error=e)
+    return await sync_to_async(finish_job)(job, volumes)
+
+
+def finish_job(job, volumes=None, error=None):
+    """Imports the fetched ``volumes``, or records the fetch ``error``, and saves the outcome on the job."""
+    result = ImportResult()
+    try:
+        if error is not None:
+            raise error
+        job.fetched = len(volumes)
+        job.save(update_fields=['fetched', 'updated_at'])
+
+        books_data = [parse_volume(volume) for volume in volumes]
+        result = import_books([book_data for book_data in books_data if book_data is not None])
+        result.skipped += books_data.count(None)
+    except GoogleBooksError as e:
+        job.status = ImportJob.FAILED
+        job.error = str(e)
+    except Exception as e:
+        logger.exception('Import job %s failed.', job.id)
+        job.status = ImportJob.FAILED
+        job.error = repr(e)
+    else:
+        job.status = ImportJob.DONE
+
+    job.inserted = result.inserted
+    job.skipped = result.skipped
+    job.finished_at = timezone.now()
+    job.save()
+    return result
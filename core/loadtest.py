@@ -0,0 +1,290 @@
+"""
+In-process load generator for the WSGI application.
+
+Requests are built as WSGI environs and passed straight to
+``Bookstore.wsgi.application`` from a pool of threads or forked processes, so
+a load test needs neither a running server nor external tools. The requests
+either follow a weighted scenario, each worker drawing from it at random, or
+replay a recorded log in order, the entries dealt out to the workers in turn.
+
+Paths and form values may contain placeholders, filled in for every request:
+``{n}`` is a sequence number unique within the run, ``{isbn}`` a fresh valid
+ISBN-13 in the 979-3 range and ``{book_id}`` the id of an existing book.
+"""
+import io
+import json
+import math
+import random
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import count
+from multiprocessing import get_context
+from typing import Optional
+from urllib.parse import unquote, urlencode, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.crypto import get_random_string
+
+from core.isbn import isbn13
+
+
+LOADTEST_ISBN_PREFIX = '9793'
+
+# Upper bounds of the latency histogram buckets; slower requests fall into a last, open bucket.
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Request line of a Common/Combined Log Format entry, as written by gunicorn.
+ACCESS_LOG_REQUEST = re.compile(r'"(?P<method>[A-Z]+) (?P<path>\S+) HTTP/[\d.]+"')
+
+
+@dataclass
+class RequestSpec:
+    method: str
+    path: str
+    data: Optional[dict] = None
+    weight: float = 1.0
+
+
+DEFAULT_SCENARIO = [
+    RequestSpec('GET', '/find-book', weight=4),
+    RequestSpec('GET', '/find-book?q=river+castle', weight=3),
+    RequestSpec('GET', '/find-book?language=pl&from_date=1990-01-01&to_date=2000-01-01', weight=2),
+    RequestSpec('GET', '/api/books/', weight=3),
+    RequestSpec('GET', '/api/books/{book_id}/', weight=3),
+    RequestSpec('GET', '/api/author/', weight=1),
+    RequestSpec('POST', '/add-book', weight=1, data={
+        'title': 'Load test {n}',
+        'author': 'Load Tester',
+        'pub_date': '2001-01-01',
+        'isbn': '{isbn}',
+        'pages': '100',
+        'cover_url': 'http://covers.example.com/loadtest.jpg',
+        'language': 'en',
+    }),
+]
+
+
+@dataclass
+class LoadTest:
+    specs: list
+    workers: int = 8
+    requests: Optional[int] = None
+    duration: Optional[float] = None
+    replay: bool = False
+    seed: int = 0
+    host: str = 'localhost'
+    isbn_start: int = 0
+    book_ids: list = field(default_factory=list)
+
+    @property
+    def total_requests(self):
+        if self.requests is not None:
+            return self.requests
+        return len(self.specs) if self.replay else 1000
+
+
+def load_scenario(file):
+    """Reads a weighted scenario: a JSON list of {method, path, data, weight} objects."""
+    return [RequestSpec(item.get('method', 'GET').upper(), item['path'], item.get('data'), item.get('weight', 1.0))
+            for item in json.load(file)]
+
+
+def load_log(file):
+    """
+    Reads a recorded request log: NDJSON {method, path, data} objects or
+    access log lines. Access logs carry no request bodies, so only their GET
+    and HEAD requests are replayed.
+    """
+    specs = []
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            item = json.loads(line)
+            specs.append(RequestSpec(item.get('method', 'GET').upper(), item['path'], item.get('data')))
+            continue
+        match = ACCESS_LOG_REQUEST.search(line)
+        if match and match['method'] in ('GET', 'HEAD'):
+            specs.append(RequestSpec(match['method'], match['path']))
+    return specs
+
+
+def next_isbn_number():
+    """First free number for ``{isbn}`` placeholders, after those used by earlier runs."""
+    from core.models import Book
+
+    last = (Book.objects.filter(isbn__startswith=LOADTEST_ISBN_PREFIX)
+            .order_by('-isbn').values_list('isbn', flat=True).first())
+    return int(last[len(LOADTEST_ISBN_PREFIX):12]) + 1 if last else 0
+
+
+def fill(value, context):
+    return value.format_map(context) if isinstance(value, str) and '{' in value else value
+
+
+def build_environ(spec, context, host, csrf_token):
+    path, _, query = fill(spec.path, context).partition('?')
+    environ = {
+        'REQUEST_METHOD': spec.method,
+        'PATH_INFO': unquote(path),
+        'QUERY_STRING': query,
+        'HTTP_HOST': host,
+        'SERVER_NAME': host,
+        'wsgi.multithread': True,
+    }
+    body = b''
+    if spec.data is not None:
+        body = urlencode({key: fill(value, context) for key, value in spec.data.items()}, doseq=True).encode()
+        environ['CONTENT_TYPE'] = 'application/x-www-form-urlencoded'
+    if spec.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+        # Post like a browser holding a CSRF cookie would.
+        environ['HTTP_COOKIE'] = f'{settings.CSRF_COOKIE_NAME}={csrf_token}'
+        environ['HTTP_X_CSRFTOKEN'] = csrf_token
+    environ['CONTENT_LENGTH'] = str(len(body))
+    environ['wsgi.input'] = io.BytesIO(body)
+    setup_testing_defaults(environ)
+    return environ
+
+
+def url_name(path):
+    try:
+        return resolve(urlsplit(path).path).url_name or '<unnamed>'
+    except Resolver404:
+        return '<unresolved>'
+
+
+def call(application, environ):
+    """Runs one request through ``application``; returns its status code and duration in seconds."""
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(' ', 1)[0]))
+
+    start = time.perf_counter()
+    result = application(environ, start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return statuses[0], time.perf_counter() - start
+
+
+def run_worker(load_test, index):
+    """
+    Sends worker ``index``'s share of the requests and returns, per URL name,
+    the latencies in milliseconds, the status codes and the number of errors.
+    """
+    from Bookstore.wsgi import application
+
+    rng = random.Random(load_test.seed + index)
+    weights = [spec.weight for spec in load_test.specs]
+    csrf_token = get_random_string(64)
+    deadline = time.monotonic() + load_test.duration if load_test.duration else None
+    sequence = count(index, load_test.workers)
+    stats = defaultdict(lambda: {'latencies': [], 'statuses': Counter(), 'errors': 0})
+
+    while True:
+        position = next(sequence)
+        if deadline is not None:
+            if time.monotonic() >= deadline:
+                break
+        elif position >= load_test.total_requests:
+            break
+        if load_test.replay:
+            spec = load_test.specs[position % len(load_test.specs)]
+        else:
+            spec = rng.choices(load_test.specs, weights)[0]
+
+        context = {
+            'n': position,
+            'isbn': isbn13(f'{LOADTEST_ISBN_PREFIX}{load_test.isbn_start + position:08d}'),
+            'book_id': rng.choice(load_test.book_ids) if load_test.book_ids else 0,
+        }
+        environ = build_environ(spec, context, load_test.host, csrf_token)
+        entry = stats[url_name(environ['PATH_INFO'])]
+        try:
+            status, duration = call(application, environ)
+        except Exception:
+            status, duration = 'exception', None
+        if duration is not None:
+            entry['latencies'].append(duration * 1000)
+        entry['statuses'][status] += 1
+        if status == 'exception' or status >= 400:
+            entry['errors'] += 1
+    return dict(stats)
+
+
+def run_load_test(load_test, processes=False):
+    """
+    Runs ``load_test`` on ``load_test.workers`` threads, or forked processes,
+    and returns the merged per URL name statistics with the elapsed seconds.
+    """
+    if processes:
+        # Children must open database connections of their own.
+        connections.close_all()
+        executor = ProcessPoolExecutor(load_test.workers, mp_context=get_context('fork'))
+    else:
+        executor = ThreadPoolExecutor(load_test.workers)
+
+    start = time.perf_counter()
+    with executor:
+        results = list(executor.map(run_worker, [load_test] * load_test.workers, range(load_test.workers)))
+    elapsed = time.perf_counter() - start
+
+    merged = defaultdict(lambda: {'latencies': [], 'statuses': Counter(), 'errors': 0})
+    for result in results:
+        for name, entry in result.items():
+            merged[name]['latencies'].extend(entry['latencies'])
+            merged[name]['statuses'].update(entry['statuses'])
+            merged[name]['errors'] += entry['errors']
+    return dict(merged), elapsed
+
+
+def histogram(latencies):
+    counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+    for latency in latencies:
+        counts[bisect_left(HISTOGRAM_BUCKETS_MS, latency)] += 1
+    return counts
+
+
+def summarize(stats, elapsed):
+    """Throughput, error rate, latency percentiles and histogram per URL name, and in total."""
+    def describe(entries):
+        latencies = sorted(latency for entry in entries for latency in entry['latencies'])
+        statuses = sum((entry['statuses'] for entry in entries), Counter())
+        requests = sum(statuses.values())
+        errors = sum(entry['errors'] for entry in entries)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[max(0, math.ceil(fraction * len(latencies)) - 1)], 3)
+
+        return {
+            'requests': requests,
+            'throughput_rps': round(requests / elapsed, 2) if elapsed else None,
+            'errors': errors,
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+            'statuses': {str(status): number for status, number in sorted(statuses.items(), key=str)},
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(latencies[-1], 3) if latencies else None,
+            'histogram': histogram(latencies),
+        }
+
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'total': describe(list(stats.values())),
+        'urls': {name: describe([entry]) for name, entry in sorted(stats.items())},
+    }
@@ -0,0 +1,60 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from core.benchmarks import benchmark_database, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the views, the API and the import path on seeded catalogs in a separate '
+            'benchmark database, optionally comparing the results with a JSON baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, nargs='+', default=[10000],
+                            help='Catalog sizes to benchmark, e.g. --books 10000 100000 1000000.')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per scenario.')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Only run the named scenario; may be repeated.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='JSON baseline to compare the results with.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Relative slowdown or memory growth reported as a regression.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the benchmark database, and its seeded books, for the next run.')
+        parser.add_argument('--cache', action='store_true',
+                            help='Serve find-book pages from the page cache, as in production.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be positive.')
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)
+
+        with benchmark_database(keepdb=options['keepdb']), override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                FIND_BOOK_CACHE_TIMEOUT=settings.FIND_BOOK_CACHE_TIMEOUT if options['cache'] else 0):
+            results = run_benchmarks(options['books'], options['iterations'], options['scenarios'],
+                                     progress=self.stdout.write)
+
+        self.print_results(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
+
+        if baseline is not None:
+            regressions = compare(baseline, results, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def print_results(self, results):
+        self.stdout.write(f'{"scenario":<28}{"books":>9}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}{"peak KiB":>11}')
+        for size, scenarios in results['results'].items():
+            for name, metrics in scenarios.items():
+                self.stdout.write(f'{name:<28}{size:>9}{metrics["p50_ms"]:>10.2f}{metrics["p95_ms"]:>10.2f}'
+                                  f'{metrics["queries"]:>9}{metrics["peak_memory_kb"]:>11.1f}')
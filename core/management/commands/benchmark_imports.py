@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import benchmark_database, compare_import_concurrency
+
+
+class Command(BaseCommand):
+    help = ('Compares how many eager Google Books imports the WSGI and the ASGI application keep in '
+            'flight, against a local stand-in for the API, in a separate benchmark database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Imports sent to each application.')
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help='Concurrent clients of the ASGI application.')
+        parser.add_argument('--wsgi-workers', type=int, default=8,
+                            help='Threads serving the WSGI application, like sync gunicorn workers.')
+        parser.add_argument('--volumes', type=int, default=40, help='Volumes per import.')
+        parser.add_argument('--delay', type=float, default=0.2, help='Seconds the stand-in API takes per page.')
+        parser.add_argument('--output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        for option in ('requests', 'concurrency', 'wsgi_workers', 'volumes'):
+            if options[option] < 1:
+                raise CommandError(f'--{option.replace("_", "-")} must be positive.')
+
+        with benchmark_database():
+            results = compare_import_concurrency(
+                options['requests'], options['concurrency'], options['wsgi_workers'], options['volumes'],
+                options['delay'], progress=self.stdout.write,
+            )
+
+        self.stdout.write(f'{"server":<8}{"at a time":>10}{"imports/s":>11}{"p50 ms":>10}{"p95 ms":>10}'
+                          f'{"errors":>8}{"failed":>8}{"API in flight":>15}')
+        for mode, metrics in results.items():
+            self.stdout.write(f'{mode:<8}{metrics["concurrency"]:>10}{metrics["throughput_rps"]:>11.1f}'
+                              f'{metrics["p50_ms"]:>10.1f}{metrics["p95_ms"]:>10.1f}{metrics["errors"]:>8}'
+                              f'{metrics["failed_imports"]:>8}'
+                              f'{metrics["peak_upstream_in_flight"]:>15}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.covers import fetch_pending, queue_covers
+
+
+class Command(BaseCommand):
+    help = 'Downloads book covers into the local cover cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once every cover has been tried instead of waiting for new books.')
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Seconds to wait between scans for new and changed books.')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of covers downloaded per batch.')
+
+    def handle(self, *args, **options):
+        overlap = timedelta(seconds=getattr(settings, 'COVER_SCAN_OVERLAP', 60))
+        reached = None
+        while True:
+            # Every write sets updated_at, so each scan resumes where the last one reached, less
+            # an overlap for transactions that commit after a later one was already scanned.
+            scanned = queue_covers(None if reached is None else (reached[0] - overlap, 0))
+            while scanned is not None:
+                reached = scanned if reached is None else max(reached, scanned)
+                scanned = queue_covers(scanned)
+
+            result = fetch_pending(options['batch_size'])
+            if result.done or result.failed or result.retried:
+                self.stdout.write(f'Covers: {result.done} stored, {result.failed} failed, '
+                                  f'{result.retried} to retry.')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
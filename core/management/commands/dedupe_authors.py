@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.authors import merge_authors, suggest_merges
+from core.models import Author
+
+
+class Command(BaseCommand):
+    help = 'Lists authors whose names look like spellings of one name and merges them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=0.7,
+                            help='Trigram similarity, between 0 and 1, above which names are suggested as duplicates.')
+        parser.add_argument('--apply', action='store_true',
+                            help='Merge every suggestion instead of only listing them.')
+        parser.add_argument('--merge', type=int, nargs='+', metavar='ID',
+                            help='Merge the authors with the second and following ids into the first.')
+
+    def handle(self, *args, **options):
+        if options['merge']:
+            keep_id, *duplicate_ids = options['merge']
+            authors = Author.objects.in_bulk([keep_id] + duplicate_ids)
+            missing = [str(pk) for pk in [keep_id] + duplicate_ids if pk not in authors]
+            if missing:
+                raise CommandError(f'No authors with ids {", ".join(missing)}.')
+            if not duplicate_ids:
+                raise CommandError('--merge needs the id to keep and at least one duplicate id.')
+            moved = merge_authors(authors[keep_id], [authors[pk] for pk in duplicate_ids])
+            self.stdout.write(f'Moved {moved} books to {authors[keep_id].name} (#{keep_id}).')
+            return
+
+        if not 0 < options['threshold'] <= 1:
+            raise CommandError('--threshold must be above 0 and at most 1.')
+        suggestions = suggest_merges(options['threshold'])
+        for suggestion in suggestions:
+            duplicates = ', '.join(f'{author.name} (#{author.id})' for author in suggestion.duplicates)
+            self.stdout.write(f'{suggestion.score:.3f}  {suggestion.keep.name} (#{suggestion.keep.id}) <- {duplicates}')
+            if options['apply']:
+                moved = merge_authors(suggestion.keep, suggestion.duplicates)
+                self.stdout.write(f'       moved {moved} books.')
+        self.stdout.write(f'{len(suggestions)} suggestions.')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.google_books import ResponseCache
+
+
+class Command(BaseCommand):
+    help = 'Shows the hit/miss counters of the Google Books response cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Drop all cached responses and counters.')
+
+    def handle(self, *args, **options):
+        cache = ResponseCache()
+        stats = cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_ratio = stats['hits'] / lookups if lookups else 0
+        entries = f'{stats["entries"]} cached pages, ' if 'entries' in stats else ''
+        self.stdout.write(
+            f'{entries}{stats["hits"]} hits, {stats["misses"]} misses ({hit_ratio:.0%} hit ratio).'
+        )
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS('Cache cleared.'))
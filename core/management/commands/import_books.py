@@ -0,0 +1,89 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import read_rows, upsert_books, validate_book_row
+
+
+class Command(BaseCommand):
+    help = ('Imports books from CSV (with a header line) or NDJSON files, adding new ISBNs '
+            'and updating known ones. Rejected rows are written to a side file.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='CSV or NDJSON files to import.')
+        parser.add_argument('--format', choices=('csv', 'ndjson'),
+                            help='File format; guessed from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows stored per transaction.')
+        parser.add_argument('--rejects',
+                            help='NDJSON file for rejected rows; defaults to <path>.rejected.ndjson.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        for path in options['paths']:
+            self.import_file(path, options)
+
+    def import_file(self, path, options):
+        file_format = options['format'] or self.guess_format(path)
+        rejects_path = options['rejects'] or f'{path}.rejected.ndjson'
+        totals = {'rows': 0, 'inserted': 0, 'updated': 0, 'rejected': 0}
+        rejects = None
+        started = time.monotonic()
+
+        try:
+            with open(path, newline='', encoding='utf-8') as file:
+                rows = read_rows(file, file_format)
+                while True:
+                    batch = list(islice(rows, options['batch_size']))
+                    if not batch:
+                        break
+
+                    valid = []
+                    for line_number, row in batch:
+                        data, errors = validate_book_row(row) if row is not None else (None, {'row': ['Invalid JSON object.']})
+                        if data is not None:
+                            valid.append(data)
+                            continue
+                        if rejects is None:
+                            rejects = open(rejects_path, 'w', encoding='utf-8')
+                        rejects.write(json.dumps({'line': line_number, 'errors': errors, 'row': row},
+                                                 ensure_ascii=False) + '\n')
+                        totals['rejected'] += 1
+
+                    result = upsert_books(valid)
+                    totals['rows'] += len(batch)
+                    totals['inserted'] += result.inserted
+                    totals['updated'] += result.updated
+                    if options['verbosity'] >= 1:
+                        self.report(path, totals, started)
+        except OSError as e:
+            raise CommandError(f'Could not read {path}: {e}')
+        finally:
+            if rejects is not None:
+                rejects.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{path}: {totals["inserted"]} inserted, {totals["updated"]} updated, '
+            f'{totals["rejected"]} rejected in {time.monotonic() - started:.1f}s.'
+        ))
+        if rejects is not None:
+            self.stdout.write(f'Rejected rows written to {rejects_path}.')
+
+    def report(self, path, totals, started):
+        elapsed = time.monotonic() - started
+        rate = totals['rows'] / elapsed if elapsed else 0
+        self.stdout.write(f'{path}: {totals["rows"]} rows ({rate:.0f} rows/s), {totals["inserted"]} inserted, '
+                          f'{totals["updated"]} updated, {totals["rejected"]} rejected')
+
+    @staticmethod
+    def guess_format(path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+        raise CommandError(f'Cannot guess the format of {path}, use --format.')
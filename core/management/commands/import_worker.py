@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Processes queued Google Books import jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of waiting for new jobs.')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait between polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'Importing "{job.search_phrase}" (job {job.id})...')
+            result = run_job(job)
+            if job.status == job.FAILED:
+                self.stderr.write(f'Job {job.id} failed: {job.error}')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Job {job.id} done: {result.inserted} inserted, {result.skipped} skipped.'
+                ))
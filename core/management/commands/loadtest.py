@@ -0,0 +1,90 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import (
+    DEFAULT_SCENARIO, HISTOGRAM_BUCKETS_MS, LoadTest, load_log, load_scenario, next_isbn_number, run_load_test,
+    summarize,
+)
+from core.models import Book
+
+
+class Command(BaseCommand):
+    help = ('Load tests the WSGI application in-process from a pool of threads or processes, '
+            'following a weighted scenario or replaying a request log, and reports throughput, '
+            'latency histograms and error rates per URL name. Runs against the configured database.')
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument('--scenario',
+                            help='JSON list of {"method", "path", "data", "weight"} requests to draw from; '
+                                 'a built-in mix of find-book, API and add-book requests by default.')
+        source.add_argument('--replay',
+                            help='Request log to replay in order: NDJSON {"method", "path", "data"} lines '
+                                 'or a gunicorn access log.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of workers.')
+        parser.add_argument('--processes', action='store_true', help='Run the workers as processes, not threads.')
+        parser.add_argument('--requests', type=int,
+                            help='Total requests; 1000 for scenarios and the length of the log for replays.')
+        parser.add_argument('--duration', type=float, help='Run for this many seconds instead.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the scenario draws.')
+        parser.add_argument('--host', default='localhost', help='Host header of the requests.')
+        parser.add_argument('--output', help='Also write the report to this JSON file.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be positive.')
+        if options['scenario']:
+            with open(options['scenario'], encoding='utf-8') as file:
+                specs = load_scenario(file)
+        elif options['replay']:
+            with open(options['replay'], encoding='utf-8') as file:
+                specs = load_log(file)
+        else:
+            specs = DEFAULT_SCENARIO
+        if not specs:
+            raise CommandError('No requests to send.')
+
+        load_test = LoadTest(
+            specs=specs,
+            workers=options['concurrency'],
+            requests=options['requests'],
+            duration=options['duration'],
+            replay=bool(options['replay']),
+            seed=options['seed'],
+            host=options['host'],
+            isbn_start=next_isbn_number(),
+            book_ids=list(Book.objects.order_by('?').values_list('id', flat=True)[:1000]),
+        )
+        if options['duration']:
+            self.stdout.write(f'Load testing for {options["duration"]} s with {load_test.workers} workers...')
+        else:
+            self.stdout.write(f'Sending {load_test.total_requests} requests with {load_test.workers} workers...')
+        stats, elapsed = run_load_test(load_test, processes=options['processes'])
+        report = summarize(stats, elapsed)
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f'Report written to {options["output"]}.')
+
+    def print_report(self, report):
+        total = report['total']
+        self.stdout.write(f'{total["requests"]} requests in {report["elapsed_s"]:.2f} s: '
+                          f'{total["throughput_rps"]} requests/s, {total["errors"]} errors.')
+        self.stdout.write(f'{"url name":<24}{"requests":>9}{"req/s":>9}{"errors":>8}'
+                          f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}')
+        for name, entry in report['urls'].items():
+            self.stdout.write(f'{name:<24}{entry["requests"]:>9}{entry["throughput_rps"]:>9.1f}'
+                              f'{entry["error_rate"]:>8.1%}' + ''.join(
+                                  f'{entry[key]:>9.1f}' if entry[key] is not None else f'{"-":>9}'
+                                  for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')))
+
+        labels = [f'<= {bound} ms' for bound in HISTOGRAM_BUCKETS_MS] + [f'> {HISTOGRAM_BUCKETS_MS[-1]} ms']
+        for name, entry in report['urls'].items():
+            self.stdout.write(f'\n{name} ({", ".join(f"{status}: {n}" for status, n in entry["statuses"].items())})')
+            largest = max(entry['histogram']) or 1
+            for label, number in zip(labels, entry['histogram']):
+                if number:
+                    self.stdout.write(f'  {label:>11} {"#" * max(1, round(40 * number / largest)):<40} {number}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the catalog statistics behind /api/stats/ from the books table.'
+
+    def handle(self, *args, **options):
+        rows = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Catalog statistics rebuilt: {rows} groups.'))
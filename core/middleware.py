@@ -0,0 +1,74 @@
+import asyncio
+
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from core.routers import routing
+
+
+# Set for REPLICA_PIN_SECONDS after a client's request writes to the database.
+PIN_COOKIE = 'primary_pin'
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    ``WhiteNoiseMiddleware`` that also runs in async mode. The original is
+    sync-only, so under an ASGI server it would hold the one thread Django
+    runs sync code in for the whole of every request, async views included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets the reads of safe requests go to the read replicas, see
+    ``core.routers``. A request that writes sets a cookie pinning the client
+    to the primary for ``REPLICA_PIN_SECONDS``, so it reads its own writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with routing(self.use_replicas(request)) as state:
+            response = self.get_response(request)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        with routing(self.use_replicas(request)) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state)
+
+    @staticmethod
+    def use_replicas(request):
+        return request.method in ('GET', 'HEAD', 'OPTIONS') and PIN_COOKIE not in request.COOKIES
+
+    @staticmethod
+    def pin(response, state):
+        if state.wrote:
+            response.set_cookie(PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                                httponly=True, samesite='Lax')
+        return response
@@ -36,5 +36,8 @@ class Migration(migrations.Migration):
                 ('updated_at', models.DateTimeField(auto_now=True)),
                 ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.author')),
             ],
+            options={
+                'ordering': ('title',),
+            },
         ),
     ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.5 on 2026-10-18 19:49
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_importjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='core_author_name_upper_idx'),
+        ),
+    ]
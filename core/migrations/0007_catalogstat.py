@@ -0,0 +1,46 @@
+# Generated by Django 3.2.5 on 2026-10-18 20:04
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+
+def populate_catalog_stats(apps, schema_editor):
+    Book = apps.get_model('core', 'Book')
+    CatalogStat = apps.get_model('core', 'CatalogStat')
+    db_alias = schema_editor.connection.alias
+    books = Book.objects.using(db_alias)
+    groups = (
+        ('language', books.values_list('language')),
+        ('year', books.annotate(year=ExtractYear('pub_date')).values_list('year')),
+        ('author', books.values_list('author_id')),
+    )
+    for dimension, values in groups:
+        CatalogStat.objects.using(db_alias).bulk_create(
+            CatalogStat(dimension=dimension, key=str(key), count=count)
+            for key, count in values.annotate(count=Count('id')).order_by()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('language', 'Language'), ('year', 'Publication year'), ('author', 'Author')], max_length=10)),
+                ('key', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='catalogstat',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key'), name='core_catalogstat_dimension_key_uniq'),
+        ),
+        migrations.RunPython(populate_catalog_stats, migrations.RunPython.noop),
+    ]
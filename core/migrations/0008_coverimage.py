@@ -0,0 +1,31 @@
+# Generated by Django 3.2.5 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_catalogstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoverImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_url', models.URLField(unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('digest', models.CharField(blank=True, max_length=64)),
+                ('content_type', models.CharField(blank=True, max_length=50)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='coverimage',
+            index=models.Index(fields=['status', 'id'], name='core_coverimage_status_idx'),
+        ),
+    ]
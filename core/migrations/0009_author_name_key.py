@@ -0,0 +1,101 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from core import search
+
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def name_key(name):
+    """
+    ``core.authors.name_key()`` as of this migration, copied so that later
+    changes to the normalization don't change what this migration did.
+    """
+    decomposed = unicodedata.normalize('NFKD', name.casefold())
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    key = ' '.join(_WORD_RE.findall(stripped)) or ' '.join(name.casefold().split())
+    return key[:256]
+
+
+def merge_duplicate_authors(apps, schema_editor):
+    """
+    Merges the authors whose names have the same key, which has to be unique,
+    into the oldest of them. Runs while the search triggers still keep the
+    index up to date with the books' new authors.
+    """
+    Author = apps.get_model('core', 'Author')
+    Book = apps.get_model('core', 'Book')
+    CatalogStat = apps.get_model('core', 'CatalogStat')
+    db_alias = schema_editor.connection.alias
+
+    groups = defaultdict(list)
+    for author_id, name in Author.objects.using(db_alias).order_by('id').values_list('id', 'name').iterator():
+        groups[name_key(name)].append(author_id)
+
+    for author_id, *ids in groups.values():
+        if not ids:
+            continue
+        Book.objects.using(db_alias).filter(author_id__in=ids).update(author_id=author_id, updated_at=timezone.now())
+        CatalogStat.objects.using(db_alias).filter(dimension='author', key__in=[str(pk) for pk in ids]).delete()
+        CatalogStat.objects.using(db_alias).update_or_create(
+            dimension='author', key=str(author_id),
+            defaults={'count': Book.objects.using(db_alias).filter(author_id=author_id).count()},
+        )
+        Author.objects.using(db_alias).filter(id__in=ids).delete()
+
+
+def set_name_keys(apps, schema_editor):
+    Author = apps.get_model('core', 'Author')
+    db_alias = schema_editor.connection.alias
+    authors = list(Author.objects.using(db_alias).only('id', 'name'))
+    for author in authors:
+        author.name_key = name_key(author.name)
+    Author.objects.using(db_alias).bulk_update(authors, ['name_key'], batch_size=1000)
+
+
+def drop_search_triggers(apps, schema_editor):
+    search.drop_triggers(schema_editor)
+
+
+def create_search_triggers(apps, schema_editor):
+    search.create_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_coverimage'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_authors, migrations.RunPython.noop),
+        # SQLite rebuilds core_author, which triggers on core_book refer to
+        # and which Django 3.2 can't do with expression indexes in place.
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.RemoveIndex(
+            model_name='author',
+            name='core_author_name_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='author',
+            name='core_author_name_idx',
+        ),
+        migrations.AddField(
+            model_name='author',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=256),
+            preserve_default=False,
+        ),
+        migrations.RunPython(set_name_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='author',
+            name='name_key',
+            field=models.CharField(editable=False, max_length=256, unique=True),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.5 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_author_name_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['pages'], name='core_book_pages_idx'),
+        ),
+    ]
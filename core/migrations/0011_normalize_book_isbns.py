@@ -0,0 +1,81 @@
+import re
+import sys
+from collections import defaultdict
+
+from django.db import migrations
+from django.utils import timezone
+
+
+_SEPARATORS = re.compile(r'[\s-]+')
+
+
+def isbn13(first_twelve):
+    total = sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(first_twelve))
+    return f'{first_twelve}{(10 - total % 10) % 10}'
+
+
+def normalize_isbn(value):
+    """
+    ``core.isbn.normalize_isbn()`` as of this migration, copied so that later
+    changes to it don't change what this migration did. Returns ``None``
+    instead of raising for invalid numbers.
+    """
+    isbn = _SEPARATORS.sub('', str(value)).upper()
+    if isbn.startswith('ISBN'):
+        isbn = isbn[4:].lstrip(':')
+    if len(isbn) == 10 and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == 'X'):
+        total = sum((10 - position) * (10 if digit == 'X' else int(digit)) for position, digit in enumerate(isbn))
+        return isbn13(f'978{isbn[:9]}') if total % 11 == 0 else None
+    if len(isbn) == 13 and isbn.isdigit() and isbn[:3] in ('978', '979') and isbn13(isbn[:12]) == isbn:
+        return isbn
+    return None
+
+
+def normalize_isbns(apps, schema_editor):
+    """
+    Stores the ISBN-13 of every book stored under another form of its number.
+    Invalid numbers, and books whose numbers are forms of one ISBN, which is
+    unique, are left as they are and reported to be fixed by hand.
+    """
+    Book = apps.get_model('core', 'Book')
+    db_alias = schema_editor.connection.alias
+
+    stored = {}
+    books = defaultdict(list)
+    invalid = []
+    for book_id, isbn in Book.objects.using(db_alias).order_by('id').values_list('id', 'isbn').iterator():
+        stored[book_id] = isbn
+        normalized = normalize_isbn(isbn)
+        if normalized is None:
+            invalid.append(book_id)
+        else:
+            books[normalized].append(book_id)
+
+    now = timezone.now()
+    updates = []
+    collisions = []
+    for normalized, ids in books.items():
+        if len(ids) > 1:
+            collisions.append((normalized, ids))
+        elif stored[ids[0]] != normalized:
+            updates.append(Book(id=ids[0], isbn=normalized, updated_at=now))
+    Book.objects.using(db_alias).bulk_update(updates, ['isbn', 'updated_at'], batch_size=1000)
+
+    if invalid or collisions:
+        sys.stdout.write('\n')
+    for book_id in invalid:
+        sys.stdout.write(f'  Book #{book_id} has an invalid ISBN, {stored[book_id]!r}, left as it is.\n')
+    for normalized, ids in collisions:
+        books = ', '.join(f'#{book_id} ({stored[book_id]})' for book_id in ids)
+        sys.stdout.write(f'  Books {books} are all ISBN {normalized}; left as they are, merge them by hand.\n')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_book_pages_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_isbns, migrations.RunPython.noop),
+    ]
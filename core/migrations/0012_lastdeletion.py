@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_normalize_book_isbns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LastDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, unique=True)),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,17 +1,37 @@
 from datetime import date
 
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf.global_settings import LANGUAGES
 
 
 class Author(models.Model):
     name = models.CharField(max_length=256)
+    # ``core.authors.name_key(name)``, set on save; bulk inserts must fill it in.
+    name_key = models.CharField(max_length=256, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    def clean(self):
+        # The key isn't a form field, so model forms don't check its uniqueness.
+        from core.authors import name_key
+
+        self.name_key = name_key(self.name)
+        authors = Author.objects.filter(name_key=self.name_key)
+        if self.pk is not None:
+            authors = authors.exclude(pk=self.pk)
+        if authors.exists():
+            raise ValidationError({'name': 'An author with this name already exists.'})
+
+    class Meta:
+        indexes = [
+            # Latest change to any author, the Last-Modified of API reads.
+            models.Index(fields=['updated_at'], name='core_author_updated_at_idx'),
+        ]
+
 
 class Book(models.Model):
     title = models.CharField(max_length=256)
@@ -29,3 +49,127 @@ class Book(models.Model):
 
     class Meta:
         ordering = ('title', )
+        indexes = [
+            # Serves the default ordering and keyset pagination seeks on (title, id).
+            models.Index(fields=['title', 'id'], name='core_book_title_id_idx'),
+            # Language filters, alone or with a publication date range.
+            models.Index(fields=['language', 'pub_date'], name='core_book_lang_pub_date_idx'),
+            # Publication date ranges without a language.
+            models.Index(fields=['pub_date'], name='core_book_pub_date_idx'),
+            # Page count ranges and ordering of the book API.
+            models.Index(fields=['pages'], name='core_book_pages_idx'),
+            # Latest change to any book, the Last-Modified of API reads; also
+            # ?ordering=updated_at and the known ISBN refresh of core.isbn.
+            models.Index(fields=['updated_at'], name='core_book_updated_at_idx'),
+        ]
+
+
+class ImportJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    search_phrase = models.CharField(max_length=256)
+    max_results = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    fetched = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.search_phrase} ({self.status})'
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='core_importjob_status_idx'),
+        ]
+
+
+class CoverImage(models.Model):
+    """
+    Local copy of a cover image, fetched once per distinct ``Book.cover_url``
+    by ``core.covers`` and stored on disk under the SHA-256 ``digest`` of its
+    content.
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    source_url = models.URLField(unique=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    digest = models.CharField(max_length=64, blank=True)
+    content_type = models.CharField(max_length=50, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source_url} ({self.status})'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='core_coverimage_status_idx'),
+        ]
+
+
+class CatalogStat(models.Model):
+    """
+    Number of books per language, publication year or author, kept up to date
+    by ``core.stats`` on every write so reads cost one row per group.
+    """
+    LANGUAGE = 'language'
+    YEAR = 'year'
+    AUTHOR = 'author'
+    DIMENSIONS = (
+        (LANGUAGE, 'Language'),
+        (YEAR, 'Publication year'),
+        (AUTHOR, 'Author'),
+    )
+
+    dimension = models.CharField(max_length=10, choices=DIMENSIONS)
+    # Language code, four digit year or author id.
+    key = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.dimension} {self.key}: {self.count}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='core_catalogstat_dimension_key_uniq'),
+        ]
+
+
+class LastDeletion(models.Model):
+    """
+    When rows of ``model``, an app label and model name such as
+    ``core.book``, were last deleted; recorded by ``core.deletions``. A
+    deleted row leaves no ``updated_at`` behind, so this is what moves the
+    ``Last-Modified`` of a list forward.
+    """
+    model = models.CharField(max_length=100, unique=True)
+    deleted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.model}: {self.deleted_at}'
@@ -0,0 +1,94 @@
+"""
+Shared cache of rendered find-book results.
+
+Entries are keyed on the search parameters, as cleaned by
+``BookFilterMixin.clean_params()``, the page and a generation number. Every
+change to books or authors bumps the generation (see ``core.signals``), which
+retires all entries at once; orphaned entries simply expire after
+``FIND_BOOK_CACHE_TIMEOUT`` seconds. Writes that bypass model
+signals (``bulk_create``, ``bulk_update``) call ``invalidate()`` themselves.
+Pages are filled from the primary, never from a replica that may not have
+replayed the write behind the current generation yet.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+GENERATION_KEY = 'find_book:generation'
+
+
+def get_cache():
+    return caches[getattr(settings, 'FIND_BOOK_CACHE_ALIAS', 'find_book')]
+
+
+def get_timeout():
+    return getattr(settings, 'FIND_BOOK_CACHE_TIMEOUT', 60 * 60)
+
+
+def get_generation(cache=None):
+    cache = cache or get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # A fresh counter starts from the clock, so a counter lost to culling
+        # never comes back with a generation that old entries were stored under.
+        generation = time.time_ns()
+        if not cache.add(GENERATION_KEY, generation, timeout=None):
+            generation = cache.get(GENERATION_KEY, 0)
+    return generation
+
+
+def bump_generation():
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+class PendingBump:
+    """Shared by the on-commit callbacks queued since the last bump; only the first to run bumps."""
+    done = False
+
+    def run(self):
+        if not self.done:
+            self.done = True
+            bump_generation()
+
+
+def invalidate(using=None):
+    """
+    Bumps the generation once the current transaction commits, or right away
+    outside of one. Each call queues its own callback, so those of a rolled
+    back savepoint are dropped without losing the others, but the callbacks
+    queued since the last bump share one ``PendingBump``: deleting many rows
+    (one signal each) costs a single bump.
+    """
+    connection = transaction.get_connection(using)
+    pending = getattr(connection, 'page_cache_pending_bump', None)
+    if pending is None or pending.done:
+        pending = connection.page_cache_pending_bump = PendingBump()
+    transaction.on_commit(pending.run, using=using)
+
+
+def lookup(params):
+    """
+    Returns ``(key, entry)`` for the page described by ``params``, the cleaned
+    filters plus the ``page`` or ``cursor``; ``entry`` is ``None`` on a miss and
+    ``key`` is ``None`` when caching is switched off.
+    """
+    if get_timeout() <= 0:
+        return None, None
+    cache = get_cache()
+    digest = hashlib.sha1(urlencode(sorted(params.items())).encode()).hexdigest()
+    key = f'find_book:page:{get_generation(cache)}:{digest}'
+    return key, cache.get(key)
+
+
+def store(key, entry):
+    if key is not None:
+        get_cache().set(key, entry, timeout=get_timeout())
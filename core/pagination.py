@@ -0,0 +1,286 @@
+"""
+Keyset (cursor) pagination, and page-number pagination with estimated counts.
+
+Pages are addressed by an opaque cursor holding the ordering key of the last
+(or first) row of the previous page, so fetching any page is a single indexed
+range scan of ``per_page + 1`` rows - no ``OFFSET`` and no ``COUNT(*)``.
+
+Where page numbers are needed (the admin, the author API, old find-book
+links), ``EstimatedCountPaginator`` replaces the exact ``COUNT(*)`` of large,
+unfiltered tables with the row estimate the database keeps for its planner.
+"""
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import EmptyPage, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, router
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorSerializer(signing.JSONSerializer):
+    """Signing serializer that also handles dates and decimals in cursor keys."""
+    def dumps(self, obj):
+        return DjangoJSONEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+
+class KeysetPage:
+    """A single page of results, iterable like a ``django.core.paginator.Page``."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginates ``queryset`` by its ordering key. The ordering defaults to the
+    queryset's own ordering (or the model's ``Meta.ordering``) with the primary
+    key appended as a tiebreaker, so every row has a unique position. The
+    tiebreaker sorts the same way as the last column, so a descending order
+    walks an index on ``(column, id)`` backwards instead of sorting.
+    """
+    salt = 'core.pagination.cursor'
+
+    def __init__(self, queryset, per_page, ordering=None):
+        ordering = list(ordering or queryset.query.order_by or queryset.model._meta.ordering)
+        ordering = ['id' if field == 'pk' else field for field in ordering]
+        if 'id' not in ordering and '-id' not in ordering:
+            ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+        self.ordering = ordering
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = int(per_page)
+
+    def get_page(self, cursor=None):
+        """Returns the page at ``cursor``, or the first page if the cursor is missing or invalid."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._build_page(list(self.queryset[:self.per_page + 1]), first=True)
+
+        key, backwards = self.decode_cursor(cursor)
+        queryset = self.queryset.filter(self._after(key, reverse=backwards))
+        if backwards:
+            queryset = queryset.reverse()
+        rows = list(queryset[:self.per_page + 1])
+
+        if not backwards:
+            return self._build_page(rows, first=False)
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(self._key(rows[-1])) if rows else None,
+            previous_cursor=self.encode_cursor(self._key(rows[0]), backwards=True) if rows and has_more else None,
+        )
+
+    def _build_page(self, rows, first):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(self._key(rows[-1])) if has_more else None,
+            previous_cursor=self.encode_cursor(self._key(rows[0]), backwards=True) if rows and not first else None,
+        )
+
+    def encode_cursor(self, key, backwards=False):
+        return signing.dumps([key, backwards], salt=self.salt, serializer=CursorSerializer, compress=True)
+
+    def decode_cursor(self, cursor):
+        try:
+            key, backwards = signing.loads(cursor, salt=self.salt)
+        except (signing.BadSignature, ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if not isinstance(key, list) or len(key) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        return key, bool(backwards)
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return [obj[field.lstrip('-')] for field in self.ordering]
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def _after(self, key, reverse=False):
+        """
+        Builds ``(a, b, c) > (x, y, z)`` as ``a >= x AND (a > x OR (a = x AND b > y) OR ...)``.
+        The leading range condition lets the database seek an index on the first column.
+        """
+        fields = [(field.lstrip('-'), field.startswith('-') != reverse) for field in self.ordering]
+        condition = Q()
+        for position, (field, descending) in enumerate(fields):
+            step = Q(**{f'{field}__{"lt" if descending else "gt"}': key[position]})
+            for previous, (previous_field, _) in enumerate(fields[:position]):
+                step &= Q(**{previous_field: key[previous]})
+            condition |= step
+        first_field, descending = fields[0]
+        return Q(**{f'{first_field}__{"lte" if descending else "gte"}': key[0]}) & condition
+
+
+class KeysetPagination(BasePagination):
+    """Django REST framework adapter for ``KeysetPaginator``."""
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.page_size, ordering=self.ordering)
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound('Invalid cursor.')
+        return list(self.page)
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.page.next_cursor)
+
+    def get_previous_link(self):
+        if not self.page.has_previous():
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
+
+
+def estimated_count(model, using=None):
+    """
+    Returns the planner's estimate of the number of rows in ``model``'s table,
+    or ``None`` if the database has none: SQLite before the first ``ANALYZE``,
+    PostgreSQL before the first ``VACUUM``/``ANALYZE`` or other backends.
+    """
+    connection = connections[using or router.db_for_read(model)]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                # One row per index, each starting with its number of entries.
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+                counts = [int(stat.split()[0]) for stat, in cursor.fetchall() if stat]
+                return max(counts) if counts else None
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+                row = cursor.fetchone()
+                return row[0] if row and row[0] >= 0 else None
+    except DatabaseError:
+        # No sqlite_stat1 table yet.
+        return None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    ``Paginator`` that takes the count of an unfiltered queryset from
+    ``estimated_count()`` once the estimate reaches
+    ``ESTIMATED_COUNT_THRESHOLD`` rows, instead of counting every row.
+    Filtered querysets, and tables small enough for ``COUNT(*)`` to be cheap,
+    are counted exactly. The estimate is off by the rows written since the
+    planner's statistics were last gathered, so pages past it can still be
+    requested by number and are only empty at the real end of the table.
+    """
+
+    @cached_property
+    def estimated(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct or query.combinator or query.is_sliced:
+            return None
+        estimate = estimated_count(self.object_list.model, self.object_list.db)
+        if estimate is None or estimate < getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 100000):
+            return None
+        return estimate
+
+    @cached_property
+    def count(self):
+        if self.estimated is not None:
+            return self.estimated
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.estimated is None or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.estimated is None:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        return self._get_page(object_list, number, self)
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            # Past the real end of an overestimated table: count exactly to find the last page.
+            self.__dict__.update(estimated=None)
+            self.__dict__.pop('count', None)
+            self.__dict__.pop('num_pages', None)
+            return super().get_page(number)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """``PageNumberPagination`` counting through ``EstimatedCountPaginator``."""
+    django_paginator_class = EstimatedCountPaginator
@@ -0,0 +1,91 @@
+"""
+Query plan checks.
+
+``capture_statements`` collects the SQL a block of code runs, ``explain``
+asks the database how it would execute a statement and ``full_scans`` reads
+the plan for tables that are read from start to end without an index.
+"""
+import re
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+# SQLite >= 3.36 prints "SCAN core_book", older versions "SCAN TABLE core_book".
+# A scan "USING INDEX" walks the whole table in index order; only scans of
+# a covering index (e.g. for COUNT) stay inside the index.
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING INDEX \w+)?$')
+_POSTGRES_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+_LIMIT_RE = re.compile(r'\bLIMIT \d+(?: OFFSET \d+)?$')
+
+
+class StatementRecorder:
+    """Execute wrapper collecting ``(alias, sql, params)`` of every executed statement."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.statements.append((self.alias, sql, params))
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def capture_statements(using=None):
+    """Yields a list filled with ``(alias, sql, params)`` of the statements run in the block."""
+    statements = []
+    recorders = [StatementRecorder(alias) for alias in (using or list(connections))]
+    with ExitStack() as stack:
+        for recorder in recorders:
+            stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+        yield statements
+        for recorder in recorders:
+            statements.extend(recorder.statements)
+
+
+def explain(connection, sql, params):
+    """Returns the lines of the query plan of ``sql``."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def outer_sql(sql):
+    """``sql`` without anything inside parentheses, such as subqueries in the select list."""
+    depth = 0
+    kept = []
+    for char in sql:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0:
+            kept.append(char)
+    return ''.join(kept)
+
+
+def full_scans(connection, sql, plan, tables):
+    """
+    Returns the names of ``tables`` the plan reads in full. A SQLite table
+    scan is tolerated for statements ending with ``LIMIT`` that are
+    unfiltered, outside of their subqueries, and need no sorting, since those
+    stop after the first rows.
+    """
+    scanned = []
+    if connection.vendor == 'sqlite':
+        outer = outer_sql(sql)
+        early_exit = (_LIMIT_RE.search(outer.strip()) and ' WHERE ' not in outer
+                      and not any('TEMP B-TREE' in line for line in plan))
+        for line in plan:
+            match = _SQLITE_SCAN_RE.match(line.strip())
+            if match and match.group(1) in tables and not early_exit:
+                scanned.append(match.group(1))
+    else:
+        for line in plan:
+            scanned.extend(table for table in _POSTGRES_SCAN_RE.findall(line) if table in tables)
+    return scanned
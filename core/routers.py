@@ -0,0 +1,79 @@
+"""
+Routing of reads to the read replicas in ``REPLICA_DATABASES``.
+
+``ReplicaRoutingMiddleware`` opens a ``RoutingState`` for every request.
+Reads only go to a replica within GET, HEAD and OPTIONS requests, and only
+until the request writes, outside of atomic blocks and for clients that
+haven't written in the last ``REPLICA_PIN_SECONDS``. Everything else,
+including code running outside of requests, reads from the primary, so
+clients always see their own writes despite replication lag.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Models of the database cache backend. The cache stays on the primary, where
+# it's written, and filling it isn't a write that needs pinning.
+CACHE_APP_LABEL = 'django_cache'
+
+
+@dataclass
+class RoutingState:
+    use_replicas: bool
+    wrote: bool = False
+
+
+# A mutable state, so that writes in threads running sync_to_async() code are seen by the request.
+_state = ContextVar('replica_routing_state', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+@contextmanager
+def routing(use_replicas):
+    """Routes the reads of the block to the replicas, if ``use_replicas``, until it writes."""
+    state = RoutingState(use_replicas)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _state.get()
+        replicas = get_replicas()
+        if (state is None or not state.use_replicas or state.wrote or not replicas
+                or model._meta.app_label == CACHE_APP_LABEL or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label != CACHE_APP_LABEL:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        if db in get_replicas():
+            return False
+        return None
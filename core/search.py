@@ -0,0 +1,254 @@
+"""
+Full-text book search.
+
+SQLite databases get an FTS5 table (``core_book_fts``) holding the title and
+author name of every book, kept in sync by triggers on ``core_book`` and
+``core_author``, so every write path (forms, API, bulk inserts) is covered.
+PostgreSQL uses expression GIN indexes on ``to_tsvector`` and ``pg_trgm``
+instead, which the database maintains by itself. Any other backend falls
+back to case-insensitive ``LIKE`` matching.
+"""
+import re
+import sqlite3
+from functools import lru_cache
+
+from django.db import connections, router
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from core.models import Book
+
+
+FTS_TABLE = 'core_book_fts'
+
+SEARCH_FIELDS = ('title', 'author')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_book_fts_ai AFTER INSERT ON core_book BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, author)
+        SELECT new.id, new.title, core_author.name FROM core_author WHERE core_author.id = new.author_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_book_fts_ad AFTER DELETE ON core_book BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_book_fts_au AFTER UPDATE OF title, author_id ON core_book BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, author)
+        SELECT new.id, new.title, core_author.name FROM core_author WHERE core_author.id = new.author_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_author_fts_au AFTER UPDATE OF name ON core_author BEGIN
+        UPDATE {FTS_TABLE} SET author = new.name
+        WHERE rowid IN (SELECT id FROM core_book WHERE author_id = new.id);
+    END
+    """,
+)
+
+POSTGRES_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS core_book_title_tsv ON core_book "
+    "USING gin (to_tsvector('simple', title))",
+    "CREATE INDEX IF NOT EXISTS core_author_name_tsv ON core_author "
+    "USING gin (to_tsvector('simple', name))",
+    "CREATE INDEX IF NOT EXISTS core_book_title_trgm ON core_book USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS core_author_name_trgm ON core_author USING gin (name gin_trgm_ops)",
+)
+
+
+@lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    """Checks whether the linked SQLite library was compiled with FTS5."""
+    with sqlite3.connect(':memory:') as conn:
+        options = {row[0] for row in conn.execute('PRAGMA compile_options')}
+    return 'ENABLE_FTS5' in options
+
+
+def backend_for(connection):
+    """Returns the name of the search backend used for the given connection."""
+    if connection.vendor == 'sqlite' and sqlite_has_fts5():
+        return 'fts5'
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    return 'like'
+
+
+def create_index(schema_editor):
+    """Creates the search index for the database behind ``schema_editor``."""
+    backend = backend_for(schema_editor.connection)
+    if backend == 'fts5':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(title, author, tokenize='unicode61 remove_diacritics 2')"
+        )
+        create_triggers(schema_editor)
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, author) "
+            "SELECT core_book.id, core_book.title, core_author.name "
+            "FROM core_book INNER JOIN core_author ON core_author.id = core_book.author_id"
+        )
+    elif backend == 'postgres':
+        for statement in POSTGRES_INDEXES:
+            schema_editor.execute(statement)
+
+
+def create_triggers(schema_editor):
+    """
+    (Re)creates the FTS5 sync triggers. Django rebuilds SQLite tables on most
+    ALTER operations, which drops their triggers, so migrations altering
+    ``core_book`` or ``core_author`` must call this again.
+    """
+    if backend_for(schema_editor.connection) == 'fts5':
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def drop_triggers(schema_editor):
+    """
+    Drops the FTS5 sync triggers. SQLite refuses to rename a rebuilt
+    ``core_author`` into place while triggers on ``core_book`` refer to it, so
+    migrations altering it drop them first and call ``create_triggers()`` after.
+    """
+    if backend_for(schema_editor.connection) == 'fts5':
+        for trigger in ('core_book_fts_ai', 'core_book_fts_ad', 'core_book_fts_au', 'core_author_fts_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+
+def drop_index(schema_editor):
+    backend = backend_for(schema_editor.connection)
+    if backend == 'fts5':
+        drop_triggers(schema_editor)
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif backend == 'postgres':
+        for index in ('core_book_title_tsv', 'core_author_name_tsv', 'core_book_title_trgm', 'core_author_name_trgm'):
+            schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+
+
+def tokenize(text):
+    """Splits search text into lower-cased word tokens."""
+    return [token.lower() for token in _TOKEN_RE.findall(text or '')]
+
+
+def _fts5_query(criteria):
+    # Every token is quoted so user input can't inject FTS5 syntax, and
+    # suffixed with '*' to make it a prefix match.
+    return ' AND '.join(
+        '{%s} : (%s)' % (' '.join(fields), ' '.join('"%s"*' % token.replace('"', '""') for token in tokens))
+        for tokens, fields in criteria
+    )
+
+
+def _tsquery(token):
+    # Tokens only hold word characters, so they can't carry tsquery operators.
+    return f'{token}:*'
+
+
+class BookSearch:
+    """
+    Ranked, multi-word, prefix and case-insensitive matching of books.
+
+    ``text`` is matched against both the title and the author name, ``title``
+    and ``author`` only against their own field. Every token of every given
+    criterion has to match, so all of them are combined with AND.
+    """
+
+    def __init__(self, text=None, title=None, author=None):
+        self.criteria = [
+            (tokens, fields)
+            for tokens, fields in (
+                (tokenize(text), SEARCH_FIELDS),
+                (tokenize(title), ('title', )),
+                (tokenize(author), ('author', )),
+            )
+            if tokens
+        ]
+
+    def __bool__(self):
+        return bool(self.criteria)
+
+    def filter(self, queryset):
+        """Narrows ``queryset`` to matching books and annotates them with ``rank``."""
+        if not self.criteria:
+            return queryset
+        backend = backend_for(connections[queryset.db])
+        return getattr(self, f'_filter_{backend}')(queryset)
+
+    def apply(self, queryset):
+        """Same as ``filter`` but also orders the books by relevance (best first)."""
+        if not self.criteria:
+            return queryset
+        return self.filter(queryset).order_by('rank', 'title', 'id')
+
+    def exists(self, using=None):
+        """
+        Cheap index-only check whether anything matches at all, on ``using``
+        or else the database the router sends book reads to.
+        """
+        if not self.criteria:
+            return False
+        using = using or router.db_for_read(Book)
+        connection = connections[using]
+        if backend_for(connection) == 'fts5':
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT 1',
+                               [_fts5_query(self.criteria)])
+                return cursor.fetchone() is not None
+        return self.filter(Book.objects.using(using)).exists()
+
+    def _filter_fts5(self, queryset):
+        match = _fts5_query(self.criteria)
+        # bm25() is negative and lower is better, so ascending order ranks best first.
+        rank = RawSQL(
+            f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = core_book.id',
+            [match],
+            output_field=FloatField(),
+        )
+        ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        return queryset.filter(id__in=ids).annotate(rank=rank)
+
+    def _filter_postgres(self, queryset):
+        condition = Q()
+        for tokens, fields in self.criteria:
+            for token in tokens:
+                token_condition = Q()
+                if 'title' in fields:
+                    token_condition |= Q(id__in=RawSQL(
+                        "SELECT id FROM core_book WHERE to_tsvector('simple', title) @@ to_tsquery('simple', %s)",
+                        [_tsquery(token)],
+                    ))
+                if 'author' in fields:
+                    token_condition |= Q(author_id__in=RawSQL(
+                        "SELECT id FROM core_author WHERE to_tsvector('simple', name) @@ to_tsquery('simple', %s)",
+                        [_tsquery(token)],
+                    ))
+                condition &= token_condition
+        tokens = [token for tokens, fields in self.criteria for token in tokens]
+        # ts_rank grows with relevance; negate it so ascending order ranks best first,
+        # and let trigram similarity of the whole phrase break ties.
+        rank = RawSQL(
+            "-(ts_rank(to_tsvector('simple', core_book.title), to_tsquery('simple', %s)) "
+            "+ similarity(core_book.title, %s))",
+            [' | '.join(_tsquery(token) for token in tokens), ' '.join(tokens)],
+            output_field=FloatField(),
+        )
+        return queryset.filter(condition).annotate(rank=rank)
+
+    def _filter_like(self, queryset):
+        condition = Q()
+        for tokens, fields in self.criteria:
+            for token in tokens:
+                token_condition = Q()
+                if 'title' in fields:
+                    token_condition |= Q(title__icontains=token)
+                if 'author' in fields:
+                    token_condition |= Q(author__name__icontains=token)
+                condition &= token_condition
+        return queryset.filter(condition).annotate(rank=RawSQL('0', [], output_field=FloatField()))
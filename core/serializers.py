@@ -1,15 +1,151 @@
+from django.db import models
+from django.urls import reverse
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from core.authors import name_key
+from core.isbn import INVALID_MESSAGE, normalize_isbn
 from core.models import Book, Author
 
 
 class AuthorSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Author
-        fields = '__all__'
+        exclude = ('name_key', )
+
+    def validate_name(self, value):
+        authors = Author.objects.filter(name_key=name_key(value))
+        if self.instance is not None:
+            authors = authors.exclude(pk=self.instance.pk)
+        if authors.exists():
+            raise ValidationError('An author with this name already exists.')
+        return value
+
+
+class ISBNField(serializers.CharField):
+    """Accepts ISBN-10 and ISBN-13 numbers, with separators, and returns the ISBN-13."""
+    default_error_messages = {
+        'invalid_isbn': INVALID_MESSAGE,
+    }
+
+    def to_internal_value(self, data):
+        try:
+            return normalize_isbn(super().to_internal_value(data))
+        except DjangoValidationError:
+            self.fail('invalid_isbn')
 
 
-class BookSerializer(serializers.HyperlinkedModelSerializer):
+class ISBNFieldMixin:
+    """Builds the ``isbn`` field as an ``ISBNField``, with the validators generated for the model field."""
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if field_name == 'isbn':
+            field_class = ISBNField
+        return field_class, field_kwargs
+
+
+class BookSerializer(ISBNFieldMixin, serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Book
         fields = '__all__'
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer producing the same output as the hyperlinked model
+    serializers straight from ``.values()`` rows. URLs are built from templates
+    reversed once per request instead of once per object, and only the columns
+    of the requested (``?fields=``) fields are selected.
+    """
+    model = None
+    view_name = None
+    # Model fields left out of the output.
+    exclude = ()
+    # Hyperlinked relations: field name -> (column holding the pk, view name).
+    related = {}
+
+    def __init__(self, request, fields=None):
+        self.request = request
+        self.fields = self.get_fields(fields)
+        self._url_templates = {}
+        self._formatters = {}
+        for field in self.fields:
+            if field == 'url':
+                self._url_templates[field] = ('id', self._url_template(self.view_name))
+            elif field in self.related:
+                column, view_name = self.related[field]
+                self._url_templates[field] = (column, self._url_template(view_name))
+            else:
+                self._formatters[field] = self._formatter(self.model._meta.get_field(field))
+
+    @classmethod
+    def all_fields(cls):
+        # Same order as ModelSerializer: the url, plain fields, then relations.
+        fields = [field for field in cls.model._meta.concrete_fields
+                  if field.name != 'id' and field.name not in cls.exclude]
+        return (['url'] + [field.name for field in fields if not field.is_relation]
+                + [field.name for field in fields if field.is_relation])
+
+    @classmethod
+    def get_fields(cls, fields):
+        """Validates a ``?fields=`` value, ``None`` meaning all fields."""
+        if not fields:
+            return cls.all_fields()
+        requested = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in requested if field not in cls.all_fields()]
+        if unknown:
+            raise ValidationError({'fields': [f'Unknown field: {field}' for field in unknown]})
+        return list(dict.fromkeys(requested))
+
+    @property
+    def columns(self):
+        """Database columns ``.values()`` has to select for the requested fields."""
+        columns = [column for column, template in self._url_templates.values()]
+        columns += list(self._formatters)
+        return list(dict.fromkeys(columns))
+
+    def to_representation(self, row):
+        data = {}
+        for field in self.fields:
+            if field in self._url_templates:
+                column, (prefix, suffix) = self._url_templates[field]
+                data[field] = f'{prefix}{row[column]}{suffix}'
+            else:
+                data[field] = self._formatters[field](row[field])
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+    def _url_template(self, view_name):
+        url = reverse(view_name, kwargs={'pk': '__pk__'})
+        if self.request is not None:
+            url = self.request.build_absolute_uri(url)
+        return tuple(url.split('__pk__'))
+
+    @staticmethod
+    def _formatter(model_field):
+        if isinstance(model_field, models.DateTimeField):
+            field = serializers.DateTimeField()
+        elif isinstance(model_field, models.DateField):
+            field = serializers.DateField()
+        else:
+            return lambda value: value
+        return lambda value: None if value is None else field.to_representation(value)
+
+
+class AuthorValuesSerializer(ValuesSerializer):
+    model = Author
+    view_name = 'author-detail'
+    exclude = ('name_key', )
+
+
+class BookValuesSerializer(ValuesSerializer):
+    model = Book
+    view_name = 'book-detail'
+    related = {
+        'author': ('author_id', 'author-detail'),
+    }
@@ -0,0 +1,54 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import deletions, page_cache, stats
+from core.authors import name_key
+from core.instrumentation import install_dispatcher
+from core.models import Author, Book
+
+
+connection_created.connect(install_dispatcher)
+
+
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_find_book_cache(sender, using, **kwargs):
+    page_cache.invalidate(using)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+def record_deletion(sender, using, **kwargs):
+    deletions.record(sender, using)
+
+
+@receiver(pre_save, sender=Author)
+def set_author_name_key(sender, instance, raw, **kwargs):
+    if not raw:
+        instance.name_key = name_key(instance.name)
+
+
+@receiver(pre_save, sender=Book)
+def remember_book_stats_keys(sender, instance, raw, using, **kwargs):
+    instance._stats_previous = None
+    if instance.pk is not None and not raw:
+        previous = (Book.objects.using(using).filter(pk=instance.pk)
+                    .values_list('language', 'pub_date', 'author_id').first())
+        if previous is not None:
+            instance._stats_previous = stats.book_keys(*previous)
+
+
+@receiver(post_save, sender=Book)
+def update_stats_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    delta = stats.count_books([instance])
+    for key in getattr(instance, '_stats_previous', None) or ():
+        delta[key] -= 1
+    stats.record(delta)
+
+
+@receiver(post_delete, sender=Book)
+def update_stats_on_delete(sender, instance, **kwargs):
+    stats.record(stats.count_books([instance], sign=-1))
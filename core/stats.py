@@ -0,0 +1,118 @@
+"""
+Incrementally maintained catalog statistics.
+
+``CatalogStat`` holds the number of books per language, publication year and
+author. Model signals (see ``core.signals``) record the change of every saved
+or deleted book; bulk write paths, which send no signals, call ``record()``
+with the change of the whole batch. Changes are applied inside the writing
+transaction as a handful of ``count = count + n`` updates, so concurrent
+writers never lose an increment. ``rebuild()`` recomputes the table from
+scratch.
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import ExtractYear
+
+from core.models import Book, CatalogStat
+
+
+_local = threading.local()
+
+
+def _year(pub_date):
+    # Instances created with a string date keep it until they are reloaded.
+    return str(pub_date.year if hasattr(pub_date, 'year') else int(str(pub_date)[:4]))
+
+
+def book_keys(language, pub_date, author_id):
+    return (
+        (CatalogStat.LANGUAGE, language),
+        (CatalogStat.YEAR, _year(pub_date)),
+        (CatalogStat.AUTHOR, str(author_id)),
+    )
+
+
+def count_books(books, sign=1):
+    """Returns the change of the statistics when ``books`` are added (``sign=-1``: removed)."""
+    delta = Counter()
+    for book in books:
+        for key in book_keys(book.language, book.pub_date, book.author_id):
+            delta[key] += sign
+    return delta
+
+
+def apply(delta):
+    """Adds ``{(dimension, key): amount}`` to the stored counts."""
+    delta = {key: amount for key, amount in delta.items() if amount}
+    if not delta:
+        return
+
+    keys = defaultdict(list)
+    for dimension, key in delta:
+        keys[dimension].append(key)
+    query = Q()
+    for dimension, dimension_keys in keys.items():
+        query |= Q(dimension=dimension, key__in=dimension_keys)
+    existing = set(CatalogStat.objects.filter(query).values_list('dimension', 'key'))
+    CatalogStat.objects.bulk_create(
+        [CatalogStat(dimension=dimension, key=key) for dimension, key in delta if (dimension, key) not in existing],
+        ignore_conflicts=True,
+    )
+
+    # One UPDATE per distinct amount; in a typical batch most groups change by the same few amounts.
+    groups = defaultdict(lambda: defaultdict(list))
+    for (dimension, key), amount in delta.items():
+        groups[amount][dimension].append(key)
+    for amount, amount_keys in groups.items():
+        query = Q()
+        for dimension, dimension_keys in amount_keys.items():
+            query |= Q(dimension=dimension, key__in=dimension_keys)
+        CatalogStat.objects.filter(query).update(count=F('count') + amount)
+
+
+def record(delta):
+    """Applies ``delta`` now, or at the end of the enclosing ``batch()``."""
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.update(delta)
+    else:
+        apply(delta)
+
+
+@contextmanager
+def batch():
+    """
+    Collects the changes recorded in the block, e.g. one per book deleted by
+    a queryset ``delete()``, and applies them together when it ends.
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+    _local.pending = Counter()
+    try:
+        yield
+        pending = _local.pending
+    finally:
+        _local.pending = None
+    apply(pending)
+
+
+def rebuild():
+    """Recomputes every statistic from the books table."""
+    groups = (
+        (CatalogStat.LANGUAGE, Book.objects.values_list('language')),
+        (CatalogStat.YEAR, Book.objects.annotate(year=ExtractYear('pub_date')).values_list('year')),
+        (CatalogStat.AUTHOR, Book.objects.values_list('author_id')),
+    )
+    with transaction.atomic():
+        CatalogStat.objects.all().delete()
+        for dimension, values in groups:
+            rows = values.annotate(count=Count('id')).order_by()
+            CatalogStat.objects.bulk_create(
+                CatalogStat(dimension=dimension, key=str(key), count=count) for key, count in rows
+            )
+    return CatalogStat.objects.count()
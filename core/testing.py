@@ -0,0 +1,26 @@
+"""Helpers for the test suite."""
+from contextlib import contextmanager
+
+from core.instrumentation import record_queries
+
+
+class QueryBudgetMixin:
+    """Adds query budget assertions to a ``TestCase``."""
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, allow_duplicates=False):
+        """
+        Fails when the block runs more than ``max_queries`` queries or, unless
+        ``allow_duplicates`` is set, repeats a query shape (a likely N+1).
+        """
+        with record_queries() as recorder:
+            yield recorder
+
+        executed = '\n'.join(sql for sql, duration in recorder.queries)
+        self.assertLessEqual(
+            recorder.count, max_queries,
+            f'{recorder.count} queries executed, budget is {max_queries}:\n{executed}',
+        )
+        if not allow_duplicates:
+            duplicates = recorder.duplicates()
+            self.assertFalse(duplicates, f'Repeated queries (possible N+1): {duplicates}')
@@ -9,13 +9,18 @@ schema_view = get_schema_view(title='Test API')
 router = routers.DefaultRouter()
 router.register(r'books', views.BookViewSet)
 router.register(r'author', views.AuthorViewSet)
+router.register(r'stats', views.CatalogStatsViewSet, basename='stats')
 
 
 urlpatterns = [
     path('', views.HomeView.as_view(), name='home'),
     path('add-book', views.AddBookView.as_view(), name='add-book'),
+    path('authors/autocomplete', views.AuthorAutocompleteView.as_view(), name='author-autocomplete'),
+    path('covers/<slug:digest>/<slug:size>', views.CoverView.as_view(), name='cover'),
     path('find-book', views.FindBookView.as_view(), name='find-book'),
+    path('find-book/export', views.BookExportView.as_view(), name='export-books'),
     path('import-book', views.ImportBookView.as_view(), name='import-book'),
+    path('import-jobs/<int:pk>', views.ImportJobView.as_view(), name='import-job'),
     path('update-book/<int:pk>', views.BookUpdateView.as_view(), name='update-book'),
 
     path('api/', include(router.urls)),
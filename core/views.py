@@ -1,16 +1,46 @@
-import requests
-from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.core.paginator import Paginator
-from django.db import IntegrityError
-from django.shortcuts import render
+import asyncio
+import hashlib
+import json
+from calendar import timegm
+from contextlib import nullcontext
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Subquery
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import cache_control
 from django.views.generic import TemplateView, View, UpdateView
 from django.contrib import messages
-from rest_framework import viewsets
-
-from core.forms import AddBookForm
-from core.models import Author, Book
-from core.serializers import BookSerializer, AuthorSerializer
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core import bulk, covers, deletions, export, page_cache
+from core.authors import name_key
+from core.filters import BookFilter, IndexedOrderingFilter
+from core.forms import AddBookForm, BookUpdateForm
+from core.google_books import MAX_PAGE_SIZE
+from core.isbn import normalize_isbn
+from core.jobs import submit_import, submit_import_async
+from core.models import Author, Book, CatalogStat, ImportJob
+from core.pagination import (EstimatedCountPagination, EstimatedCountPaginator, KeysetPage, KeysetPaginator,
+                             KeysetPagination)
+from core.routers import routing
+from core.search import BookSearch
+from core.serializers import AuthorSerializer, AuthorValuesSerializer, BookSerializer, BookValuesSerializer
 
 
 class HomeView(TemplateView):
@@ -19,7 +49,7 @@ class HomeView(TemplateView):
 
 class BookUpdateView(UpdateView):
     model = Book
-    fields = ['title', 'author', 'isbn', 'pages', 'cover_url', 'language', 'pub_date']
+    form_class = BookUpdateForm
     template_name = 'update_book.html'
 
     def get_success_url(self):
@@ -27,27 +57,64 @@ class BookUpdateView(UpdateView):
         return reverse('update-book', kwargs={'pk': self.object.id})
 
 
-class FindBookView(View):
-    """Allows users to search for books by given parameters."""
-    def get(self, request):
-        title = request.GET.get('title')
-        author = request.GET.get('author')
-        language = request.GET.get('language')
-        from_date = request.GET.get('from_date')
-        to_date = request.GET.get('to_date')
+class BookFilterMixin:
+    """
+    Builds the book queryset for the find-book parameters: ``q`` searches titles
+    and author names at once, ``title`` and ``author`` search a single field,
+    ``language``, ``from_date`` and ``to_date`` narrow the results down.
+    """
+    filter_params = ('q', 'title', 'author', 'language', 'from_date', 'to_date')
+    # Text searches ignore case, so their spelling variants are one search.
+    case_insensitive_params = ('q', 'title', 'author')
+
+    def clean_params(self, params):
+        """
+        Returns the given filter parameters with their whitespace collapsed and
+        text searches lower-cased. Both the queryset and the page cache key are
+        built from this dict, so requests sharing a cache entry show the same rows.
+        """
+        cleaned = {}
+        for name in self.filter_params:
+            value = ' '.join((params.get(name) or '').split())
+            if value:
+                cleaned[name] = value.lower() if name in self.case_insensitive_params else value
+        return cleaned
+
+    def date_errors(self, params):
+        """
+        Returns the error of each date in ``params`` that isn't a valid
+        ``YYYY-MM-DD`` date, checked like the book API checks its filters.
+        """
+        errors = {}
+        for name in ('from_date', 'to_date'):
+            if name in params:
+                try:
+                    BookFilter.parse_date(params[name])
+                except ValidationError as error:
+                    errors[name] = str(error.detail[0])
+        return errors
+
+    def filter_books(self, params):
+        """
+        Returns the books matching ``params``, as cleaned by ``clean_params()``,
+        whether any filter was given and whether the searched author exists. An
+        unknown author is left out of the search.
+        """
+        text = params.get('q')
+        title = params.get('title')
+        author = params.get('author')
+        language = params.get('language')
+        from_date = params.get('from_date')
+        to_date = params.get('to_date')
 
         filter_dict = {}
+        author_found = True
 
-        if self.is_valid_queryparam(title):
-            filter_dict['title'] = title
+        if self.is_valid_queryparam(author) and not BookSearch(author=author).exists():
+            author_found = False
+            author = None
 
-        if self.is_valid_queryparam(author):
-            try:
-                author_id = Author.objects.get(name=author)
-            except ObjectDoesNotExist:
-                messages.info(request, 'Author has not been found.')
-            else:
-                filter_dict['author'] = author_id
+        search = BookSearch(text=text, title=title, author=author)
 
         if self.is_valid_queryparam(language):
             filter_dict['language'] = language
@@ -58,33 +125,136 @@ class FindBookView(View):
         if self.is_valid_queryparam(to_date):
             filter_dict['pub_date__lt'] = to_date
 
-        if filter_dict:
-            queryset = Book.objects.filter(**filter_dict)
-        else:
-            messages.info(request, 'Please find list of all books down below.')
-            queryset = Book.objects.all()
+        if filter_dict or search:
+            queryset = search.apply(Book.objects.select_related('author').filter(**filter_dict))
+            return queryset, True, author_found
+        return Book.objects.select_related('author'), False, author_found
 
-        paginator = Paginator(queryset, 10)
-        page_number = request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
+    @staticmethod
+    def is_valid_queryparam(param):
+        return param != '' and param is not None
 
-        context = {
-            'queryset': queryset,
-            'page_obj': page_obj,
-        }
+
+class FindBookView(BookFilterMixin, View):
+    """
+    Allows users to search for books by given parameters.
+    Text searches match partial, multi-word phrases and are ranked by relevance.
+    """
+    def get(self, request):
+        filters = self.clean_params(request.GET)
+        errors = self.date_errors(filters)
+        if errors:
+            # The search goes on without the dates it can't read.
+            messages.info(request, 'Wrong date format, please try again.')
+            filters = {name: value for name, value in filters.items() if name not in errors}
+        position = {}
+        if 'page' in request.GET:
+            position['page'] = request.GET['page']
+        elif request.GET.get('cursor'):
+            position['cursor'] = request.GET['cursor']
+        # Rendered results are shared through the cache until books or authors change.
+        cache_key, entry = page_cache.lookup({**filters, **position})
+        context = {}
+
+        if entry is None:
+            # Pages to be cached are read from the primary: rows from a lagging replica would be
+            # stored under the current generation and outlive the write they're missing.
+            with routing(use_replicas=False) if cache_key is not None else nullcontext():
+                queryset, filtered, author_found = self.filter_books(filters)
+
+                # Numbered pages are kept for old links; browsing uses keyset pagination,
+                # which costs the same on every page and never counts the whole table.
+                if 'page' in position:
+                    page_obj = EstimatedCountPaginator(queryset, 10).get_page(position['page'])
+                else:
+                    page_obj = KeysetPaginator(queryset, 10).get_page(position.get('cursor'))
+                # Rows link to the locally cached covers where there are any, at one query per page.
+                page_obj.object_list = covers.attach_covers(list(page_obj.object_list))
+
+                context = {
+                    'queryset': queryset,
+                    'page_obj': page_obj,
+                }
+                entry = {
+                    'results': render_to_string('book_results.html', context, request),
+                    'pagination': self.pagination(page_obj),
+                    'filtered': filtered,
+                    'author_found': author_found,
+                }
+            page_cache.store(cache_key, entry)
+
+        if not entry['author_found']:
+            messages.info(request, 'Author has not been found.')
+
+        if not entry['filtered']:
+            messages.info(request, 'Please find list of all books down below.')
+
+        # Page links are rendered per request, from the filters the page was built with.
+        context.update({
+            'results': mark_safe(entry['results']),
+            'pagination': entry['pagination'],
+            'query_string': urlencode(filters),
+        })
 
         return render(request, 'find_book.html', context)
 
     @staticmethod
-    def is_valid_queryparam(param):
-        return param != '' and param is not None
+    def pagination(page_obj):
+        """What the page links need to know about ``page_obj``, cached along with the rows."""
+        if isinstance(page_obj, KeysetPage):
+            return {
+                'numbered': False,
+                'previous_cursor': page_obj.previous_cursor,
+                'next_cursor': page_obj.next_cursor,
+            }
+        return {
+            'numbered': True,
+            'number': page_obj.number,
+            'num_pages': page_obj.paginator.num_pages,
+            'previous': page_obj.previous_page_number() if page_obj.has_previous() else None,
+            'next': page_obj.next_page_number() if page_obj.has_next() else None,
+        }
+
+
+class BookExportView(BookFilterMixin, View):
+    """
+    Streams every book matching the find-book parameters, with its author name,
+    as CSV (``?format=csv``, the default) or NDJSON (``?format=ndjson``). Rows
+    are read with a chunked server-side cursor, so memory use doesn't grow with
+    the size of the catalog.
+    """
+    fields = ('id', 'title', 'author__name', 'pub_date', 'isbn', 'pages', 'cover_url', 'language')
+    headers = ('id', 'title', 'author', 'pub_date', 'isbn', 'pages', 'cover_url', 'language')
+    formats = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson',
+    }
+    chunk_size = 2000
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in self.formats:
+            return HttpResponseBadRequest(f'Unknown export format: {export_format}')
+
+        filters = self.clean_params(request.GET)
+        errors = self.date_errors(filters)
+        if errors:
+            return HttpResponseBadRequest('\n'.join(f'{name}: {error}' for name, error in errors.items()))
+
+        queryset, _, _ = self.filter_books(filters)
+        rows = queryset.values_list(*self.fields).iterator(chunk_size=self.chunk_size)
+
+        stream = export.csv_lines if export_format == 'csv' else export.ndjson_lines
+        response = StreamingHttpResponse(stream(rows, self.headers, self.chunk_size),
+                                         content_type=self.formats[export_format])
+        response['Content-Disposition'] = f'attachment; filename="books.{export_format}"'
+        return response
 
 
 class AddBookView(View):
     """Allows users to add new books to database via the form."""
     def get(self, request):
-        authors = Author.objects.all()
-        form = AddBookForm(data_list=authors)
+        form = AddBookForm()
 
         context = {
             'form': form,
@@ -93,8 +263,8 @@ class AddBookView(View):
         return render(request, 'add_book.html', context)
 
     def post(self, request):
-        authors = Author.objects.all()
-        author = Author.objects.get_or_create(name=request.POST['author'])
+        author = Author.objects.get_or_create(name_key=name_key(request.POST['author']),
+                                              defaults={'name': request.POST['author']})
         request.POST = request.POST.copy()
         request.POST['author'] = str(author[0].id)
         form = AddBookForm(request.POST)
@@ -102,14 +272,16 @@ class AddBookView(View):
         if len(request.POST['pub_date']) != 10:
             messages.info(request, 'Wrong date format, please try again.')
             context = {
-                'form': AddBookForm(request.POST, data_list=authors),
+                'form': AddBookForm(request.POST),
             }
             return render(request, 'add_book.html', context)
 
-        if len(request.POST['isbn']) != 13:
-            messages.info(request, 'ISBN number must have 13 digits. Please try again.')
+        try:
+            normalize_isbn(request.POST['isbn'])
+        except DjangoValidationError as error:
+            messages.info(request, f'{error.messages[0]} Please try again.')
             context = {
-                'form': AddBookForm(request.POST, data_list=authors),
+                'form': AddBookForm(request.POST),
             }
             return render(request, 'add_book.html', context)
 
@@ -118,110 +290,355 @@ class AddBookView(View):
             messages.success(request, 'Book successfully added to database!')
 
         context = {
-            'form': AddBookForm(data_list=authors),
+            'form': AddBookForm(),
         }
 
         return render(request, 'add_book.html', context)
 
 
-class ImportBookView(View):
-    """Allows users to add books through the Google Books APIs."""
+@method_decorator(cache_control(public=True, max_age=60), name='get')
+class AuthorAutocompleteView(View):
+    """
+    Returns up to ``limit`` author names starting with ``q`` as JSON. Names
+    and prefix are compared by their ``name_key``, ignoring case, accents and
+    punctuation, as a range on its unique index.
+    """
+    max_limit = 20
+
     def get(self, request):
+        prefix = request.GET.get('q', '').strip()
+        try:
+            limit = min(int(request.GET.get('limit', 10)), self.max_limit)
+        except ValueError:
+            limit = 10
+
+        names = []
+        if prefix and limit > 0:
+            key = name_key(prefix)
+            authors = (Author.objects.filter(name_key__gte=key, name_key__lt=key + '\U0010ffff')
+                       .order_by('name_key')
+                       .values_list('name', flat=True))
+            names = list(authors[:limit])
+
+        return JsonResponse({'results': names})
+
+
+class AsyncView(View):
+    """
+    View with coroutine handlers. Django recognizes async function views only,
+    so ``as_view()`` wraps the view function in one.
+    """
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        async_view.view_class = view.view_class
+        async_view.view_initkwargs = view.view_initkwargs
+        async_view.__doc__ = view.__doc__
+        async_view.__module__ = view.__module__
+        async_view.__name__ = view.__name__
+        return async_view
+
+
+class ImportBookView(AsyncView):
+    """
+    Allows users to add books through the Google Books APIs. Imports of up to
+    ``max_results`` volumes are queued as jobs for the ``import_worker``
+    command and the page polls their progress. Under an ASGI server eager
+    imports wait on the API in the event loop, not in a thread of their own.
+    """
+    async def get(self, request):
         search_phrase = request.GET.get('search_phrase')
 
         if search_phrase:
-            r = requests.get(f'https://www.googleapis.com/books/v1/volumes?q={search_phrase}&fields=items(volumeInfo'
-                             '(title,authors,publishedDate,industryIdentifiers,pageCount,imageLinks(thumbnail),language))')
-
-            books_instances = []
-            if r.status_code == 200:
-                try:
-                    books = r.json()['items']
-                except KeyError:
-                    books = []
+            if isinstance(request, ASGIRequest):
+                job, result = await submit_import_async(search_phrase, self.get_max_volumes(request))
+            else:
+                # Under WSGI every request runs in an event loop of its own; the
+                # blocking client keeps its connections alive across requests.
+                job, result = await sync_to_async(submit_import)(search_phrase, self.get_max_volumes(request))
+
+            if result is None:
+                messages.info(request, 'Import has been scheduled.')
+            elif job.status == ImportJob.FAILED:
+                messages.info(request, 'Google Books API is not available, please try again later.')
+            else:
+                if not job.fetched:
                     messages.success(request, 'No books with the searched phrase.')
 
-                for book in books:
-                    book_info = book['volumeInfo']
-                    title = book_info.get('title')
-                    language = book_info.get('language')
-                    pages = book_info.get('pageCount') if book_info.get('pageCount') else 0
-
-                    pub_date = book_info.get('publishedDate')
-                    try:
-                        pub_date_length = len(pub_date)
-                    except TypeError:
-                        pub_date_length = 0
-                    if pub_date_length == 7:
-                        pub_date += '-01'
-                    elif pub_date_length == 4:
-                        pub_date += '-01-01'
-
-                    try:
-                        author = Author.objects.get_or_create(name=book_info.get('authors')[0])[0]
-                    except TypeError:
-                        author = Author.objects.get_or_create(name='Unknown')[0]
-
-                    isbn_codes = book_info.get('industryIdentifiers')
-                    if isbn_codes:
-                        for code in isbn_codes:
-                            if code['type'] == 'ISBN_13':
-                                isbn_13 = code['identifier']
-                                isbn = isbn_13
-                                break
-                            if code['type'] == 'ISBN_10':
-                                isbn_10 = code['identifier']
-                                isbn = isbn_10
-                                continue
-                            if code['type'] == 'OTHER':
-                                isbn_other = code['identifier']
-                                if 'isbn' not in locals():
-                                    isbn = isbn_other
-                    else:
-                        continue
-
-                    try:
-                        cover_urls = book_info.get('imageLinks')['thumbnail']
-                    except TypeError:
-                        cover_urls = 'http://www.hallens.co.uk/wp-content/themes/consultix/images/no-image-found-360x260.png'
-
-                    try:
-                        new_book = Book.objects.create(
-                            title=title,
-                            author=author,
-                            pub_date=pub_date,
-                            isbn=isbn,
-                            pages=pages,
-                            cover_url=cover_urls,
-                            language=language,
-                        )
-                    except IntegrityError:
-                        continue
-                    except ValidationError:
-                        continue
-
-                    books_instances.append(new_book)
-
-                if books_instances:
+                if result.inserted:
                     messages.success(request, 'Books have been added to database.')
                 else:
                     messages.success(request, 'No new books have been added to database.')
 
             context = {
-                'books': books_instances,
+                'job': job,
+                'books': result.books if result else [],
             }
 
-            return render(request, 'api_book.html', context)
+            return await sync_to_async(render)(request, 'api_book.html', context)
         else:
-            return render(request, 'api_book.html')
+            return await sync_to_async(render)(request, 'api_book.html')
 
+    @staticmethod
+    def get_max_volumes(request):
+        limit = getattr(settings, 'GOOGLE_BOOKS_MAX_VOLUMES', 400)
+        try:
+            max_volumes = int(request.GET.get('max_results', MAX_PAGE_SIZE))
+        except ValueError:
+            max_volumes = MAX_PAGE_SIZE
+        return max(1, min(max_volumes, limit))
+
+
+class ImportJobView(View):
+    """Reports the progress of an import job as JSON."""
+    def get(self, request, pk):
+        job = get_object_or_404(ImportJob, pk=pk)
+        return JsonResponse({
+            'id': job.id,
+            'search_phrase': job.search_phrase,
+            'status': job.status,
+            'finished': job.is_finished,
+            'fetched': job.fetched,
+            'inserted': job.inserted,
+            'skipped': job.skipped,
+            'error': job.error,
+        })
+
+
+class CoverView(View):
+    """
+    Serves a cover from the local cache. URLs name the content digest, so the
+    response never changes and may be cached for good.
+    """
+    def get(self, request, digest, size):
+        if not covers.DIGEST_PATTERN.fullmatch(digest) or (size != covers.ORIGINAL and size not in covers.get_sizes()):
+            raise Http404
+        found = covers.find(digest, size)
+        if found is None:
+            raise Http404
+        path, content_type = found
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+
+class ValuesReadMixin:
+    """
+    Serves list and detail reads through ``values_serializer_class`` from
+    ``.values()`` rows, selecting only the columns of the ``?fields=`` asked for.
+    Writes still go through the regular serializer.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        return self.values_serializer_class(self.request, fields=self.request.query_params.get('fields'))
+
+    @staticmethod
+    def ordering_columns(queryset):
+        # The pagination cursor needs the ordering columns as well.
+        return [field.lstrip('-') for field in queryset.query.order_by]
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*dict.fromkeys(serializer.columns + self.ordering_columns(queryset) + ['id']))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        row = self.get_values_row(serializer.columns)
+        if row is None:
+            raise Http404
+        return Response(serializer.to_representation(row))
+
+    def get_values_row(self, columns):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        return queryset.values(*dict.fromkeys(columns)).filter(**filter_kwargs).first()
+
+
+class ConditionalReadMixin:
+    """
+    Adds a strong ``ETag`` and ``Last-Modified`` to list and detail reads of a
+    ``ValuesReadMixin`` view, both taken from a light query run before
+    anything is serialized: the page's ids and ``updated_at`` through the
+    same pagination, plus the latest ``updated_at`` and deletion of the
+    whole table as subqueries. The ETag hashes the ids, their timestamps and
+    the pagination envelope (counts, links); ``Last-Modified`` of a list is
+    the latest change to the table, which also covers rows moved off the page
+    by an update or a delete. A request whose ``If-None-Match`` or
+    ``If-Modified-Since`` still matches gets a 304; otherwise the page's
+    columns are read by id and serialized.
+    """
+    last_modified_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        columns = self.ordering_columns(queryset) + ['id', self.last_modified_field]
+        validators = queryset.values(*dict.fromkeys(columns)).annotate(
+            table_updated_at=Subquery(model._default_manager.order_by(f'-{self.last_modified_field}')
+                                      .values(self.last_modified_field)[:1]),
+            table_deleted_at=deletions.latest(model),
+        )
+
+        page = self.paginate_queryset(validators)
+        if page is None:
+            return super().list(request, *args, **kwargs)
+        if not page:
+            return self.get_paginated_response([])
+
+        etag = self.get_etag(request, self.get_paginated_response([]).data,
+                             [(row['id'], row[self.last_modified_field]) for row in page])
+        last_modified = max(value for value in (page[0]['table_updated_at'], page[0]['table_deleted_at']) if value)
+        response = self.get_conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        ids = [row['id'] for row in page]
+        rows = self.get_queryset().order_by().filter(id__in=ids).values(*dict.fromkeys(serializer.columns + ['id']))
+        rows = {row['id']: row for row in rows}
+        data = serializer.serialize(rows[pk] for pk in ids if pk in rows)
+        return self.with_validators(self.get_paginated_response(data), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        row = self.get_values_row(['id', self.last_modified_field])
+        if row is None:
+            raise Http404
+        etag = self.get_etag(request, None, [(row['id'], row[self.last_modified_field])])
+        last_modified = row[self.last_modified_field]
+        response = self.get_conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        return self.with_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
+
+    def get_conditional_response(self, request, etag, last_modified):
+        response = get_conditional_response(request, etag=etag, last_modified=timegm(last_modified.utctimetuple()))
+        return response and self.with_validators(response, etag, last_modified)
 
-class AuthorViewSet(viewsets.ModelViewSet):
+    @staticmethod
+    def with_validators(response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+        return response
+
+    @staticmethod
+    def get_etag(request, envelope, versions):
+        # The URL covers filters, sparse fieldsets and the page; the media type the renderer.
+        key = '\n'.join((request.build_absolute_uri(), request.accepted_media_type,
+                         json.dumps([envelope, versions], cls=DjangoJSONEncoder, sort_keys=True)))
+        return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+
+class AuthorViewSet(ConditionalReadMixin, ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
+    values_serializer_class = AuthorValuesSerializer
+    pagination_class = EstimatedCountPagination
 
 
-class BookViewSet(viewsets.ModelViewSet):
-
-    queryset = Book.objects.all().order_by('title')
+class BookViewSet(ConditionalReadMixin, ValuesReadMixin, viewsets.ModelViewSet):
+    """
+    Books, filtered by the query parameters of ``BookFilter`` and ordered by
+    ``?ordering=`` one of ``ordering_fields``, each leading an index.
+    """
+    queryset = Book.objects.select_related('author').order_by('title')
     serializer_class = BookSerializer
+    values_serializer_class = BookValuesSerializer
+    pagination_class = KeysetPagination
+    filter_backends = [BookFilter, IndexedOrderingFilter]
+    ordering_fields = ['title', 'pub_date', 'pages', 'updated_at']
+    ordering = ['title']
+    bulk_max_items = 5000
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Creates (POST a list of books), partially updates (PATCH a list of
+        books with their ``id``) or deletes (DELETE a list of ids) up to
+        ``bulk_max_items`` books in one transaction. Nothing is written unless
+        every item is valid; the response lists the outcome of each item.
+        """
+        items = request.data
+        if not isinstance(items, list) or not 0 < len(items) <= self.bulk_max_items:
+            return Response({'detail': f'Expected a list of 1 to {self.bulk_max_items} items.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'POST':
+            result, success_status = bulk.bulk_create(items, request), status.HTTP_201_CREATED
+        elif request.method == 'PATCH':
+            result, success_status = bulk.bulk_update(items, request), status.HTTP_200_OK
+        else:
+            result, success_status = bulk.bulk_delete(items), status.HTTP_200_OK
+
+        return Response({'results': result.items},
+                        status=success_status if result.valid else status.HTTP_400_BAD_REQUEST)
+
+
+class CatalogStatsViewSet(viewsets.ViewSet):
+    """
+    Book counts per language, publication year and author, read from the
+    ``CatalogStat`` summary table, so a read costs one row per group however
+    large the catalog is. ``?dimension=language|year|author`` returns a single
+    dimension and ``?limit=`` only its largest groups.
+    """
+    keys = {
+        CatalogStat.LANGUAGE: 'languages',
+        CatalogStat.YEAR: 'years',
+        CatalogStat.AUTHOR: 'authors',
+    }
+
+    def list(self, request):
+        dimension = request.query_params.get('dimension')
+        if dimension is not None and dimension not in self.keys:
+            raise ValidationError({'dimension': [f'Expected one of: {", ".join(self.keys)}.']})
+        try:
+            limit = int(request.query_params['limit']) if 'limit' in request.query_params else None
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+
+        dimensions = [dimension] if dimension else list(self.keys)
+        stats = CatalogStat.objects.filter(count__gt=0).order_by('-count', 'key')
+        rows = {name: [] for name in dimensions}
+        if limit is None:
+            for name, key, count in stats.filter(dimension__in=dimensions).values_list('dimension', 'key', 'count'):
+                rows[name].append((key, count))
+        else:
+            for name in dimensions:
+                rows[name] = list(stats.filter(dimension=name).values_list('key', 'count')[:max(limit, 0)])
+
+        return Response({
+            self.keys[name]: getattr(self, f'{name}_groups')(request, rows[name]) for name in dimensions
+        })
+
+    @staticmethod
+    def language_groups(request, rows):
+        return [{'language': key, 'count': count} for key, count in rows]
+
+    @staticmethod
+    def year_groups(request, rows):
+        return [{'year': int(key), 'count': count} for key, count in rows]
+
+    @staticmethod
+    def author_groups(request, rows):
+        names = dict(Author.objects.filter(id__in=[key for key, count in rows]).values_list('id', 'name'))
+        return [{
+            'id': int(key),
+            'name': names.get(int(key)),
+            'url': request.build_absolute_uri(reverse('author-detail', kwargs={'pk': key})),
+            'count': count,
+        } for key, count in rows]
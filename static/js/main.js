@@ -40,4 +40,92 @@ function DeleteBook(book_id) {
             console.log(error)
         })
     }
-}
\ No newline at end of file
+}
+
+
+function DeleteSelectedBooks() {
+    const book_ids = Array.from(document.querySelectorAll('.book-select:checked'), input => parseInt(input.value));
+    if (!book_ids.length) {
+        return;
+    }
+
+    let result = confirm('Are you sure you want to delete ' + book_ids.length + ' selected entries?');
+    if (result) {
+
+    const csrftoken = getCookie('csrftoken');
+
+    fetch('/api/books/bulk/', {
+        method: 'DELETE',
+        headers: {
+                    'Content-Type':'application/json',
+                    'X-CSRFTOKEN': csrftoken
+                },
+        body: JSON.stringify(book_ids),
+    }).then(response => response)
+        .then(data => {
+            location.reload();
+        })
+        .catch(error => {
+            console.log(error)
+        })
+    }
+}
+
+
+function pollImportJob() {
+    const job_element = document.getElementById('import-job');
+    if (!job_element || job_element.dataset.finished === 'true') {
+        return;
+    }
+
+    fetch(job_element.dataset.url)
+        .then(response => response.json())
+        .then(job => {
+            for (const field of ['status', 'fetched', 'inserted', 'skipped', 'error']) {
+                document.getElementById('import-job-' + field).textContent = job[field];
+            }
+            if (job.finished) {
+                job_element.dataset.finished = 'true';
+            } else {
+                setTimeout(pollImportJob, 1000);
+            }
+        })
+        .catch(error => {
+            console.log(error)
+        })
+}
+
+pollImportJob();
+
+
+function setupAutocomplete(input) {
+    const data_list = document.getElementById(input.getAttribute('list'));
+    let timeout = null;
+
+    input.addEventListener('input', () => {
+        clearTimeout(timeout);
+        timeout = setTimeout(() => {
+            const prefix = input.value.trim();
+            if (!prefix) {
+                data_list.innerHTML = '';
+                return;
+            }
+
+            fetch(input.dataset.autocompleteUrl + '?q=' + encodeURIComponent(prefix))
+                .then(response => response.json())
+                .then(data => {
+                    data_list.innerHTML = '';
+                    for (const name of data.results) {
+                        const option = document.createElement('option');
+                        option.value = name;
+                        data_list.appendChild(option);
+                    }
+                })
+                .catch(error => {
+                    console.log(error)
+                })
+        }, 200);
+    });
+}
+
+document.querySelectorAll('input[data-autocomplete-url]').forEach(setupAutocomplete);
@@ -0,0 +1,21 @@
+"""Test helpers pointing the Google Books clients at the local stand-in API."""
+from django.test import override_settings
+
+from core.fake_google_books import CATALOG, GoogleBooksStubServer, synthetic_volumes, volume  # noqa: F401
+
+
+class GoogleBooksStubMixin:
+    """Points the Google Books client at a stub server for the whole test class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.google_books = GoogleBooksStubServer().start()
+        cls._google_books_settings = override_settings(GOOGLE_BOOKS_API_URL=cls.google_books.url)
+        cls._google_books_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._google_books_settings.disable()
+        cls.google_books.stop()
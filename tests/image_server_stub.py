@@ -0,0 +1,55 @@
+"""Local stand-in for the hosts serving cover images."""
+import struct
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def png(width=300, height=400, color=(200, 30, 30)):
+    """A solid-colour RGB PNG image."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    row = b'\0' + bytes(color) * width
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * height))
+            + chunk(b'IEND', b''))
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+        status, content_type, body = self.server.files.get(self.path, (404, 'text/plain', b'Not found'))
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ImageStubServer(ThreadingHTTPServer):
+    """Serves ``files``: ``{path: (status, content type, body)}``."""
+    daemon_threads = True
+
+    def __init__(self, files):
+        super().__init__(('127.0.0.1', 0), ImageHandler)
+        self.files = files
+        self.lock = threading.Lock()
+        self.requests = []
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_port}{path}'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,127 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from core.authors import TrigramIndex, merge_authors, name_key, suggest_merges, trigrams
+from core.importer import import_books, resolve_authors
+from core.models import Author, Book, CatalogStat
+from core.search import BookSearch
+from tests.test_importer import book_data
+
+
+class NameKeyTest(TestCase):
+
+    def test_spellings_share_a_key(self) -> None:
+        self.assertEqual(name_key('J.R.R. Tolkien'), 'j r r tolkien')
+        self.assertEqual(name_key('  j. r. r.   TOLKIEN '), 'j r r tolkien')
+        self.assertEqual(name_key('Émile Zola'), name_key('Emile  ZOLA'))
+        self.assertEqual(name_key('Gabriel García Márquez'), 'gabriel garcia marquez')
+
+    def test_names_without_words_keep_their_characters(self) -> None:
+        self.assertEqual(name_key('???'), '???')
+
+    def test_key_is_set_on_save(self) -> None:
+        author = Author.objects.create(name='Ursula K. Le Guin')
+        self.assertEqual(author.name_key, 'ursula k le guin')
+
+
+class TrigramIndexTest(TestCase):
+
+    def test_similar_keys(self) -> None:
+        index = TrigramIndex()
+        for author_id, name in enumerate(('stanislaw lem', 'stanislav lem', 'terry pratchett')):
+            index.add(author_id, name)
+        similar = dict(index.similar(0, 0.5))
+        self.assertEqual(set(similar), {1})
+        self.assertEqual(similar[1], len(trigrams('stanislaw lem') & trigrams('stanislav lem'))
+                         / len(trigrams('stanislaw lem') | trigrams('stanislav lem')))
+
+    def test_common_trigrams_are_skipped(self) -> None:
+        index = TrigramIndex(max_postings=1)
+        index.add(1, 'abc')
+        index.add(2, 'abc')
+        self.assertEqual(list(index.similar(1, 0.1)), [])
+
+
+class MergeAuthorsTest(TestCase):
+
+    def setUp(self) -> None:
+        import_books([
+            book_data(1, author='Stanisław Lem', title='Solaris'),
+            book_data(2, author='Stanislav Lem', title='Cyberiad'),
+            book_data(3, author='Stanislaw Lemm', title='Fiasco'),
+            book_data(4, author='Stanislaw Lemm', title='Eden'),
+            book_data(5, author='Terry Pratchett', title='Mort'),
+        ])
+        self.lem = Author.objects.get(name='Stanislaw Lemm')
+
+    def test_similar_authors_are_suggested(self) -> None:
+        suggestions = suggest_merges(0.5)
+        self.assertEqual(len(suggestions), 1)
+        self.assertEqual(suggestions[0].keep, self.lem, 'keeps the author with most books')
+        self.assertEqual({author.name for author in suggestions[0].duplicates}, {'Stanisław Lem', 'Stanislav Lem'})
+        self.assertGreaterEqual(suggestions[0].score, 0.5)
+        self.assertEqual(suggest_merges(0.95), [])
+
+    def test_merge_moves_books_and_statistics(self) -> None:
+        duplicates = list(Author.objects.filter(name__in=['Stanisław Lem', 'Stanislav Lem']))
+        self.assertEqual(merge_authors(self.lem, duplicates), 2)
+
+        self.assertEqual(set(Author.objects.values_list('name', flat=True)), {'Stanislaw Lemm', 'Terry Pratchett'})
+        self.assertEqual(self.lem.book_set.count(), 4)
+        stats = dict(CatalogStat.objects.filter(dimension=CatalogStat.AUTHOR).values_list('key', 'count'))
+        self.assertEqual(stats, {str(self.lem.id): 4, str(Author.objects.get(name='Terry Pratchett').id): 1})
+        self.assertEqual(set(BookSearch(author='Lemm').apply(Book.objects.all()).values_list('title', flat=True)),
+                         {'Solaris', 'Cyberiad', 'Fiasco', 'Eden'})
+
+    def test_command_lists_and_applies_suggestions(self) -> None:
+        output = StringIO()
+        call_command('dedupe_authors', threshold=0.5, stdout=output)
+        self.assertIn(f'Stanislaw Lemm (#{self.lem.id}) <- ', output.getvalue())
+        self.assertEqual(Author.objects.count(), 4)
+
+        call_command('dedupe_authors', threshold=0.5, apply=True, stdout=StringIO())
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(self.lem.book_set.count(), 4)
+
+    def test_command_merges_given_ids(self) -> None:
+        pratchett = Author.objects.get(name='Terry Pratchett')
+        output = StringIO()
+        call_command('dedupe_authors', merge=[self.lem.id, pratchett.id], stdout=output)
+        self.assertIn('Moved 1 books', output.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('dedupe_authors', merge=[self.lem.id, pratchett.id], stdout=StringIO())
+
+
+class AuthorIdentityTest(TestCase):
+
+    def test_importer_resolves_spellings_to_one_author(self) -> None:
+        result = import_books([book_data(1, author='J.R.R. Tolkien'), book_data(2, author='j. r. r. tolkien')])
+        self.assertEqual(result.inserted, 2)
+        author = Author.objects.get()
+        self.assertEqual(author.name, 'J.R.R. Tolkien')
+        self.assertEqual(resolve_authors(['J R R TOLKIEN'])['J R R TOLKIEN'], author)
+
+    def test_add_book_view_reuses_existing_author(self) -> None:
+        author = Author.objects.create(name='Olga Tokarczuk')
+        self.client.post(reverse('add-book'), {
+            'title': 'Flights', 'author': 'olga tokarczuk', 'pub_date': date(2007, 1, 1), 'isbn': '9780306406157',
+            'pages': 400, 'cover_url': 'http://cover.pl/', 'language': 'pl',
+        })
+        self.assertEqual(Book.objects.get().author, author)
+        self.assertEqual(Author.objects.count(), 1)
+
+    def test_api_rejects_duplicate_names(self) -> None:
+        author = Author.objects.create(name='Olga Tokarczuk')
+        response = self.client.post('/api/author/', {'name': 'OLGA  Tokarczuk'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.json())
+
+        url = f'/api/author/{author.id}/'
+        response = self.client.put(url, {'name': 'Olga  Tokarczuk'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('name_key', response.json())
@@ -0,0 +1,62 @@
+import copy
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.benchmarks import METRICS, asgi_get, compare, import_paths, percentile, run_benchmarks
+from core.models import Book
+
+
+@override_settings(FIND_BOOK_CACHE_TIMEOUT=0)
+class BenchmarkTest(TestCase):
+
+    def test_percentile(self) -> None:
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 0.5), 3)
+        self.assertEqual(percentile(list(range(1, 21)), 0.95), 19)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_run_benchmarks_records_metrics(self) -> None:
+        scenarios = ['find-book', 'book-detail', 'add-book post', 'import batch']
+        results = run_benchmarks([50], iterations=2, scenarios=scenarios)
+
+        self.assertEqual(results['meta']['iterations'], 2)
+        self.assertEqual(list(results['results']), ['50'])
+        self.assertCountEqual(results['results']['50'], scenarios)
+        for metrics in results['results']['50'].values():
+            self.assertEqual(tuple(metrics), METRICS)
+            self.assertGreater(metrics['queries'], 0)
+        # 50 seeded books; a warm-up, two timed and one traced call per write scenario.
+        self.assertEqual(Book.objects.count(), 50 + 4 + 4 * 200)
+
+    def test_compare_flags_regressions(self) -> None:
+        baseline = {'results': {'100': {'book-list': {
+            'p50_ms': 10.0, 'p95_ms': 0.2, 'queries': 2, 'peak_memory_kb': 100.0,
+        }}}}
+        results = copy.deepcopy(baseline)
+        self.assertEqual(compare(baseline, results), [])
+
+        metrics = results['results']['100']['book-list']
+        metrics.update(p50_ms=11.9, p95_ms=1.1, peak_memory_kb=119.0)
+        self.assertEqual(compare(baseline, results), [], 'within the threshold or below min_ms')
+
+        metrics.update(p50_ms=12.5, queries=3)
+        self.assertEqual(compare(baseline, results), [
+            '100 books, book-list: p50_ms 10.0 -> 12.5',
+            '100 books, book-list: queries 2 -> 3',
+        ])
+        results['results']['100']['stats'] = dict(metrics)
+        self.assertEqual(len(compare(baseline, results)), 2, 'scenarios missing from the baseline are skipped')
+
+
+class ImportConcurrencyTest(SimpleTestCase):
+
+    def test_import_paths_are_distinct(self) -> None:
+        paths = import_paths(3, volumes=40)
+        self.assertEqual(len(set(paths)), 3)
+        self.assertIn('search_phrase=many%3A40%3A80&max_results=40', paths[2])
+
+    async def test_asgi_get(self) -> None:
+        from Bookstore.asgi import application
+
+        status, duration = await asgi_get(application, '/api/?format=json')
+        self.assertEqual(status, 200)
+        self.assertGreater(duration, 0)
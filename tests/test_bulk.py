@@ -0,0 +1,97 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core.isbn import isbn13
+from core.models import Author, Book
+from core.testing import QueryBudgetMixin
+
+
+def book_payload(number, author, **extra):
+    data = {
+        'title': f'Book {number}',
+        'author': author,
+        'pub_date': '2001-01-01',
+        'isbn': isbn13(f'978{number:09d}'),
+        'pages': 100,
+        'cover_url': 'http://covers.example.com/cover.jpg',
+        'language': 'pl',
+    }
+    data.update(extra)
+    return data
+
+
+class BulkBooksApiTest(QueryBudgetMixin, TestCase):
+    url = '/api/books/bulk/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Tolkien')
+        cls.author_url = 'http://testserver' + reverse('author-detail', kwargs={'pk': cls.author.id})
+
+    def test_bulk_create(self) -> None:
+        payload = [book_payload(number, self.author_url if number % 2 else self.author.id) for number in range(500)]
+        # SQLite splits the insert into batches of identical statements; three
+        # more queries keep the catalog statistics up to date.
+        with self.assertQueryBudget(13, allow_duplicates=True):
+            response = self.client.post(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        results = response.json()['results']
+        self.assertEqual({item['status'] for item in results}, {'created'})
+        self.assertEqual(Book.objects.count(), 500)
+        self.assertEqual(Book.objects.get(id=results[3]['id']).isbn, payload[3]['isbn'])
+
+    def test_invalid_batch_is_not_applied(self) -> None:
+        Book.objects.create(**dict(book_payload(1, None), author=self.author))
+        payload = [
+            book_payload(2, self.author.id),
+            book_payload(1, self.author.id),
+            book_payload(3, 999),
+            book_payload(4, self.author.id, isbn='97800000000004'),
+            book_payload(2, self.author.id),
+        ]
+        response = self.client.post(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        results = response.json()['results']
+        self.assertEqual([item['status'] for item in results], ['ok', 'invalid', 'invalid', 'invalid', 'invalid'])
+        self.assertIn('isbn', results[1]['errors'])
+        self.assertIn('author', results[2]['errors'])
+        self.assertIn('isbn', results[3]['errors'])
+        self.assertEqual(results[4]['errors'], {'isbn': ['Duplicate ISBN in this batch.']})
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_bulk_partial_update(self) -> None:
+        books = [Book.objects.create(**dict(book_payload(number, None), author=self.author)) for number in range(3)]
+        other = Author.objects.create(name='Sapkowski')
+        payload = [
+            {'id': books[0].id, 'title': 'Renamed'},
+            {'id': books[1].id, 'author': other.id, 'pages': 5},
+        ]
+        with self.assertQueryBudget(9):
+            response = self.client.patch(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.json()['results']], ['updated', 'updated'])
+        books = [Book.objects.get(id=book.id) for book in books]
+        self.assertEqual((books[0].title, books[0].pages), ('Renamed', 100))
+        self.assertEqual((books[1].author, books[1].pages), (other, 5))
+        self.assertEqual(books[2].title, 'Book 2')
+
+    def test_bulk_update_rejects_unknown_ids(self) -> None:
+        book = Book.objects.create(**dict(book_payload(1, None), author=self.author))
+        response = self.client.patch(self.url, [{'id': book.id, 'title': 'Renamed'}, {'id': 999, 'title': 'X'}],
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['results'][1]['errors'], {'id': ['Not found.']})
+        self.assertEqual(Book.objects.get(id=book.id).title, 'Book 1')
+
+    def test_bulk_delete(self) -> None:
+        books = [Book.objects.create(**dict(book_payload(number, None), author=self.author)) for number in range(3)]
+        response = self.client.delete(self.url, [books[0].id, books[2].id, 999], content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.json()['results']], ['deleted', 'deleted', 'not_found'])
+        self.assertEqual(list(Book.objects.all()), [books[1]])
+
+    def test_batch_size_is_limited(self) -> None:
+        response = self.client.delete(self.url, list(range(5001)), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {'title': 'Not a list'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,35 @@
+from django.core.cache import caches
+from django.test import TestCase
+
+from core.cache_backends import LRUDatabaseCache
+
+
+class LRUDatabaseCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        self.cache = LRUDatabaseCache('google_books_cache', {'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 2}})
+
+    def test_least_recently_used_entries_are_culled(self) -> None:
+        # Entries touched with a longer timeout stand for entries used later.
+        self.cache.set('a', 1, timeout=100)
+        self.cache.set('b', 2, timeout=200)
+        self.cache.set('c', 3, timeout=300)
+        self.cache.touch_many(['a'], timeout=400)
+        self.cache.set('d', 4, timeout=500)
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c', 'd']), {'a': 1, 'c': 3, 'd': 4})
+
+    def test_entries_without_timeout_are_culled_last(self) -> None:
+        self.cache.set('counter', 1, timeout=None)
+        for key in 'abc':
+            self.cache.set(key, key, timeout=100)
+        self.assertEqual(self.cache.get('counter'), 1)
+
+    def test_count(self) -> None:
+        self.cache.set('page:a', 1)
+        self.cache.set('page:b', 2, timeout=0)
+        self.cache.set('pageXc', 3)
+        self.assertEqual(self.cache.count('page:'), 1)
+        self.assertEqual(self.cache.count(), 2)
+
+    def test_google_books_alias(self) -> None:
+        self.assertIsInstance(caches['google_books'], LRUDatabaseCache)
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Author, Book
+from core.testing import QueryBudgetMixin
+
+
+class ConditionalGetTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Tolkien')
+        cls.books = [
+            Book.objects.create(title=f'Book {number}', author=cls.author, pub_date='2001-01-01',
+                                isbn=f'978000000000{number}', pages=100,
+                                cover_url='http://covers.example.com/cover.jpg', language='en')
+            for number in range(3)
+        ]
+
+    def test_list_and_detail_carry_validators(self) -> None:
+        for url in ('/api/books/', reverse('book-detail', kwargs={'pk': self.books[0].id}), '/api/author/'):
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['ETag'].startswith('"'))
+            self.assertIn('GMT', response['Last-Modified'])
+
+    def test_matching_etag_is_answered_with_304_after_one_query(self) -> None:
+        response = self.client.get('/api/books/', HTTP_ACCEPT='application/json')
+        with self.assertQueryBudget(1) as queries:
+            response = self.client.get('/api/books/', HTTP_ACCEPT='application/json',
+                                       HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # The validators come from the page's ids, not an aggregate over every book.
+        self.assertNotIn('COUNT(', queries.queries[0][0].upper())
+        self.assertIn('LIMIT', queries.queries[0][0].upper())
+
+    def test_if_modified_since(self) -> None:
+        url = reverse('author-detail', kwargs={'pk': self.author.id})
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        response = self.client.get(url, HTTP_ACCEPT='application/json',
+                                   HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_deleting_a_row_moves_last_modified_forward(self) -> None:
+        Book.objects.update(updated_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        response = self.client.get('/api/books/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response['Last-Modified'], 'Wed, 01 Jan 2020 00:00:00 GMT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books[1].delete()
+        response = self.client.get('/api/books/', HTTP_ACCEPT='application/json',
+                                   HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertNotEqual(response['Last-Modified'], 'Wed, 01 Jan 2020 00:00:00 GMT')
+
+    def test_etag_changes_with_data_and_representation(self) -> None:
+        def etag(url, **headers):
+            return self.client.get(url, HTTP_ACCEPT='application/json', **headers)['ETag']
+
+        list_etag = etag('/api/books/')
+        self.assertNotEqual(etag('/api/books/?fields=title'), list_etag)
+        self.assertNotEqual(self.client.get('/api/books/', HTTP_ACCEPT='text/html')['ETag'], list_etag)
+
+        self.books[2].delete()
+        self.assertNotEqual(etag('/api/books/'), list_etag)
+        list_etag = etag('/api/books/')
+
+        self.books[0].title = 'Renamed'
+        self.books[0].save()
+        response = self.client.get('/api/books/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], list_etag)
+
+    def test_unknown_detail_is_404(self) -> None:
+        response = self.client.get(reverse('book-detail', kwargs={'pk': 999}), HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(response.status_code, 404)
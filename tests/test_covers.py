@@ -0,0 +1,153 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock, skipIf
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import covers
+from core.importer import upsert_books, validate_book_row
+from core.models import Author, Book, CoverImage
+from tests.image_server_stub import ImageStubServer, png
+
+
+COVER = png()
+
+
+class CoverCacheTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.images = ImageStubServer({
+            '/cover.png': (200, 'image/png', COVER),
+            '/same-cover.png': (200, 'image/png; charset=binary', COVER),
+            '/page.html': (200, 'text/html', b'<html></html>'),
+            '/huge.png': (200, 'image/png', b'x' * 2048),
+        }).start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.images.stop()
+
+    def setUp(self) -> None:
+        covers_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, covers_root)
+        settings = override_settings(COVERS_ROOT=covers_root, COVER_MAX_BYTES=1024 * 1024, COVER_MAX_ATTEMPTS=2,
+                                     COVER_SIZES={'small': 64, 'large': 256})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.images.requests.clear()
+        self.author = Author.objects.create(name='Cover Author')
+        for number, path in enumerate(('/cover.png', '/same-cover.png', '/cover.png', '/missing.png', '/page.html')):
+            self.add_book(number, self.images.url(path))
+
+    def add_book(self, number, cover_url):
+        return Book.objects.create(title=f'Cover {number}', author=self.author, pub_date=date(2001, 1, 1),
+                                   isbn=f'978000000{number:04d}', pages=100, cover_url=cover_url, language='en')
+
+    def test_each_url_is_fetched_once_and_stored_by_content(self) -> None:
+        last = Book.objects.order_by('updated_at', 'id').last()
+        self.assertEqual(covers.queue_covers(), (last.updated_at, last.id))
+        self.assertEqual(CoverImage.objects.count(), 4)
+
+        first = covers.fetch_pending()
+        self.assertEqual((first.done, first.failed, first.retried), (2, 0, 2))
+        second = covers.fetch_pending()
+        self.assertEqual((second.done, second.failed, second.retried), (0, 2, 0))
+        self.assertEqual(covers.fetch_pending().done, 0)
+
+        done = CoverImage.objects.filter(status=CoverImage.DONE)
+        self.assertEqual({cover.digest for cover in done}, {covers.hashlib.sha256(COVER).hexdigest()})
+        self.assertEqual({cover.content_type for cover in done}, {'image/png'})
+        self.assertEqual(self.images.requests.count('/cover.png'), 1)
+        failed = CoverImage.objects.get(source_url=self.images.url('/page.html'))
+        self.assertEqual((failed.status, failed.attempts), (CoverImage.FAILED, 2))
+        self.assertIn('not an image', failed.error)
+
+    def test_changed_cover_urls_are_queued(self) -> None:
+        reached = covers.queue_covers()
+        books = list(Book.objects.order_by('id')[:3])
+        books[0].cover_url = self.images.url('/saved.png')
+        books[0].save()
+        self.client.patch('/api/books/bulk/', [{'id': books[1].id, 'cover_url': self.images.url('/patched.png')}],
+                          content_type='application/json')
+        row, errors = validate_book_row(dict(
+            {field: str(getattr(books[2], field)) for field in ('title', 'pub_date', 'isbn', 'pages', 'language')},
+            author=self.author.name, cover_url=self.images.url('/imported.png'),
+        ))
+        upsert_books([row])
+
+        while reached is not None:
+            reached = covers.queue_covers(reached)
+        queued = set(CoverImage.objects.values_list('source_url', flat=True))
+        self.assertLessEqual({self.images.url(path) for path in ('/saved.png', '/patched.png', '/imported.png')},
+                             queued)
+
+    @override_settings(COVER_MAX_BYTES=1024)
+    def test_oversized_images_fail(self) -> None:
+        self.add_book(9, self.images.url('/huge.png'))
+        covers.queue_covers()
+        covers.fetch_pending()
+        self.assertIn('larger than', CoverImage.objects.get(source_url=self.images.url('/huge.png')).error)
+
+    def test_unexpected_errors_fail_one_cover(self) -> None:
+        covers.queue_covers()
+        with mock.patch.object(covers, 'store', side_effect=RuntimeError('disk full')):
+            result = covers.fetch_pending()
+        self.assertEqual((result.done, result.failed, result.retried), (0, 0, 4))
+        self.assertIn('RuntimeError: disk full', CoverImage.objects.get(source_url=self.images.url('/cover.png')).error)
+
+    def test_store_renames_complete_directories_into_place(self) -> None:
+        digest = covers.store(COVER, 'image/png')
+        self.assertEqual(covers.store(COVER, 'image/png'), digest)
+        parent = os.path.dirname(covers.get_storage().path(covers.cover_dir(digest)))
+        self.assertEqual(os.listdir(parent), [digest], 'no staging directories are left behind')
+        self.assertEqual(covers.find(digest, 'original')[1], 'image/png')
+
+    def test_cover_view(self) -> None:
+        call_command('cover_worker', once=True, stdout=io.StringIO())
+        digest = CoverImage.objects.filter(status=CoverImage.DONE).first().digest
+
+        response = self.client.get(reverse('cover', kwargs={'digest': digest, 'size': 'original'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(b''.join(response.streaming_content), COVER)
+
+        small = self.client.get(reverse('cover', kwargs={'digest': digest, 'size': 'small'}))
+        self.assertEqual(small.status_code, 200)
+        if covers.Image is None:
+            self.assertEqual(small['Content-Type'], 'image/png', 'falls back to the original')
+
+        for digest, size in ((digest, 'huge'), ('0' * 64, 'small'), ('not-a-digest', 'small')):
+            self.assertEqual(self.client.get(reverse('cover', kwargs={'digest': digest, 'size': size})).status_code,
+                             404)
+
+    @skipIf(covers.Image is None, 'Pillow is not installed.')
+    def test_resized_variants(self) -> None:
+        digest = covers.store(COVER, 'image/png')
+        path, content_type = covers.find(digest, 'large')
+        self.assertEqual(content_type, 'image/jpeg')
+        with covers.Image.open(path) as image:
+            self.assertEqual(image.size, (192, 256))
+
+    def test_find_book_links_to_local_covers(self) -> None:
+        response = self.client.get(reverse('find-book'))
+        self.assertNotContains(response, '/covers/')
+
+        # Retires the cached page linking to the remote covers.
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            call_command('cover_worker', once=True, stdout=io.StringIO())
+        digest = CoverImage.objects.filter(status=CoverImage.DONE).first().digest
+
+        response = self.client.get(reverse('find-book'))
+        self.assertContains(response, reverse('cover', kwargs={'digest': digest, 'size': 'small'}), count=3)
+        self.assertContains(response, self.images.url('/missing.png'))
@@ -0,0 +1,93 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+
+from core.isbn import isbn13
+from core.models import Author, Book
+from core.pagination import KeysetPagination, KeysetPaginator
+
+
+class BookFilterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        lem = Author.objects.create(name='Stanisław Lem')
+        pratchett = Author.objects.create(name='Terry Pratchett')
+        cls.books = {}
+        for number, (title, author, language, year, pages) in enumerate((
+            ('Solaris', lem, 'pl', 1961, 204),
+            ('Cyberiad', lem, 'pl', 1965, 295),
+            ('Fiasco', lem, 'en', 1986, 322),
+            ('Mort', pratchett, 'en', 1987, 243),
+            ('Eric', pratchett, 'de', 1990, 155),
+        )):
+            cls.books[title] = Book.objects.create(
+                title=title, author=author, language=language, pub_date=date(year, 1, 1), pages=pages,
+                isbn=isbn13(f'978{number:09d}'), cover_url='http://cover.pl/',
+            )
+        cls.lem, cls.pratchett = lem, pratchett
+
+    def titles(self, **params):
+        response = self.client.get('/api/books/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [book['title'] for book in response.json()['results']]
+
+    def test_filters(self) -> None:
+        self.assertEqual(self.titles(language='pl'), ['Cyberiad', 'Solaris'])
+        self.assertEqual(self.titles(language='pl,de'), ['Cyberiad', 'Eric', 'Solaris'])
+        self.assertEqual(self.titles(from_date='1965-01-01', to_date='1987-01-01'), ['Cyberiad', 'Fiasco', 'Mort'])
+        self.assertEqual(self.titles(author=self.pratchett.id), ['Eric', 'Mort'])
+        self.assertEqual(self.titles(author_name='STANISŁAW  LEM'), ['Cyberiad', 'Fiasco', 'Solaris'])
+        self.assertEqual(self.titles(min_pages=200, max_pages=300), ['Cyberiad', 'Mort', 'Solaris'])
+        self.assertEqual(self.titles(isbn=self.books['Mort'].isbn), ['Mort'])
+        self.assertEqual(self.titles(isbn=f'{self.books["Mort"].isbn}, {self.books["Eric"].isbn}'), ['Eric', 'Mort'])
+
+    def test_filters_combine(self) -> None:
+        self.assertEqual(self.titles(language='en', author=self.lem.id, min_pages=300), ['Fiasco'])
+        self.assertEqual(self.titles(language='de', author=self.lem.id), [])
+
+    def test_isbn_10_matches_its_isbn_13(self) -> None:
+        Book.objects.filter(id=self.books['Eric'].id).update(isbn='9780306406157')
+        self.assertEqual(self.titles(isbn='0-306-40615-2'), ['Eric'])
+
+    def test_invalid_values_are_rejected(self) -> None:
+        response = self.client.get('/api/books/', {
+            'language': 'xx', 'from_date': '2001-13-01', 'min_pages': '-1', 'author': 'lem', 'isbn': '123',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'language', 'from_date', 'min_pages', 'author', 'isbn'})
+
+        response = self.client.get('/api/books/', {'isbn': ','.join(['9780306406157'] * 101)})
+        self.assertEqual(response.status_code, 400)
+
+    def test_integers_beyond_the_column_are_rejected(self) -> None:
+        response = self.client.get('/api/books/', {'author': '9' * 20, 'min_pages': '32768', 'max_pages': '32767'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'author', 'min_pages'})
+
+    def test_ordering(self) -> None:
+        self.assertEqual(self.titles(), ['Cyberiad', 'Eric', 'Fiasco', 'Mort', 'Solaris'])
+        self.assertEqual(self.titles(ordering='-pub_date'), ['Eric', 'Mort', 'Fiasco', 'Cyberiad', 'Solaris'])
+        self.assertEqual(self.titles(ordering='pages', language='en'), ['Mort', 'Fiasco'])
+
+    def test_ordering_outside_the_allowlist_is_rejected(self) -> None:
+        for ordering in ('cover_url', 'author__name', 'title,pages'):
+            response = self.client.get('/api/books/', {'ordering': ordering})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('ordering', response.json())
+
+    def test_ordered_pages_follow_next_links(self) -> None:
+        titles = []
+        url = '/api/books/?ordering=-pages'
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            while url:
+                response = self.client.get(url).json()
+                titles += [book['title'] for book in response['results']]
+                url = response['next']
+        self.assertEqual(titles, ['Fiasco', 'Cyberiad', 'Mort', 'Solaris', 'Eric'])
+
+    def test_tiebreaker_follows_descending_ordering(self) -> None:
+        self.assertEqual(KeysetPaginator(Book.objects.all(), 10, ordering=['-pub_date']).ordering,
+                         ['-pub_date', '-id'])
+        self.assertEqual(KeysetPaginator(Book.objects.all(), 10, ordering=['pub_date']).ordering, ['pub_date', 'id'])
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.google_books import (
+    NO_COVER_URL, AsyncGoogleBooksClient, GoogleBooksClient, GoogleBooksError, ResponseCache, get_async_client,
+    parse_volume,
+)
+from core.models import Book
+from tests.google_books_stub import GoogleBooksStubMixin, GoogleBooksStubServer, volume
+
+
+class GoogleBooksClientTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.server = GoogleBooksStubServer().start()
+        self.client = GoogleBooksClient(base_url=self.server.url, max_workers=4)
+
+    def tearDown(self) -> None:
+        self.client.session.close()
+        self.server.stop()
+
+    def test_fetches_all_pages_up_to_the_cap(self) -> None:
+        volumes = self.client.search('many:150', max_volumes=100)
+        self.assertEqual(len(volumes), 100)
+        self.assertEqual(volumes[0]['volumeInfo']['title'], 'Synthetic 0')
+        self.assertEqual(volumes[-1]['volumeInfo']['title'], 'Synthetic 99')
+        self.assertEqual(sorted(int(params['startIndex']) for params in self.server.requests), [0, 40, 80])
+        self.assertEqual(sorted(int(params['maxResults']) for params in self.server.requests), [20, 40, 40])
+
+    def test_stops_at_end_of_results(self) -> None:
+        self.assertEqual(len(self.client.search('many:50', max_volumes=200)), 50)
+
+    def test_pages_are_fetched_concurrently(self) -> None:
+        self.server.delay = 0.2
+        self.client.search('many:160', max_volumes=160)
+        self.assertEqual(self.server.peak_active, 4)
+
+    def test_connections_are_reused(self) -> None:
+        for _ in range(5):
+            self.client.search('python')
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_unavailable_api_raises(self) -> None:
+        client = GoogleBooksClient(base_url='http://127.0.0.1:9/volumes', timeout=1)
+        with self.assertRaises(GoogleBooksError):
+            client.search('python')
+
+
+class AsyncGoogleBooksClientTest(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.server = GoogleBooksStubServer().start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    async def test_fetches_all_pages_concurrently(self) -> None:
+        self.server.delay = 0.2
+        client = AsyncGoogleBooksClient(base_url=self.server.url)
+        volumes = await client.search('many:150', max_volumes=100)
+        await client.aclose()
+
+        self.assertEqual([item['volumeInfo']['title'] for item in volumes[::99]], ['Synthetic 0', 'Synthetic 99'])
+        self.assertEqual(sorted(int(params['startIndex']) for params in self.server.requests), [0, 40, 80])
+        self.assertEqual(self.server.peak_active, 3)
+
+    async def test_searches_share_connections(self) -> None:
+        client = AsyncGoogleBooksClient(base_url=self.server.url)
+        for _ in range(3):
+            await asyncio.gather(client.search('python'), client.search('woda'))
+        await client.aclose()
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertLessEqual(len(self.server.clients), 2)
+
+    async def test_unavailable_api_raises(self) -> None:
+        client = AsyncGoogleBooksClient(base_url='http://127.0.0.1:9/volumes', timeout=1)
+        with self.assertRaises(GoogleBooksError):
+            await client.search('python')
+        await client.aclose()
+
+    async def test_one_client_per_event_loop(self) -> None:
+        self.assertIs(get_async_client(), get_async_client())
+
+    def test_client_is_closed_with_its_event_loop(self) -> None:
+        async def get_client():
+            return get_async_client()
+
+        first, second = asyncio.run(get_client()), asyncio.run(get_client())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.session.is_closed)
+        self.assertTrue(second.session.is_closed)
+
+
+class ParseVolumeTest(SimpleTestCase):
+
+    def test_prefers_isbn_13(self) -> None:
+        item = volume('Title', '9788328313439')
+        item['volumeInfo']['industryIdentifiers'].insert(0, {'type': 'ISBN_10', 'identifier': '8328313433'})
+        self.assertEqual(parse_volume(item)['isbn'], '9788328313439')
+
+    def test_converts_isbn_10(self) -> None:
+        item = volume('Title', '832831343X')
+        item['volumeInfo']['industryIdentifiers'] = [
+            {'type': 'OTHER', 'identifier': 'UOM:39015012345678'},
+            {'type': 'ISBN_13', 'identifier': '9788328313432'},
+            {'type': 'ISBN_10', 'identifier': '83-283-1343-X'},
+        ]
+        self.assertEqual(parse_volume(item)['isbn'], '9788328313439')
+        item['volumeInfo']['industryIdentifiers'] = [{'type': 'OTHER', 'identifier': 'UOM:39015012345678'}]
+        self.assertIsNone(parse_volume(item))
+
+    def test_fills_incomplete_data(self) -> None:
+        book = parse_volume(volume('Title', '9788328313439', authors=(), published='1999', image=False))
+        self.assertEqual(book['author'], 'Unknown')
+        self.assertEqual(book['pub_date'], '1999-01-01')
+        self.assertEqual(book['cover_url'], NO_COVER_URL)
+
+    def test_skips_volume_without_identifiers(self) -> None:
+        item = volume('Title', '9788328313439')
+        del item['volumeInfo']['industryIdentifiers']
+        self.assertIsNone(parse_volume(item))
+
+
+@override_settings(IMPORT_JOBS_EAGER=True)
+class ImportBookMaxResultsTest(GoogleBooksStubMixin, TestCase):
+
+    def test_imports_requested_number_of_volumes(self) -> None:
+        response = self.client.get(reverse('import-book'), {'search_phrase': 'many:200', 'max_results': 120})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Book.objects.count(), 120)
+
+
+class ResponseCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        self.server = GoogleBooksStubServer().start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def make_client(self, **cache_options):
+        return GoogleBooksClient(base_url=self.server.url, cache=ResponseCache(**cache_options))
+
+    def test_repeated_search_skips_network(self) -> None:
+        client = self.make_client()
+        first = client.search('many:100', max_volumes=100)
+        requests_made = len(self.server.requests)
+        self.assertEqual(client.search('  MANY:100 ', max_volumes=100), first)
+        self.assertEqual(len(self.server.requests), requests_made)
+        self.assertEqual(client.cache.stats(), {'hits': 3, 'misses': 3, 'entries': 3})
+        self.assertEqual(ResponseCache().stats(), client.cache.stats(), 'counters are shared')
+
+    def test_only_missing_pages_are_fetched(self) -> None:
+        client = self.make_client()
+        client.search('many:100', max_volumes=40)
+        client.search('many:100', max_volumes=100)
+        self.assertCountEqual([params['startIndex'] for params in self.server.requests], ['0', '40', '80'])
+
+    def test_expired_entries_are_refetched(self) -> None:
+        client = self.make_client(ttl=0)
+        client.search('python')
+        client.search('python')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_pages_older_than_the_ttl_are_refetched_despite_hits(self) -> None:
+        client = self.make_client()
+        client.search('python')
+        with mock.patch('core.google_books.time.time', return_value=time.time() + client.cache.ttl + 1):
+            client.search('python')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_command_reports_and_clears(self) -> None:
+        client = self.make_client()
+        client.search('python')
+        client.search('python')
+        stdout = StringIO()
+        call_command('google_books_cache', '--clear', stdout=stdout)
+        self.assertIn('1 cached pages, 1 hits, 1 misses (50% hit ratio).', stdout.getvalue())
+        client.search('python')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(client.cache.stats(), {'hits': 0, 'misses': 1, 'entries': 1})
@@ -0,0 +1,177 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core.importer import import_books
+from core.isbn import isbn13, known_isbns
+from core.models import Author, Book
+from core.testing import QueryBudgetMixin
+
+
+def book_data(number, author='Author', **extra):
+    data = {
+        'title': f'Book {number}',
+        'author': author,
+        'pub_date': '2001-01-01',
+        'isbn': isbn13(f'978{number:09d}'),
+        'pages': 100,
+        'cover_url': 'http://cover_url.pl/',
+        'language': 'pl',
+    }
+    data.update(extra)
+    return data
+
+
+class ImportBooksTest(QueryBudgetMixin, TestCase):
+
+    def setUp(self) -> None:
+        # Forget the ISBNs of other tests' rolled back books.
+        known_isbns.clear()
+
+    def test_query_count_does_not_grow_with_batch_size(self) -> None:
+        Author.objects.create(name='Author 0')
+        # Loaded once per process, not per batch.
+        known_isbns.refresh()
+        # Two of these are the transaction's savepoint and its release, four
+        # keep the catalog statistics up to date.
+        with self.assertQueryBudget(12):
+            result = import_books([book_data(number, author=f'Author {number % 5}') for number in range(200)])
+        self.assertEqual(result.inserted, 200)
+        self.assertEqual(Book.objects.count(), 200)
+        self.assertEqual(Author.objects.count(), 5)
+
+    def test_known_isbns_are_skipped(self) -> None:
+        import_books([book_data(1), book_data(2)])
+        result = import_books([book_data(2), book_data(3), book_data(3, title='Same ISBN')])
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(Book.objects.count(), 3)
+
+    def test_isbns_are_normalized(self) -> None:
+        result = import_books([
+            book_data(1, isbn='0-306-40615-2'),
+            book_data(2, isbn='978-0-306-40615-7'),
+            book_data(3, isbn='9780306406158'),
+        ])
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(Book.objects.get().isbn, '9780306406157')
+
+    def test_only_isbns_the_filter_may_know_are_looked_up(self) -> None:
+        import_books([book_data(1)])
+        with self.assertQueryBudget(20) as queries:
+            result = import_books([book_data(1), book_data(2)])
+        self.assertEqual((result.inserted, result.skipped), (1, 1))
+        lookups = [sql for sql, duration in queries.queries if '"isbn" IN' in sql]
+        self.assertEqual(len(lookups), 1)
+        self.assertIn('"isbn" IN (%s)', lookups[0])
+
+    def test_books_missing_from_the_filter_are_skipped(self) -> None:
+        import_books([book_data(1)])
+        # Stored behind the importer's back, after the filter's last refresh.
+        Book.objects.create(**dict(book_data(2), author=Author.objects.get()))
+        known_isbns.updated_since = Book.objects.latest('updated_at').updated_at + timedelta(seconds=1)
+        result = import_books([book_data(2), book_data(3)])
+        self.assertEqual((result.inserted, result.skipped), (1, 1))
+        self.assertEqual(Book.objects.count(), 3)
+
+    def test_invalid_rows_are_skipped(self) -> None:
+        result = import_books([
+            book_data(1, pub_date=''),
+            book_data(2, title=None),
+            book_data(3, isbn='97800000000001'),
+            book_data(4),
+        ])
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual(result.skipped, 3)
+
+    def test_existing_authors_are_reused(self) -> None:
+        author = Author.objects.create(name='Tolkien')
+        import_books([book_data(1, author='Tolkien'), book_data(2, author='Tolkien')])
+        self.assertEqual(Author.objects.count(), 1)
+        self.assertEqual(author.book_set.count(), 2)
+
+    def test_imported_books_are_searchable(self) -> None:
+        import_books([book_data(1, title='The Silmarillion')])
+        self.assertTrue(Book.objects.filter(title='The Silmarillion').exists())
+        response = self.client.get('/find-book', {'q': 'silmar'})
+        self.assertEqual([book.title for book in response.context['page_obj']], ['The Silmarillion'])
+
+
+class ImportBooksCommandTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def book(self, number, **extra):
+        return book_data(number, **dict({'cover_url': 'http://covers.example.com/cover.jpg'}, **extra))
+
+    def test_csv_import_with_rejected_rows(self) -> None:
+        path = self.write('books.csv', '\n'.join([
+            'title,author,pub_date,isbn,pages,cover_url,language',
+            'The Hobbit,Tolkien,1937-09-21,9780000000019,310,http://covers.example.com/1.jpg,en',
+            'Silmarillion,Tolkien,1977-09-15,9780000000026,365,http://covers.example.com/2.jpg,en',
+            'Bad date,Tolkien,1977-9-15,9780000000033,365,http://covers.example.com/3.jpg,en',
+            'Bad isbn,Tolkien,1977-09-15,978000000000,365,http://covers.example.com/4.jpg,en',
+            'Bad language,Tolkien,1977-09-15,9780000000057,365,http://covers.example.com/5.jpg,xx',
+            'No author,,1977-09-15,9780000000064,365,http://covers.example.com/6.jpg,en',
+        ]))
+        output = StringIO()
+        call_command('import_books', path, '--batch-size', '2', stdout=output)
+
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), ['Silmarillion', 'The Hobbit'])
+        self.assertEqual(Author.objects.count(), 1)
+        self.assertIn('2 inserted, 0 updated, 4 rejected', output.getvalue())
+        self.assertIn('rows/s', output.getvalue())
+
+        with open(path + '.rejected.ndjson', encoding='utf-8') as file:
+            rejected = [json.loads(line) for line in file]
+        self.assertEqual([row['line'] for row in rejected], [4, 5, 6, 7])
+        self.assertEqual(list(rejected[0]['errors']), ['pub_date'])
+        self.assertEqual(list(rejected[1]['errors']), ['isbn'])
+        self.assertEqual(list(rejected[2]['errors']), ['language'])
+        self.assertEqual(list(rejected[3]['errors']), ['author'])
+        self.assertEqual(rejected[0]['row']['title'], 'Bad date')
+
+    def test_ndjson_import_updates_known_isbns(self) -> None:
+        import_books([self.book(1, author='Old Author')])
+        rows = [
+            self.book(1, author='New Author', title='Renamed', pages=5),
+            self.book(2),
+            self.book(3, pages=-1),
+            self.book(4, author=5),
+            self.book(5, author=None),
+            self.book(6, pub_date=2000010101),
+        ]
+        path = self.write('books.ndjson', '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+        rejects = os.path.join(self.directory.name, 'rejects.ndjson')
+        call_command('import_books', path, '--rejects', rejects, verbosity=0, stdout=StringIO())
+
+        book = Book.objects.get(isbn=book_data(1)['isbn'])
+        self.assertEqual((book.title, book.author.name, book.pages), ('Renamed', 'New Author', 5))
+        self.assertEqual(Book.objects.count(), 2)
+        with open(rejects, encoding='utf-8') as file:
+            rejected = [json.loads(line) for line in file]
+        self.assertEqual([row['line'] for row in rejected], [3, 4, 5, 6, 7])
+        self.assertEqual([list(row['errors']) for row in rejected[1:4]], [['author'], ['author'], ['pub_date']])
+
+    def test_export_can_be_imported(self) -> None:
+        import_books([self.book(1), self.book(2)])
+        content = b''.join(self.client.get(reverse('export-books')).streaming_content).decode()
+        Book.objects.all().delete()
+        call_command('import_books', self.write('export.csv', content), verbosity=0, stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, 'export.csv.rejected.ndjson')))
@@ -0,0 +1,124 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.instrumentation import QueryBudgetMiddleware, query_shape, record_queries
+from core.models import Author, Book
+from core.testing import QueryBudgetMixin
+
+
+class QueryRecorderTest(TestCase):
+
+    def test_query_shape_ignores_parameters(self) -> None:
+        self.assertEqual(
+            query_shape('SELECT * FROM core_author WHERE id IN (%s, %s, %s) AND name = \'x\' LIMIT 21'),
+            query_shape('SELECT * FROM core_author WHERE id IN (%s) AND name = \'y\' LIMIT 5'),
+        )
+
+    async def test_queries_of_async_code_are_recorded(self) -> None:
+        with record_queries() as recorder:
+            await sync_to_async(Author.objects.create)(name='Tolkien')
+            await sync_to_async(Author.objects.count)()
+        self.assertEqual(recorder.count, 2)
+
+    def test_repeated_queries_are_reported_as_duplicates(self) -> None:
+        author = Author.objects.create(name='Tolkien')
+        with record_queries() as recorder:
+            for _ in range(3):
+                Author.objects.get(id=author.id)
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(list(recorder.duplicates().values()), [3])
+        self.assertGreater(recorder.duration, 0)
+
+    def test_transactions_and_batches_are_not_duplicates(self) -> None:
+        authors = [Author.objects.create(name=f'Author {index}') for index in range(4)]
+        with record_queries() as recorder:
+            for number in range(3):
+                with transaction.atomic():
+                    Author.objects.bulk_create(
+                        [Author(name=f'Author {number}-{index}', name_key=f'author {number} {index}')
+                         for index in range(4)], batch_size=2)
+                    for author in authors:
+                        author.name += '!'
+                    Author.objects.bulk_update(authors, ['name'], batch_size=2)
+        self.assertGreater(recorder.count, 9)
+        self.assertEqual(recorder.duplicates(), {})
+
+        with record_queries() as recorder:
+            for number in range(3):
+                Author.objects.create(name=f'Single {number}')
+        self.assertEqual(list(recorder.duplicates().values()), [3])
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(12):
+            author = Author.objects.create(name=f'Author {number}')
+            Book.objects.create(
+                title=f'Book {number:02d}',
+                author=author,
+                pub_date='2000-01-01',
+                isbn=f'{number:013d}',
+                pages=133,
+                cover_url='http://cover_url.pl/',
+                language='pl',
+            )
+
+    def test_response_headers(self) -> None:
+        response = self.client.get(reverse('find-book'))
+        self.assertGreater(int(response['X-DB-Query-Count']), 0)
+        self.assertGreaterEqual(float(response['X-DB-Time-Ms']), 0)
+        self.assertEqual(response['X-DB-Duplicate-Queries'], '0')
+
+    def test_n_plus_one_is_flagged(self) -> None:
+        def n_plus_one_view(request):
+            return HttpResponse(', '.join(str(book) for book in Book.objects.all()))
+
+        middleware = QueryBudgetMiddleware(n_plus_one_view)
+        with self.assertLogs('core.queries', level='WARNING') as logs:
+            response = middleware(RequestFactory().get('/'))
+        self.assertEqual(response['X-DB-Query-Count'], '13')
+        self.assertEqual(response['X-DB-Duplicate-Queries'], '12')
+        self.assertIn('Possible N+1', logs.output[-1])
+
+    def test_n_plus_one_fails_budget(self) -> None:
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(20):
+                [str(book) for book in Book.objects.all()]
+
+    @override_settings(FIND_BOOK_CACHE_TIMEOUT=0)
+    def test_find_book_budget(self) -> None:
+        with self.assertQueryBudget(3):
+            self.client.get(reverse('find-book'))
+        with self.assertQueryBudget(4):
+            self.client.get(reverse('find-book'), {'q': 'book', 'author': 'author', 'language': 'pl'})
+
+    def test_cached_find_book_budget(self) -> None:
+        self.client.get(reverse('find-book'), {'language': 'pl'})
+        # One read for the generation counter, one for the rendered page.
+        with self.assertQueryBudget(2):
+            self.client.get(reverse('find-book'), {'language': 'pl'})
+
+    def test_add_book_budget(self) -> None:
+        with self.assertQueryBudget(2):
+            self.client.get(reverse('add-book'))
+
+    def test_update_book_budget(self) -> None:
+        book = Book.objects.first()
+        with self.assertQueryBudget(2):
+            self.client.get(reverse('update-book', kwargs={'pk': book.id}))
+
+    def test_api_budget(self) -> None:
+        book = Book.objects.first()
+        # The page's ids and validators, then its columns by id.
+        with self.assertQueryBudget(2):
+            self.client.get('/api/books/')
+        with self.assertQueryBudget(2):
+            self.client.get(f'/api/books/{book.id}/')
+        # Paginated by page number: the planner's row estimate, then COUNT(*) for a table this small.
+        with self.assertQueryBudget(4):
+            self.client.get('/api/author/')
@@ -0,0 +1,69 @@
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.isbn import BloomFilter, isbn13, normalize_isbn
+from core.models import Author, Book
+
+
+class NormalizeISBNTest(SimpleTestCase):
+
+    def test_isbn_13(self) -> None:
+        for value in ('9780306406157', '978-0-306-40615-7', 'ISBN 978 0 306 40615 7', 'isbn:9780306406157'):
+            self.assertEqual(normalize_isbn(value), '9780306406157', value)
+
+    def test_isbn_10_is_converted(self) -> None:
+        self.assertEqual(normalize_isbn('0-306-40615-2'), '9780306406157')
+        self.assertEqual(normalize_isbn('832831343x'), '9788328313439')
+
+    def test_invalid_numbers(self) -> None:
+        for value in ('9780306406158', '0306406153', '1212121212121', '97803064061', 'UOM:39015012345678', ''):
+            with self.assertRaises(ValidationError, msg=value):
+                normalize_isbn(value)
+
+
+class BloomFilterTest(SimpleTestCase):
+
+    def test_no_false_negatives_and_few_false_positives(self) -> None:
+        bloom = BloomFilter(10000, error_rate=0.01)
+        stored = [isbn13(f'978{number:09d}') for number in range(10000)]
+        for isbn in stored:
+            bloom.add(isbn)
+
+        self.assertTrue(all(isbn in bloom for isbn in stored))
+        false_positives = sum(isbn13(f'979{number:09d}') in bloom for number in range(10000))
+        self.assertLess(false_positives, 200)
+        self.assertLess(len(bloom.bits), 10000 * 10 // 8 + 1)
+
+
+class NormalizeISBNsMigrationTest(TestCase):
+
+    def test_stored_isbns_are_normalized(self) -> None:
+        author = Author.objects.create(name='Stanisław Lem')
+        for title, isbn in (('Solaris', '0-306-40615-2'), ('Fiasco', '978-83-283-1343-9'), ('Eden', '832831343X'),
+                            ('Cyberiad', 'UOM:3901501'), ('Mort', '9780000000002')):
+            Book.objects.create(title=title, author=author, isbn=isbn, pages=100, cover_url='http://cover.pl/',
+                                language='pl')
+
+        migration = import_module('core.migrations.0011_normalize_book_isbns')
+        with mock.patch('sys.stdout', new_callable=StringIO) as stdout:
+            migration.normalize_isbns(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(dict(Book.objects.values_list('title', 'isbn')), {
+            'Solaris': '9780306406157',
+            'Fiasco': '978-83-283-1343-9',
+            'Eden': '832831343X',
+            'Cyberiad': 'UOM:3901501',
+            'Mort': '9780000000002',
+        })
+        report = stdout.getvalue()
+        self.assertIn("invalid ISBN, 'UOM:3901501'", report)
+        self.assertIn('(978-83-283-1343-9), #', report)
+        self.assertIn('are all ISBN 9788328313439', report)
+        self.assertEqual(report.count('Book'), 2)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.jobs import claim_job, claim_next_job
+from core.models import Book, ImportJob
+from tests.google_books_stub import GoogleBooksStubMixin
+
+
+class ImportJobQueueTest(GoogleBooksStubMixin, TestCase):
+
+    def test_view_queues_job_without_importing(self) -> None:
+        api_requests = len(self.google_books.requests)
+        response = self.client.get(reverse('import-book'), {'search_phrase': 'python'})
+        self.assertEqual(response.status_code, 200)
+        messages = list(response.context['messages'])
+        self.assertEqual(str(messages[0]), 'Import has been scheduled.')
+
+        job = response.context['job']
+        self.assertEqual(job.status, ImportJob.PENDING)
+        self.assertEqual(Book.objects.count(), 0)
+        self.assertEqual(len(self.google_books.requests), api_requests)
+        self.assertContains(response, reverse('import-job', kwargs={'pk': job.id}))
+
+    def test_worker_processes_pending_jobs(self) -> None:
+        self.client.get(reverse('import-book'), {'search_phrase': 'python'})
+        self.client.get(reverse('import-book'), {'search_phrase': 'woda'})
+        call_command('import_worker', '--once', stdout=StringIO())
+
+        self.assertEqual(Book.objects.count(), 5)
+        self.assertFalse(ImportJob.objects.exclude(status=ImportJob.DONE).exists())
+
+    def test_progress_endpoint(self) -> None:
+        response = self.client.get(reverse('import-book'), {'search_phrase': 'python', 'max_results': 10})
+        url = reverse('import-job', kwargs={'pk': response.context['job'].id})
+        self.assertEqual(self.client.get(url).json()['status'], 'pending')
+
+        call_command('import_worker', '--once', stdout=StringIO())
+
+        progress = self.client.get(url).json()
+        self.assertEqual(progress['status'], 'done')
+        self.assertTrue(progress['finished'])
+        self.assertEqual((progress['fetched'], progress['inserted'], progress['skipped']), (3, 3, 0))
+
+    def test_progress_endpoint_for_unknown_job(self) -> None:
+        response = self.client.get(reverse('import-job', kwargs={'pk': 404}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(GOOGLE_BOOKS_API_URL='http://127.0.0.1:9/volumes')
+    def test_failed_job_records_error(self) -> None:
+        job = ImportJob.objects.create(search_phrase='python', max_results=10)
+        call_command('import_worker', '--once', stdout=StringIO(), stderr=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_is_claimed_once(self) -> None:
+        job = ImportJob.objects.create(search_phrase='python', max_results=10)
+        other_worker_copy = ImportJob.objects.get(id=job.id)
+        self.assertTrue(claim_job(job))
+        self.assertEqual(job.status, ImportJob.RUNNING)
+        self.assertFalse(claim_job(other_worker_copy))
+        self.assertIsNone(claim_next_job())
+
+    @override_settings(IMPORT_JOB_LEASE_SECONDS=60)
+    def test_jobs_of_dead_workers_are_reclaimed(self) -> None:
+        pending = ImportJob.objects.create(search_phrase='pending', max_results=10)
+        stale = ImportJob.objects.create(search_phrase='stale', max_results=10, status=ImportJob.RUNNING)
+        running = ImportJob.objects.create(search_phrase='running', max_results=10, status=ImportJob.RUNNING)
+        ImportJob.objects.filter(id=stale.id).update(updated_at=timezone.now() - timedelta(seconds=61))
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(claim_next_job().id, stale.id)
+        self.assertEqual(claim_next_job().id, pending.id)
+        self.assertIsNone(claim_next_job(), f'job {running.id} is still leased')
+
+
+@override_settings(IMPORT_JOBS_EAGER=True)
+class AsyncImportTest(GoogleBooksStubMixin, TestCase):
+
+    async def test_eager_import_under_asgi(self) -> None:
+        # AsyncClient.get() of Django 3.2.5 drops the data argument, so the query goes into the path.
+        response = await self.async_client.get(f"{reverse('import-book')}?search_phrase=python")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([str(message) for message in response.context['messages']],
+                         ['Books have been added to database.'])
+        self.assertEqual(response.context['job'].status, ImportJob.DONE)
+        self.assertEqual(await sync_to_async(Book.objects.count)(), 3)
+        self.assertGreater(int(response['X-DB-Query-Count']), 0)
+
+    @override_settings(GOOGLE_BOOKS_API_URL='http://127.0.0.1:9/volumes')
+    async def test_unavailable_api_under_asgi(self) -> None:
+        response = await self.async_client.get(f"{reverse('import-book')}?search_phrase=python")
+        self.assertEqual([str(message) for message in response.context['messages']],
+                         ['Google Books API is not available, please try again later.'])
+        job = await sync_to_async(ImportJob.objects.get)()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertTrue(job.error)
@@ -0,0 +1,77 @@
+import io
+from collections import Counter
+
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.test import TestCase
+
+from core.loadtest import (
+    DEFAULT_SCENARIO, LOADTEST_ISBN_PREFIX, LoadTest, histogram, load_log, load_scenario, next_isbn_number,
+    run_worker, summarize,
+)
+from core.models import Book
+from core.seed import seed_catalog
+
+
+class RequestSourceTest(TestCase):
+
+    def test_load_scenario(self) -> None:
+        specs = load_scenario(io.StringIO('[{"path": "/find-book", "weight": 3}, '
+                                          '{"method": "post", "path": "/add-book", "data": {"title": "{n}"}}]'))
+        self.assertEqual([(spec.method, spec.path, spec.weight) for spec in specs],
+                         [('GET', '/find-book', 3), ('POST', '/add-book', 1.0)])
+        self.assertEqual(specs[1].data, {'title': '{n}'})
+
+    def test_load_log_reads_ndjson_and_access_log_lines(self) -> None:
+        log = io.StringIO(
+            '{"method": "POST", "path": "/add-book", "data": {"title": "A"}}\n'
+            '\n'
+            '10.0.0.1 - - [10/Oct/2026:13:55:36 +0000] "GET /api/books/?page=2 HTTP/1.1" 200 512 "-" "curl/8.0"\n'
+            '10.0.0.1 - - [10/Oct/2026:13:55:37 +0000] "POST /add-book HTTP/1.1" 200 2326 "-" "Mozilla/5.0"\n'
+        )
+        self.assertEqual([(spec.method, spec.path, spec.data) for spec in load_log(log)], [
+            ('POST', '/add-book', {'title': 'A'}),
+            ('GET', '/api/books/?page=2', None),
+        ])
+
+
+class LoadTestTest(TestCase):
+
+    def setUp(self) -> None:
+        # Like the test client, keep the test's connection open across requests.
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+    def test_replayed_requests_are_reported_per_url_name(self) -> None:
+        seed_catalog(20)
+        load_test = LoadTest(specs=DEFAULT_SCENARIO, workers=1, replay=True,
+                             isbn_start=next_isbn_number(), book_ids=[Book.objects.first().id])
+
+        stats = run_worker(load_test, 0)
+
+        self.assertEqual(sorted(stats), ['add-book', 'author-list', 'book-detail', 'book-list', 'find-book'])
+        self.assertEqual(stats['find-book']['statuses'], Counter({200: 3}))
+        self.assertEqual(len(stats['find-book']['latencies']), 3)
+        self.assertEqual(sum(entry['errors'] for entry in stats.values()), 0)
+        self.assertTrue(Book.objects.filter(isbn__startswith=LOADTEST_ISBN_PREFIX, title='Load test 6').exists())
+        self.assertEqual(next_isbn_number(), 7)
+
+    def test_weighted_requests_follow_the_count(self) -> None:
+        load_test = LoadTest(specs=DEFAULT_SCENARIO[:1], workers=3, requests=7)
+        self.assertEqual(run_worker(load_test, 0)['find-book']['statuses'], Counter({200: 3}))
+        self.assertEqual(run_worker(load_test, 2)['find-book']['statuses'], Counter({200: 2}))
+
+    def test_summarize(self) -> None:
+        self.assertEqual(histogram([0.5, 1, 1.5, 30, 9000]), [2, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1])
+        stats = {
+            'book-list': {'latencies': [4.0, 8.0], 'statuses': Counter({200: 2}), 'errors': 0},
+            'add-book': {'latencies': [30.0], 'statuses': Counter({500: 1}), 'errors': 1},
+        }
+        report = summarize(stats, elapsed=2.0)
+        self.assertEqual(list(report['urls']), ['add-book', 'book-list'])
+        self.assertEqual(report['total']['requests'], 3)
+        self.assertEqual(report['total']['throughput_rps'], 1.5)
+        self.assertEqual(report['total']['error_rate'], 0.3333)
+        self.assertEqual(report['total']['p50_ms'], 8.0)
+        self.assertEqual(report['urls']['add-book']['statuses'], {'500': 1})
+        self.assertEqual(report['urls']['book-list']['max_ms'], 8.0)
@@ -1,4 +1,7 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.urls import reverse
 from core.models import Author, Book
 
 
@@ -34,6 +37,19 @@ class AuthorModelTestCase(TestCase):
         expected_obj_name = f'{author.name}'
         self.assertEqual(str(author), expected_obj_name)
 
+    def test_clean_rejects_duplicate_name_key(self) -> None:
+        with self.assertRaises(ValidationError) as error:
+            Author(name=' TOLKIEN.').full_clean()
+        self.assertIn('name', error.exception.message_dict)
+        Author.objects.get(id=1).full_clean()
+
+    def test_admin_rejects_duplicate_name(self) -> None:
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.post(reverse('admin:core_author_add'), {'name': 'tolkien'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'An author with this name already exists.')
+        self.assertEqual(Author.objects.count(), 1)
+
 
 class BookModelTestCase(TestCase):
 
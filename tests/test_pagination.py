@@ -0,0 +1,185 @@
+from django.contrib.auth.models import User
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Author, Book
+from core.pagination import EstimatedCountPaginator, InvalidCursor, KeysetPaginator, estimated_count
+from core.testing import QueryBudgetMixin
+
+
+class KeysetPaginatorTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Tolkien')
+        # Duplicate titles make sure the id tiebreaker keeps pages disjoint.
+        for number in range(25):
+            Book.objects.create(
+                title=f'Book {number % 10}',
+                author=author,
+                pub_date='2000-01-01',
+                isbn=f'{number:013d}',
+                pages=133,
+                cover_url='http://cover_url.pl/',
+                language='pl',
+            )
+
+    def walk_forward(self, paginator):
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return pages
+
+    def test_pages_cover_every_book_once_in_order(self) -> None:
+        pages = self.walk_forward(KeysetPaginator(Book.objects.all(), 10))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        books = [book for page in pages for book in page]
+        self.assertEqual(books, list(Book.objects.order_by('title', 'id')))
+
+    def test_previous_cursor_returns_previous_page(self) -> None:
+        paginator = KeysetPaginator(Book.objects.all(), 10)
+        pages = self.walk_forward(paginator)
+        self.assertFalse(pages[0].has_previous())
+        previous = paginator.page(pages[2].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        first = paginator.page(previous.previous_cursor)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous())
+
+    def test_descending_ordering(self) -> None:
+        pages = self.walk_forward(KeysetPaginator(Book.objects.all(), 7, ordering=('-title', 'id')))
+        books = [book for page in pages for book in page]
+        self.assertEqual(books, list(Book.objects.order_by('-title', 'id')))
+
+    def test_deep_page_does_not_count_or_offset(self) -> None:
+        paginator = KeysetPaginator(Book.objects.all(), 10)
+        cursor = self.walk_forward(paginator)[1].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            paginator.page(cursor)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+        self.assertNotIn('OFFSET', queries[0]['sql'].upper())
+
+    def test_tampered_cursor_is_rejected(self) -> None:
+        paginator = KeysetPaginator(Book.objects.all(), 10)
+        with self.assertRaises(InvalidCursor):
+            paginator.page('not-a-cursor')
+        self.assertEqual(list(paginator.get_page('not-a-cursor')), list(paginator.page()))
+
+
+class CursorPaginationViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Tolkien')
+        for number in range(15):
+            Book.objects.create(
+                title=f'Book {number:02d}',
+                author=author,
+                pub_date='2000-01-01',
+                isbn=f'{number:013d}',
+                pages=133,
+                cover_url='http://cover_url.pl/',
+                language='pl',
+            )
+
+    def test_find_book_follows_next_cursor(self) -> None:
+        response = self.client.get(reverse('find-book'), {'language': 'pl'})
+        page = response.context['page_obj']
+        self.assertTrue(page.has_next())
+        self.assertContains(response, f'cursor={page.next_cursor}')
+        self.assertContains(response, 'language=pl')
+
+        response = self.client.get(reverse('find-book'), {'language': 'pl', 'cursor': page.next_cursor})
+        self.assertEqual([book.title for book in response.context['page_obj']],
+                         [f'Book {number:02d}' for number in range(10, 15)])
+
+    def test_api_books_follows_next_link(self) -> None:
+        response = self.client.get('/api/books/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.json())
+        self.assertIsNone(response.json()['previous'])
+        titles = [book['title'] for book in response.json()['results']]
+
+        response = self.client.get(response.json()['next'])
+        titles += [book['title'] for book in response.json()['results']]
+        self.assertIsNone(response.json()['next'])
+        self.assertIsNotNone(response.json()['previous'])
+        self.assertEqual(titles, [f'Book {number:02d}' for number in range(15)])
+
+    def test_api_books_rejects_invalid_cursor(self) -> None:
+        response = self.client.get('/api/books/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=1000)
+class EstimatedCountPaginatorTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(30):
+            Book.objects.create(
+                title=f'Book {number:02d}',
+                author=Author.objects.create(name=f'Author {number}'),
+                pub_date='2000-01-01',
+                isbn=f'{number:013d}',
+                pages=100 + number,
+                cover_url='http://cover_url.pl/',
+                language='pl',
+            )
+
+    def set_estimate(self, table, rows):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('UPDATE sqlite_stat1 SET stat = %s WHERE tbl = %s', [f'{rows} 1', table])
+
+    def test_large_tables_use_the_estimate(self) -> None:
+        self.set_estimate('core_book', 5000)
+        self.assertEqual(estimated_count(Book), 5000)
+        paginator = EstimatedCountPaginator(Book.objects.all(), 10)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(paginator.num_pages, 500)
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'].upper()])
+
+    def test_small_and_filtered_sets_are_counted(self) -> None:
+        self.set_estimate('core_book', 500)
+        self.assertEqual(EstimatedCountPaginator(Book.objects.all(), 10).count, 30)
+        self.set_estimate('core_book', 5000)
+        self.assertEqual(EstimatedCountPaginator(Book.objects.filter(pages__lt=110), 10).count, 10)
+
+    def test_pages_past_the_estimate(self) -> None:
+        self.set_estimate('core_book', 2000)
+        paginator = EstimatedCountPaginator(Book.objects.order_by('id'), 10)
+        with self.assertRaises(EmptyPage):
+            paginator.page(50)
+        self.assertEqual(len(paginator.page(3)), 10)
+        # Falls back to an exact count to find the real last page.
+        page = EstimatedCountPaginator(Book.objects.order_by('id'), 10).get_page(50)
+        self.assertEqual((page.number, page.paginator.count), (3, 30))
+
+        self.set_estimate('core_book', 1000)
+        paginator = EstimatedCountPaginator(Book.objects.order_by('id'), 25)
+        self.assertEqual(paginator.num_pages, 40)
+        self.assertEqual(len(paginator.page(2)), 5)
+
+    def test_admin_changelist(self) -> None:
+        self.set_estimate('core_book', 5000)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        with self.assertQueryBudget(10) as queries:
+            response = self.client.get(reverse('admin:core_book_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Author 24')
+        executed = [sql for sql, duration in queries.queries]
+        self.assertFalse([sql for sql in executed if 'COUNT(' in sql.upper() and 'core_book' in sql])
+        self.assertFalse([sql for sql in executed if sql.startswith('SELECT') and 'FROM "core_author"' in sql])
+
+    def test_author_api_count(self) -> None:
+        response = self.client.get('/api/author/')
+        self.assertEqual(response.json()['count'], 30)
+        self.set_estimate('core_author', 80000)
+        response = self.client.get('/api/author/', {'page': 3})
+        self.assertEqual(response.json()['count'], 80000)
+        self.assertEqual(len(response.json()['results']), 10)
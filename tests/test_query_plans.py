@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Subquery
+from django.test import TestCase
+
+from core.isbn import isbn13
+from core.models import Book
+from core.query_plans import capture_statements, explain, full_scans
+from core.seed import book_data, seed_catalog
+
+
+class SeedTest(TestCase):
+
+    def test_seeded_books_are_deterministic_with_valid_isbns(self) -> None:
+        self.assertEqual(book_data(42, authors=10), book_data(42, authors=10))
+        self.assertEqual(isbn13('978030640615'), '9780306406157')
+        self.assertEqual(seed_catalog(120, authors=7, batch_size=50), 120)
+        self.assertEqual(Book.objects.count(), 120)
+        self.assertEqual(Book.objects.values('author').distinct().count(), 7)
+        seed_catalog(10, start=120)
+        self.assertEqual(Book.objects.count(), 130)
+
+
+class QueryPlanTest(TestCase):
+
+    def plan_scans(self, queryset):
+        with capture_statements() as statements:
+            list(queryset)
+        alias, sql, params = statements[0]
+        return full_scans(connection, sql, explain(connection, sql, params), {'core_book'})
+
+    def test_full_scan_is_detected(self) -> None:
+        self.assertEqual(self.plan_scans(Book.objects.filter(cover_url='http://cover.pl/')), ['core_book'])
+        self.assertEqual(self.plan_scans(Book.objects.filter(language='pl', pub_date__gte='2000-01-01')), [])
+        self.assertEqual(self.plan_scans(Book.objects.order_by('id')[:10]), [])
+        # A filtered subquery in the select list doesn't filter the outer scan.
+        latest = Subquery(Book.objects.filter(isbn='9780306406157').values('updated_at')[:1])
+        self.assertEqual(self.plan_scans(Book.objects.order_by('id').annotate(latest=latest)[:10]), [])
+        filtered = Book.objects.order_by('id').filter(cover_url='http://cover.pl/').annotate(latest=latest)
+        self.assertEqual(self.plan_scans(filtered[:10]), ['core_book'])
+
+    def test_views_use_indexes(self) -> None:
+        output = StringIO()
+        call_command('check_query_plans', '--books', '500', stdout=output)
+        self.assertIn('Every query uses an index.', output.getvalue())
+        self.assertEqual(Book.objects.count(), 0)
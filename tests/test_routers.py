@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from core.models import Author, Book
+from core.routers import routing
+from core.search import BookSearch
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    # Without TestCase's transaction, which keeps every read on the primary.
+    databases = {'default'}
+
+    def test_reads_of_safe_requests_go_to_replicas_until_a_write(self) -> None:
+        with routing(use_replicas=True) as state:
+            self.assertEqual(router.db_for_read(Book), 'replica')
+            self.assertEqual(router.db_for_write(Book), 'default')
+            self.assertTrue(state.wrote)
+            self.assertEqual(router.db_for_read(Book), 'default')
+
+    def test_reads_stay_on_the_primary(self) -> None:
+        self.assertEqual(router.db_for_read(Book), 'default', 'outside of requests')
+        with routing(use_replicas=False):
+            self.assertEqual(router.db_for_read(Book), 'default')
+        with routing(use_replicas=True):
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Book), 'default')
+            book = Book()
+            book._state.db = 'default'
+            self.assertEqual(router.db_for_read(Book, instance=book), 'default', 'related objects of a primary row')
+            self.assertEqual(router.db_for_read(caches['find_book'].cache_model_class), 'default')
+
+    def test_cache_writes_dont_pin(self) -> None:
+        with routing(use_replicas=True) as state:
+            router.db_for_write(caches['find_book'].cache_model_class)
+            self.assertFalse(state.wrote)
+
+    def test_search_checks_read_from_the_routed_database(self) -> None:
+        with mock.patch.object(router, 'db_for_read', return_value='default') as db_for_read:
+            self.assertFalse(BookSearch(author='Nobody').exists())
+        db_for_read.assert_called_once_with(Book)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self) -> None:
+        with routing(use_replicas=True):
+            self.assertEqual(router.db_for_read(Book), 'default')
+
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_PIN_SECONDS=7)
+class ReplicaRoutingMiddlewareTest(SimpleTestCase):
+
+    @staticmethod
+    def view(request):
+        if 'write' in request.GET:
+            router.db_for_write(Book)
+        return HttpResponse(router.db_for_read(Book))
+
+    def get_response(self, request):
+        return ReplicaRoutingMiddleware(self.view)(request)
+
+    def test_safe_request_reads_from_replica(self) -> None:
+        response = self.get_response(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_client_to_primary(self) -> None:
+        self.assertNotIn(PIN_COOKIE, self.get_response(RequestFactory().post('/')).cookies)
+        response = self.get_response(RequestFactory().post('/?write'))
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 7)
+
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.get_response(request).content, b'default')
+
+    def test_safe_request_writing_pins_client(self) -> None:
+        response = self.get_response(RequestFactory().get('/?write'))
+        self.assertEqual(response.content, b'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class FindBookReplicaTest(TransactionTestCase):
+    # There is no 'replica' database: reading from it fails the request.
+    databases = {'default'}
+
+    def tearDown(self) -> None:
+        caches['find_book'].clear()
+
+    def test_cached_pages_are_filled_from_the_primary(self) -> None:
+        Book.objects.create(title='Mort', author=Author.objects.create(name='Terry Pratchett'), isbn='9780000000001',
+                            pages=243, cover_url='http://cover.pl/', language='en')
+        for _ in range(2):
+            response = self.client.get(reverse('find-book'), {'language': 'en'})
+            self.assertContains(response, 'Mort')
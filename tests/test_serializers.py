@@ -0,0 +1,66 @@
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from core.models import Author, Book
+from core.serializers import AuthorSerializer, BookSerializer, BookValuesSerializer
+from core.testing import QueryBudgetMixin
+
+
+class ValuesSerializerTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Tolkien')
+        for number in range(3):
+            Book.objects.create(
+                title=f'Book {number}',
+                author=cls.author,
+                pub_date='2000-01-01',
+                isbn=f'{number:013d}',
+                pages=133,
+                cover_url='http://cover_url.pl/',
+                language='pl',
+            )
+
+    def test_list_matches_model_serializer(self) -> None:
+        response = self.client.get('/api/books/')
+        request = RequestFactory().get('/api/books/')
+        expected = BookSerializer(Book.objects.order_by('title'), many=True, context={'request': request}).data
+        self.assertEqual(response.json()['results'], [dict(book) for book in expected])
+        self.assertEqual(list(response.json()['results'][0]), list(expected[0]))
+
+    def test_detail_matches_model_serializer(self) -> None:
+        book = Book.objects.first()
+        request = RequestFactory().get('/')
+        self.assertEqual(self.client.get(f'/api/books/{book.id}/').json(),
+                         dict(BookSerializer(book, context={'request': request}).data))
+        self.assertEqual(self.client.get(f'/api/author/{self.author.id}/').json(),
+                         dict(AuthorSerializer(self.author, context={'request': request}).data))
+
+    def test_unknown_detail_is_404(self) -> None:
+        self.assertEqual(self.client.get('/api/books/999999/').status_code, 404)
+
+    def test_sparse_fieldset_selects_only_needed_columns(self) -> None:
+        with self.assertQueryBudget(2) as queries:
+            response = self.client.get('/api/books/', {'fields': 'title,isbn'})
+        self.assertEqual(response.json()['results'][0], {'title': 'Book 0', 'isbn': '0000000000000'})
+        sql = queries.queries[-1][0]
+        self.assertNotIn('cover_url', sql)
+        self.assertNotIn('core_author', sql)
+
+    def test_sparse_fieldset_keeps_pagination_working(self) -> None:
+        response = self.client.get('/api/books/', {'fields': 'isbn'})
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_unknown_field_is_rejected(self) -> None:
+        response = self.client.get('/api/books/', {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': ['Unknown field: secret']})
+
+    def test_urls_are_built_from_templates(self) -> None:
+        serializer = BookValuesSerializer(RequestFactory().get('/'), fields='url,author')
+        self.assertEqual(serializer.columns, ['id', 'author_id'])
+        self.assertEqual(serializer.to_representation({'id': 7, 'author_id': 3}), {
+            'url': 'http://testserver' + reverse('book-detail', kwargs={'pk': 7}),
+            'author': 'http://testserver' + reverse('author-detail', kwargs={'pk': 3}),
+        })
@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import stats
+from core.importer import import_books, upsert_books
+from core.models import Author, Book, CatalogStat
+from core.seed import seed_catalog
+from core.testing import QueryBudgetMixin
+from tests.test_importer import book_data
+
+
+def stored_stats():
+    return {(stat.dimension, stat.key): stat.count for stat in CatalogStat.objects.filter(count__gt=0)}
+
+
+class CatalogStatsTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tolkien = Author.objects.create(name='Tolkien')
+        cls.sapkowski = Author.objects.create(name='Sapkowski')
+
+    def create_book(self, number, author, language='en', pub_date='1954-07-29'):
+        return Book.objects.create(title=f'Book {number}', author=author, pub_date=pub_date,
+                                   isbn=f'978000000000{number}', pages=100,
+                                   cover_url='http://covers.example.com/cover.jpg', language=language)
+
+    def assertStatsMatchRebuild(self):
+        incremental = stored_stats()
+        stats.rebuild()
+        self.assertEqual(incremental, stored_stats())
+
+    def test_model_saves_and_deletes(self) -> None:
+        hobbit = self.create_book(1, self.tolkien, pub_date='1937-09-21')
+        self.create_book(2, self.tolkien)
+        wiedzmin = self.create_book(3, self.sapkowski, language='pl', pub_date='1993-01-01')
+        self.assertEqual(stored_stats(), {
+            ('language', 'en'): 2, ('language', 'pl'): 1,
+            ('year', '1937'): 1, ('year', '1954'): 1, ('year', '1993'): 1,
+            ('author', str(self.tolkien.id)): 2, ('author', str(self.sapkowski.id)): 1,
+        })
+
+        hobbit.language = 'pl'
+        hobbit.author = self.sapkowski
+        hobbit.save()
+        wiedzmin.delete()
+        self.assertEqual(stored_stats()[('language', 'pl')], 1)
+        self.assertEqual(stored_stats()[('author', str(self.sapkowski.id))], 1)
+        self.assertNotIn(('year', '1993'), stored_stats())
+        self.assertStatsMatchRebuild()
+
+    def test_import_paths(self) -> None:
+        import_books([book_data(number, author=f'Author {number % 3}') for number in range(10)])
+        rows = [dict(book_data(number, language='de'), author='Author 9') for number in range(5, 15)]
+        upsert_books(rows)
+        seed_catalog(20, authors=4)
+        # Ten upserted books and three seeded ones.
+        self.assertEqual(stored_stats()[('language', 'de')], 13)
+        self.assertStatsMatchRebuild()
+
+    def test_bulk_api(self) -> None:
+        books = [self.create_book(number, self.tolkien) for number in range(4)]
+        self.client.patch('/api/books/bulk/', [{'id': books[0].id, 'language': 'pl'}], content_type='application/json')
+        self.client.delete('/api/books/bulk/', [books[1].id, books[2].id], content_type='application/json')
+        self.assertEqual(stored_stats()[('language', 'en')], 1)
+        self.assertStatsMatchRebuild()
+
+    def test_deleting_author_removes_their_books(self) -> None:
+        self.create_book(1, self.sapkowski)
+        self.sapkowski.delete()
+        self.assertEqual(stored_stats(), {})
+
+    def test_endpoint(self) -> None:
+        for number in range(3):
+            self.create_book(number, self.tolkien, pub_date=f'19{50 + number}-01-01')
+        self.create_book(3, self.sapkowski, language='pl')
+
+        with self.assertQueryBudget(2):
+            response = self.client.get('/api/stats/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['languages'], [{'language': 'en', 'count': 3}, {'language': 'pl', 'count': 1}])
+        self.assertEqual(data['years'][0], {'year': 1950, 'count': 1})
+        self.assertEqual(data['authors'][0]['name'], 'Tolkien')
+        self.assertEqual(data['authors'][0]['count'], 3)
+        self.assertTrue(data['authors'][0]['url'].endswith(f'/api/author/{self.tolkien.id}/'))
+
+        response = self.client.get('/api/stats/', {'dimension': 'author', 'limit': 1})
+        self.assertEqual(list(response.json()), ['authors'])
+        self.assertEqual(len(response.json()['authors']), 1)
+        self.assertEqual(self.client.get('/api/stats/', {'dimension': 'isbn'}).status_code, 400)
+
+    def test_rebuild_command(self) -> None:
+        self.create_book(1, self.tolkien)
+        CatalogStat.objects.update(count=42)
+        call_command('rebuild_catalog_stats', stdout=StringIO())
+        self.assertEqual(stored_stats()[('language', 'en')], 1)
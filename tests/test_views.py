@@ -1,12 +1,18 @@
+import json
+from contextlib import contextmanager
 from random import randint, randrange
 from datetime import timedelta, datetime
+from unittest import mock
 
-from django.test import TestCase, TransactionTestCase
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 
+from core import page_cache
 from core.models import Author, Book
 from core.forms import AddBookForm
 from core.views import FindBookView
+from tests.google_books_stub import GoogleBooksStubMixin
 
 
 def random_with_n_digits(n):
@@ -112,6 +118,13 @@ class FindBookViewTest(TestCase):
         self.assertEqual(str(messages[0]), 'Author has not been found.')
         self.assertEqual(str(messages[1]), 'Please find list of all books down below.')
 
+    def test_message_info_when_date_malformed(self):
+        response = self.client.get(reverse('find-book') + '?from_date=2005-13-01&language=pl')
+        self.assertEqual(response.status_code, 200)
+        messages = list(response.context['messages'])
+        self.assertEqual(str(messages[0]), 'Wrong date format, please try again.')
+        self.assertEqual(len(messages), 1)
+
     def test_function_is_valid_queryparam(self) -> None:
         self.assertEqual(FindBookView.is_valid_queryparam(''), False)
         self.assertEqual(FindBookView.is_valid_queryparam(None), False)
@@ -174,7 +187,7 @@ class AddBookViewTest(TestCase):
         response = self.client.post(reverse('add-book'),
                                     {'author': author,
                                      'pub_date': '2021-01-01',
-                                     'isbn': 1212121212121,
+                                     'isbn': '9780306406157',
                                      'language': 'pl',
                                      'title': 'The Witcher',
                                      'pages': 234,
@@ -185,12 +198,19 @@ class AddBookViewTest(TestCase):
         self.assertEqual(len(messages), 1)
         self.assertEqual(str(messages[0]), 'Book successfully added to database!')
 
+    def test_create_new_book_with_isbn_10(self) -> None:
+        author = Author.objects.get(id=1)
+        self.client.post(reverse('add-book'), {'author': author, 'pub_date': '2021-01-01', 'isbn': '0-306-40615-2',
+                                               'language': 'pl', 'title': 'The Witcher', 'pages': 234,
+                                               'cover_url': 'http://cover.pl/'})
+        self.assertEqual(Book.objects.get(title='The Witcher').isbn, '9780306406157')
+
     def test_create_new_book_when_pub_date_incorrect(self) -> None:
         author = Author.objects.get(id=1)
         response = self.client.post(reverse('add-book'),
                                     {'author': author,
                                      'pub_date': '2021-01',
-                                     'isbn': 1212121212121,
+                                     'isbn': '9780306406157',
                                      'language': 'pl',
                                      'title': 'The Witcher',
                                      'pages': 234,
@@ -216,10 +236,11 @@ class AddBookViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         messages = list(response.context['messages'])
         self.assertEqual(len(messages), 1)
-        self.assertEqual(str(messages[0]), 'ISBN number must have 13 digits. Please try again.')
+        self.assertEqual(str(messages[0]), 'Enter a valid ISBN-10 or ISBN-13. Please try again.')
 
 
-class ImportBookViewTest(TransactionTestCase):
+@override_settings(IMPORT_JOBS_EAGER=True)
+class ImportBookViewTest(GoogleBooksStubMixin, TransactionTestCase):
 
     @classmethod
     def setUpTestData(cls):
@@ -288,3 +309,269 @@ class ImportBookViewTest(TransactionTestCase):
         messages = list(response.context['messages'])
         self.assertEqual(len(messages), 1)
         self.assertEqual(str(messages[0]), 'No new books have been added to database.')
+
+
+class FindBookSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        tolkien = Author.objects.create(name='J. R. R. Tolkien')
+        sapkowski = Author.objects.create(name='Andrzej Sapkowski')
+        books = (
+            ('The Hobbit', tolkien),
+            ('The Lord of the Rings', tolkien),
+            ('The Last Wish', sapkowski),
+            ('Hobbit Holes: An Architectural Guide', sapkowski),
+        )
+        for title, author in books:
+            Book.objects.create(
+                title=title,
+                author=author,
+                pub_date='2000-01-01',
+                isbn=random_with_n_digits(13),
+                pages=133,
+                cover_url='http://cover_url.pl/',
+                language='en',
+            )
+
+    def titles(self, query_string):
+        response = self.client.get(reverse('find-book') + query_string)
+        self.assertEqual(response.status_code, 200)
+        return [book.title for book in response.context['page_obj']]
+
+    def test_partial_case_insensitive_title_match(self) -> None:
+        self.assertCountEqual(self.titles('?title=hobb'), ['The Hobbit', 'Hobbit Holes: An Architectural Guide'])
+
+    def test_multi_word_match_across_title_and_author(self) -> None:
+        self.assertEqual(self.titles('?q=hobbit tolkien'), ['The Hobbit'])
+
+    def test_results_are_ranked_by_relevance(self) -> None:
+        self.assertEqual(self.titles('?q=hobbit')[0], 'The Hobbit')
+
+    def test_partial_author_match(self) -> None:
+        self.assertCountEqual(self.titles('?author=sapk'), ['The Last Wish', 'Hobbit Holes: An Architectural Guide'])
+
+    def test_search_combined_with_filters(self) -> None:
+        self.assertEqual(self.titles('?q=the&language=pl'), [])
+        self.assertEqual(len(self.titles('?q=the&language=en')), 3)
+
+    def test_index_follows_renamed_title_and_author(self) -> None:
+        book = Book.objects.get(title='The Last Wish')
+        book.title = 'Sword of Destiny'
+        book.save()
+        Author.objects.filter(name='Andrzej Sapkowski').update(name='A. Sapkowski')
+        self.assertEqual(self.titles('?q=destiny sapkowski'), ['Sword of Destiny'])
+        self.assertEqual(self.titles('?title=wish'), [])
+
+    def test_index_follows_deleted_book(self) -> None:
+        Book.objects.filter(title='The Hobbit').delete()
+        self.assertEqual(self.titles('?q=hobbit tolkien'), [])
+
+    def test_search_text_is_not_parsed_as_query_syntax(self) -> None:
+        self.assertEqual(self.titles('?q="hobbit" OR NOT*'), [])
+
+
+class AuthorAutocompleteViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Tolkien', 'Tolstoy', 'Terry Pratchett', 'Sapkowski', 'Łukasz Orbitowski', 'J.R.R. Martin',
+                     'Émile Zola'):
+            Author.objects.create(name=name)
+
+    def names(self, **params):
+        response = self.client.get(reverse('author-autocomplete'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_prefix_match_is_case_insensitive(self) -> None:
+        self.assertEqual(self.names(q='tol'), ['Tolkien', 'Tolstoy'])
+        self.assertEqual(self.names(q='T'), ['Terry Pratchett', 'Tolkien', 'Tolstoy'])
+
+    def test_does_not_match_inside_names(self) -> None:
+        self.assertEqual(self.names(q='kien'), [])
+
+    def test_non_ascii_prefix(self) -> None:
+        self.assertEqual(self.names(q='Łuk'), ['Łukasz Orbitowski'])
+
+    def test_accents_and_punctuation_are_ignored(self) -> None:
+        self.assertEqual(self.names(q='emile'), ['Émile Zola'])
+        self.assertEqual(self.names(q='j r r'), ['J.R.R. Martin'])
+        self.assertEqual(self.names(q='J. R.'), ['J.R.R. Martin'])
+
+    def test_results_are_limited(self) -> None:
+        self.assertEqual(len(self.names(q='t', limit=2)), 2)
+        self.assertEqual(len(self.names(q='t', limit=1000)), 3)
+
+    def test_empty_prefix_returns_nothing(self) -> None:
+        self.assertEqual(self.names(q=' '), [])
+
+    def test_response_is_cacheable(self) -> None:
+        response = self.client.get(reverse('author-autocomplete'), {'q': 'tol'})
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_add_book_page_does_not_embed_authors(self) -> None:
+        response = self.client.get(reverse('add-book'))
+        self.assertNotContains(response, 'Tolkien')
+        self.assertContains(response, f'data-autocomplete-url="{reverse("author-autocomplete")}"')
+
+
+class BookExportViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        tolkien = Author.objects.create(name='J. R. R. Tolkien')
+        sapkowski = Author.objects.create(name='Andrzej Sapkowski')
+        books = (
+            ('The Hobbit', tolkien, 'en', '1937-09-21'),
+            ('The Lord of the Rings', tolkien, 'en', '1954-07-29'),
+            ('Ostatnie życzenie', sapkowski, 'pl', '1993-01-01'),
+        )
+        for number, (title, author, language, pub_date) in enumerate(books):
+            Book.objects.create(
+                title=title,
+                author=author,
+                pub_date=pub_date,
+                isbn=f'978000000000{number}',
+                pages=133,
+                cover_url='http://cover_url.pl/',
+                language=language,
+            )
+
+    def export(self, query_string):
+        response = self.client.get(reverse('export-books') + query_string)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_of_whole_catalog(self) -> None:
+        lines = self.export('').splitlines()
+        self.assertEqual(lines[0], 'id,title,author,pub_date,isbn,pages,cover_url,language')
+        self.assertEqual(len(lines), 4)
+        self.assertIn('Ostatnie życzenie,Andrzej Sapkowski,1993-01-01,9780000000002,133', lines[1])
+
+    def test_ndjson_export_with_find_book_filters(self) -> None:
+        content = self.export('?format=ndjson&q=tolkien&from_date=1950-01-01')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'The Lord of the Rings')
+        self.assertEqual(rows[0]['author'], 'J. R. R. Tolkien')
+        self.assertEqual(rows[0]['pub_date'], '1954-07-29')
+
+    def test_empty_export(self) -> None:
+        self.assertEqual(self.export('?language=de').splitlines(), ['id,title,author,pub_date,isbn,pages,cover_url,language'])
+        self.assertEqual(self.export('?language=de&format=ndjson'), '')
+
+    def test_unknown_format(self) -> None:
+        response = self.client.get(reverse('export-books') + '?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_malformed_dates_are_rejected(self) -> None:
+        response = self.client.get(reverse('export-books'), {'from_date': '1950-13-01', 'to_date': 'soon'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b'from_date: Enter a valid date in YYYY-MM-DD format.', response.content)
+        self.assertIn(b'to_date:', response.content)
+
+
+class FindBookCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='J. R. R. Tolkien')
+        cls.book = Book.objects.create(
+            title='The Hobbit',
+            author=cls.author,
+            pub_date='1937-09-21',
+            isbn='9780000000001',
+            pages=310,
+            cover_url='http://cover_url.pl/',
+            language='en',
+        )
+
+    def get(self, **params):
+        return self.client.get(reverse('find-book'), params)
+
+    @contextmanager
+    def commit(self):
+        """Runs the on-commit invalidation of the writes made inside the block."""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+            yield callbacks
+
+    def test_repeated_query_is_served_from_cache(self) -> None:
+        self.assertIn('page_obj', self.get(language='en').context)
+        response = self.get(language=' en ')
+        self.assertNotIn('page_obj', response.context)
+        self.assertContains(response, 'The Hobbit')
+
+    @override_settings(FIND_BOOK_CACHE_TIMEOUT=0)
+    def test_filters_are_cleaned_like_the_cache_key(self) -> None:
+        self.assertContains(self.get(language=' en '), 'The Hobbit')
+        self.assertContains(self.get(q='  HOBBIT '), 'The Hobbit')
+
+    def test_page_links_are_not_cached(self) -> None:
+        for number in range(2, 12):
+            Book.objects.create(title=f'Book {number}', author=self.author, pub_date='1950-01-01',
+                                isbn=f'97800000000{number:02d}', pages=100, cover_url='http://cover_url.pl/',
+                                language='en')
+        self.get(language='en', utm_source='newsletter')
+        response = self.get(language='en')
+        self.assertNotIn('page_obj', response.context)
+        self.assertContains(response, '?language=en&cursor=')
+        self.assertNotContains(response, 'utm_source')
+
+    def test_messages_are_kept_for_cached_pages(self) -> None:
+        self.get(author='sapkowski')
+        response = self.get(author='Sapkowski')
+        self.assertEqual([str(message) for message in response.context['messages']], ['Author has not been found.',
+                                                                                      'Please find list of all books down below.'])
+
+    def test_edits_invalidate_cached_pages(self) -> None:
+        self.get(q='hobbit')
+        with self.commit():
+            self.book.title = 'The Hobbit, or There and Back Again'
+            self.book.save()
+        self.assertContains(self.get(q='hobbit'), 'There and Back Again')
+
+        with self.commit():
+            self.author.name = 'Tolkien'
+            self.author.save()
+        self.assertContains(self.get(q='hobbit'), '>Tolkien<')
+
+        with mock.patch('core.page_cache.bump_generation', wraps=page_cache.bump_generation) as bump:
+            with self.commit():
+                self.client.delete('/api/books/bulk/', [self.book.id], content_type='application/json')
+        self.assertEqual(bump.call_count, 1)
+        self.assertNotContains(self.get(q='hobbit'), 'There and Back Again')
+
+    def test_rolled_back_savepoint_keeps_the_outer_bump(self) -> None:
+        generation = page_cache.get_generation()
+        with self.commit():
+            page_cache.invalidate()
+            try:
+                with transaction.atomic():
+                    page_cache.invalidate()
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(page_cache.get_generation(), generation + 1)
+
+        with self.commit():
+            try:
+                with transaction.atomic():
+                    page_cache.invalidate()
+                    raise ValueError
+            except ValueError:
+                pass
+            page_cache.invalidate()
+        self.assertEqual(page_cache.get_generation(), generation + 2)
+
+    def test_bulk_writes_invalidate_cached_pages(self) -> None:
+        self.get()
+        with self.commit():
+            response = self.client.post('/api/books/bulk/', [{
+                'title': 'The Silmarillion', 'author': self.author.id, 'pub_date': '1977-09-15',
+                'isbn': '9780000000002', 'pages': 365, 'cover_url': 'http://covers.example.com/2.jpg',
+                'language': 'en',
+            }], content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertContains(self.get(), 'The Silmarillion')